@@ -10,6 +10,8 @@ confspec = {
 	"nvdaSourcePath": 'string(default="")',
 	"logBackup": 'option("off", "maxNumber", default="off")',
 	"logBackupMaxNumber": 'integer(min=1, max=100, default=3)',
+	"logArchive": 'boolean(default=False)',
+	"logArchiveMaxDays": 'integer(min=0, max=3650, default=0)',
 	
 }
 config.conf.spec["ndtt"] = confspec
@@ -0,0 +1,297 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Archives the messages of the backup logs in a SQLite database, so that they can be queried across many
+sessions, even after the backups themselves have been deleted.
+Each message is stored in one row, with its level, code path, thread and absolute time (milliseconds since
+the epoch, UTC) indexed.
+Usage from the Python console:
+from globalPlugins.ndtt.logArchive import LogArchive
+LogArchive().query(level='ERROR', codePathPrefix='_UIAHandler', start=datetime.utcnow() - timedelta(days=7))
+"""
+
+from __future__ import unicode_literals
+
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+
+try:
+	import sqlite3
+except ImportError:
+	# sqlite3 is not included in all NVDA versions.
+	sqlite3 = None
+
+import globalVars
+from logHandler import log
+
+from .mappedLog import MappedLog
+from .logManagement import RE_LOG_BACKUP_FILENAME, listLogFiles
+from .logStats import MS_PER_DAY
+from .logTimeIndex import getLocalDate
+
+ARCHIVE_FILENAME = 'logsArchive.sqlite3'
+# Number of messages passed to each executemany call.
+INSERT_BATCH_SIZE = 5000
+INSERT_MESSAGES = 'INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+	id INTEGER PRIMARY KEY,
+	fileName TEXT UNIQUE NOT NULL,
+	size INTEGER NOT NULL,
+	nMessages INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+	logId INTEGER NOT NULL REFERENCES logs(id),
+	idx INTEGER NOT NULL,
+	level TEXT NOT NULL,
+	codePath TEXT NOT NULL,
+	threadName TEXT,
+	threadId INTEGER,
+	time INTEGER NOT NULL,
+	text TEXT NOT NULL,
+	PRIMARY KEY (logId, idx)
+);
+CREATE INDEX IF NOT EXISTS messagesLevel ON messages (level, time);
+CREATE INDEX IF NOT EXISTS messagesCodePath ON messages (codePath, time);
+CREATE INDEX IF NOT EXISTS messagesThread ON messages (threadName, time);
+CREATE INDEX IF NOT EXISTS messagesTime ON messages (time);
+"""
+
+# Only one ingestion runs at a time.
+_ingestLock = threading.Lock()
+
+
+def isAvailable():
+	return sqlite3 is not None
+
+
+def getDefaultArchivePath():
+	return os.path.join(globalVars.appArgs.configPath, 'ndtt', ARCHIVE_FILENAME)
+
+
+def getLogStartDateTime(fileName):
+	"""Returns the UTC start date and time of a backup log from its file name, or None."""
+	m = RE_LOG_BACKUP_FILENAME.match(fileName)
+	if not m:
+		return None
+	return datetime(*(int(v) for v in m.group('year', 'month', 'day', 'hour', 'minute', 'second')))
+
+
+def toTimestamp(dt):
+	"""Converts a naive UTC datetime to milliseconds since the epoch."""
+	return int((dt - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+class LogArchive(object):
+	"""A SQLite database containing the messages of the backup logs.
+	A connection is opened for each operation, so that a LogArchive can be used from any thread.
+	"""
+
+	def __init__(self, path=None):
+		if sqlite3 is None:
+			raise RuntimeError('sqlite3 is not available')
+		self.path = path or getDefaultArchivePath()
+
+	def connect(self):
+		folder = os.path.dirname(self.path)
+		if folder and not os.path.isdir(folder):
+			os.makedirs(folder)
+		con = sqlite3.connect(self.path)
+		con.executescript(SCHEMA)
+		return con
+
+	def getArchivedLogs(self):
+		"""Returns the set of the file names of the archived logs."""
+		con = self.connect()
+		try:
+			return set(row[0] for row in con.execute('SELECT fileName FROM logs'))
+		finally:
+			con.close()
+
+	def ingestLogFile(self, path):
+		"""Adds the messages of the backup log located at path to the archive.
+		Returns the number of messages added, 0 if the log is already archived.
+		"""
+
+		fileName = os.path.basename(path)
+		con = self.connect()
+		try:
+			if con.execute('SELECT 1 FROM logs WHERE fileName = ?', (fileName,)).fetchone():
+				return 0
+			with MappedLog(path, useSidecar=True) as mLog:
+				times = self.getAbsoluteTimes(mLog.sidecar.timeIndex, getLogStartDateTime(fileName))
+				# A single transaction, so that a log is never partially archived.
+				with con:
+					cursor = con.execute(
+						'INSERT INTO logs (fileName, size, nMessages) VALUES (?, ?, ?)',
+						(fileName, mLog.size, len(mLog)),
+					)
+					logId = cursor.lastrowid
+					rows = []
+					for i, msg in enumerate(mLog.iterMessages()):
+						header = msg.header
+						rows.append((
+							logId,
+							i,
+							header.level,
+							header.codePath,
+							header.threadName,
+							int(header.thread) if header.thread else None,
+							times[i],
+							msg.msg,
+						))
+						if len(rows) >= INSERT_BATCH_SIZE:
+							con.executemany(INSERT_MESSAGES, rows)
+							rows = []
+					con.executemany(INSERT_MESSAGES, rows)
+				return len(mLog)
+		finally:
+			con.close()
+
+	@staticmethod
+	def getAbsoluteTimes(timeIndex, startDateTime):
+		"""Returns the times of the messages of timeIndex in milliseconds since the epoch (UTC).
+		The local date of the log is the one logged at NVDA startup; if not available, it is deduced from
+		startDateTime, the UTC start date and time of the log.
+		The UTC offset is the one of the local date; a change of daylight saving time during the session is ignored.
+		"""
+
+		if not timeIndex.times:
+			return []
+		date = timeIndex.firstDate
+		if date is None and startDateTime is not None:
+			date = getLocalDate(startDateTime, timeIndex.times[0] % MS_PER_DAY)
+		if date is None:
+			date = datetime.utcnow().date()
+		base = int(time.mktime(date.timetuple())) * 1000
+		return [base + t for t in timeIndex.times]
+
+	def ingestLogFiles(self, paths):
+		"""Adds the logs of paths that are not archived yet."""
+		with _ingestLock:
+			archived = self.getArchivedLogs()
+			for path in paths:
+				if os.path.basename(path) in archived:
+					continue
+				try:
+					n = self.ingestLogFile(path)
+				except Exception:
+					log.error('Unable to archive {path}'.format(path=path), exc_info=True)
+					continue
+				log.debug('Archived {n} messages of {path}'.format(n=n, path=path))
+
+	def prune(self, before, existingPaths=()):
+		"""Deletes the archived messages logged before the naive UTC datetime before.
+		The archived logs whose messages have all been deleted are forgotten, unless they are in existingPaths,
+		i.e. they are still backed up: they would then be archived again.
+		Returns the number of deleted messages.
+		"""
+
+		existing = set(os.path.basename(path) for path in existingPaths)
+		with _ingestLock:
+			con = self.connect()
+			try:
+				with con:
+					nDeleted = con.execute('DELETE FROM messages WHERE time < ?', (toTimestamp(before),)).rowcount
+					emptyLogs = con.execute(
+						'SELECT id, fileName FROM logs WHERE id NOT IN (SELECT DISTINCT logId FROM messages)'
+					).fetchall()
+					con.executemany(
+						'DELETE FROM logs WHERE id = ?',
+						[(logId,) for logId, fileName in emptyLogs if fileName not in existing],
+					)
+				if nDeleted > 0:
+					# Deleted rows are only given back to the file system when the database is rebuilt.
+					con.execute('VACUUM')
+				return nDeleted
+			finally:
+				con.close()
+
+	def query(
+			self,
+			level=None,
+			codePathPrefix=None,
+			threadName=None,
+			start=None,
+			end=None,
+			text=None,
+			limit=1000,
+	):
+		"""Returns a list of (fileName, index, level, codePath, threadName, time, text) tuples for the archived
+		messages matching all the given criteria, ordered by time.
+		start and end are naive UTC datetimes; time is returned as a naive UTC datetime.
+		codePathPrefix matches the beginning of the code path, e.g. "_UIAHandler"; text is searched in the
+		content of the messages and cannot use an index.
+		"""
+
+		conditions = []
+		params = []
+		if level is not None:
+			conditions.append('level = ?')
+			params.append(level.upper())
+		if codePathPrefix:
+			# A range rather than LIKE, so that the index on codePath can be used.
+			conditions.append('codePath >= ? AND codePath < ?')
+			params.extend([codePathPrefix, codePathPrefix + '\uffff'])
+		if threadName is not None:
+			conditions.append('threadName = ?')
+			params.append(threadName)
+		if start is not None:
+			conditions.append('time >= ?')
+			params.append(toTimestamp(start))
+		if end is not None:
+			conditions.append('time < ?')
+			params.append(toTimestamp(end))
+		if text:
+			conditions.append("instr(text, ?) > 0")
+			params.append(text)
+		sql = (
+			'SELECT logs.fileName, idx, level, codePath, threadName, time, text'
+			' FROM messages JOIN logs ON logs.id = messages.logId'
+		)
+		if conditions:
+			sql += ' WHERE ' + ' AND '.join(conditions)
+		sql += ' ORDER BY time LIMIT ?'
+		params.append(limit)
+		con = self.connect()
+		try:
+			return [
+				row[:5] + (datetime(1970, 1, 1) + timedelta(milliseconds=row[5]), row[6])
+				for row in con.execute(sql, params)
+			]
+		finally:
+			con.close()
+
+
+def archiveBackupLogs(logDirPath, maxDays=0):
+	"""Adds the backup logs of logDirPath that are not archived yet to the archive and deletes the messages
+	older than maxDays days (if not 0), in a background thread.
+	"""
+	if sqlite3 is None:
+		log.debugWarning('sqlite3 is not available; backup logs cannot be archived.')
+		return None
+	thread = threading.Thread(
+		target=_archiveBackupLogs,
+		args=(listLogFiles(logDirPath), maxDays),
+		name='ndttLogArchive',
+	)
+	thread.daemon = True
+	thread.start()
+	return thread
+
+
+def _archiveBackupLogs(paths, maxDays):
+	archive = LogArchive()
+	archive.ingestLogFiles(paths)
+	if maxDays:
+		try:
+			n = archive.prune(datetime.utcnow() - timedelta(days=maxDays), existingPaths=paths)
+		except Exception:
+			log.error('Unable to prune the logs archive', exc_info=True)
+			return
+		log.debug('Deleted {n} messages from the logs archive'.format(n=n))
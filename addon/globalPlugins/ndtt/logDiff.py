@@ -0,0 +1,313 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Compares the structure of two logs, e.g. the logs of two NVDA builds when a regression appears.
+Messages are not compared line by line: each log is summarized in a single streaming pass into counts per
+message kind (level and IO message kind) and code path, error fingerprints and latency per input gesture; only
+these summaries are kept in memory and compared. Times, numbers and object addresses are ignored.
+"""
+
+from __future__ import unicode_literals
+
+import re
+from collections import Counter
+
+import addonHandler
+
+from .logReader import (
+	iterHeaderMatches,
+	classifyIoMessage,
+	TYPE_STR,
+)
+from .logErrors import ErrorFingerprint, getErrorDescription, ERROR_LEVELS
+from .logLatency import LatencyAnalyzer
+from .logStats import TimeUnwrapper
+from .logStore import parseTime
+
+addonHandler.initTranslation()
+
+# Object addresses that may appear in code paths, e.g. in the name of lambda functions.
+RE_ADDRESS = re.compile(r'0x[0-9A-Fa-f]+')
+
+
+def getModule(codePath):
+	"""Returns the module (or class) part of a code path, i.e. without the name of the function."""
+	return codePath.rpartition('.')[0] or codePath
+
+
+class GestureLatencyAccumulator(LatencyAnalyzer):
+	"""Accumulates the latency statistics of each input gesture without keeping the pairs, so that memory stays
+	bounded whatever the size of the log.
+	"""
+
+	def __init__(self):
+		super(GestureLatencyAccumulator, self).__init__()
+		# Gesture -> [count, total latency, max latency]
+		self.gestures = {}
+		# The last pair is only accounted when the next one is found, since its latency may still be corrected.
+		self._unaccountedPair = None
+
+	def addPair(self, pair):
+		self.flush()
+		self._unaccountedPair = pair
+
+	def flush(self):
+		pair = self._unaccountedPair
+		if pair is None:
+			return
+		self._unaccountedPair = None
+		stats = self.gestures.setdefault(pair.gesture, [0, 0, 0])
+		stats[0] += 1
+		stats[1] += pair.latency
+		stats[2] = max(stats[2], pair.latency)
+
+	def getMeanLatency(self, gesture):
+		count, total, maxLatency = self.gestures[gesture]
+		return float(total) / count
+
+
+class LogProfile(object):
+	"""The summary of a log used to compare it to another log."""
+
+	def __init__(self):
+		self.nMessages = 0
+		# (level, IO message kind or empty string, code path) -> number of messages
+		self.kinds = Counter()
+		self.modules = Counter()
+		self.errors = Counter()
+		# Fingerprint -> description of its first occurrence
+		self.errorDescriptions = {}
+		self.latency = GestureLatencyAccumulator()
+		self._unwrapper = TimeUnwrapper()
+		self.firstTime = None
+		self.lastTime = None
+
+	@classmethod
+	def makeFromFile(cls, path, encoding='utf-8'):
+		"""Summarizes a log file, reading it through a memory map."""
+		from .mappedLog import MappedLog
+		profile = cls()
+		with MappedLog(path, encoding=encoding, indexed=False) as mLog:
+			profile.addText(mLog.buffer, encoding=encoding)
+		profile.finish()
+		return profile
+
+	@classmethod
+	def makeFromText(cls, text):
+		profile = cls()
+		profile.addText(text)
+		profile.finish()
+		return profile
+
+	def addText(self, text, encoding='utf-8'):
+		"""Summarizes the messages of text, which may also be a bytes-like object such as a memory map."""
+
+		if isinstance(text, TYPE_STR):
+			decode = None
+		else:
+			# Levels and code paths are repeated many times; decode each of them only once.
+			decodedStrings = {}
+
+			def decode(data):
+				try:
+					return decodedStrings[data]
+				except KeyError:
+					string = decodedStrings[data] = data.decode(encoding, 'replace')
+					return string
+		previous = None
+		for offset, match in iterHeaderMatches(text):
+			if previous is not None:
+				self._addMessage(text, previous, offset, decode, encoding)
+			previous = offset, match
+		if previous is not None:
+			self._addMessage(text, previous, len(text), decode, encoding)
+
+	def _addMessage(self, text, header, end, decode, encoding):
+		offset, match = header
+		level, codePath, time = match.group('level', 'codePath', 'time')
+		if decode is not None:
+			# Times are not cached since they are almost all different.
+			level, codePath, time = decode(level), decode(codePath), time.decode(encoding)
+		codePath = RE_ADDRESS.sub('#', codePath)
+		content = None
+		if level == 'IO' or level in ERROR_LEVELS:
+			content = text[match.end():end]
+			if decode is not None:
+				content = content.decode(encoding, 'replace')
+		self.addMessage(offset, level, codePath, parseTime(time), content)
+
+	def addMessage(self, offset, level, codePath, time, content):
+		"""Accounts a message; time is in milliseconds since midnight and content is only needed for IO and
+		error messages.
+		"""
+
+		self.nMessages += 1
+		unwrappedTime = self._unwrapper.unwrap(time)
+		if self.firstTime is None:
+			self.firstTime = self.lastTime = unwrappedTime
+		# Messages of different threads may be logged slightly out of order.
+		self.lastTime = max(self.lastTime, unwrappedTime)
+		kind = ''
+		if level == 'IO':
+			kind = classifyIoMessage(content.strip()).kind
+		elif level in ERROR_LEVELS:
+			fingerprint = ErrorFingerprint.makeFromMessage(codePath, content)
+			self.errors[fingerprint] += 1
+			if fingerprint not in self.errorDescriptions:
+				self.errorDescriptions[fingerprint] = getErrorDescription(content)
+		self.kinds[level, kind, codePath] += 1
+		self.modules[getModule(codePath)] += 1
+		self.latency.addMessage(offset, level, codePath, time, content)
+
+	def finish(self):
+		"""To be called when all the messages have been accounted."""
+		self.latency.flush()
+
+	@property
+	def durationMinutes(self):
+		"""Duration of the log in minutes, at least one second."""
+		if self.firstTime is None:
+			return 1. / 60
+		return max(self.lastTime - self.firstTime, 1000) / 60000.
+
+	def getRate(self, module):
+		"""Returns the number of messages logged per minute by a module."""
+		return self.modules[module] / self.durationMinutes
+
+
+class LogDiff(object):
+	"""The differences between an old and a new log."""
+
+	# Minimum number of messages of a module in one of the logs to consider its rate change.
+	MIN_RATE_COUNT = 10
+	# Minimum ratio between the rates of a module in both logs to report it.
+	MIN_RATE_RATIO = 2.
+	# Minimum latency shift of a gesture to report it, in milliseconds.
+	MIN_LATENCY_SHIFT = 20
+
+	def __init__(self, oldProfile, newProfile):
+		self.old = oldProfile
+		self.new = newProfile
+
+	@classmethod
+	def makeFromFiles(cls, oldPath, newPath):
+		return cls(LogProfile.makeFromFile(oldPath), LogProfile.makeFromFile(newPath))
+
+	def getNewErrors(self):
+		"""Returns the (fingerprint, count) tuples of the errors only found in the new log, most frequent first."""
+		return [(fp, count) for fp, count in self.new.errors.most_common() if fp not in self.old.errors]
+
+	def getVanishedErrors(self):
+		"""Returns the (fingerprint, count) tuples of the errors only found in the old log, most frequent first."""
+		return [(fp, count) for fp, count in self.old.errors.most_common() if fp not in self.new.errors]
+
+	@staticmethod
+	def getOwnKinds(profile, otherProfile):
+		"""Returns the (kind, count) tuples of the message kinds of profile not found in otherProfile."""
+		return [(kind, count) for kind, count in profile.kinds.most_common() if kind not in otherProfile.kinds]
+
+	def getRateChanges(self):
+		"""Returns (module, old rate, new rate) tuples for the modules whose message rate has changed
+		significantly, the biggest change first.
+		"""
+
+		changes = []
+		for module in set(self.old.modules) | set(self.new.modules):
+			if max(self.old.modules[module], self.new.modules[module]) < self.MIN_RATE_COUNT:
+				continue
+			oldRate = self.old.getRate(module)
+			newRate = self.new.getRate(module)
+			low, high = sorted((oldRate, newRate))
+			if low == 0 or high / low >= self.MIN_RATE_RATIO:
+				changes.append((module, oldRate, newRate))
+		changes.sort(key=lambda item: -abs(item[2] - item[1]))
+		return changes
+
+	def getLatencyShifts(self):
+		"""Returns (gesture, old mean latency, new mean latency) tuples for the gestures performed in both logs
+		whose mean latency has changed significantly, the biggest shift first.
+		"""
+
+		oldLatency = self.old.latency
+		newLatency = self.new.latency
+		shifts = []
+		for gesture in set(oldLatency.gestures) & set(newLatency.gestures):
+			oldMean = oldLatency.getMeanLatency(gesture)
+			newMean = newLatency.getMeanLatency(gesture)
+			if abs(newMean - oldMean) >= self.MIN_LATENCY_SHIFT:
+				shifts.append((gesture, oldMean, newMean))
+		shifts.sort(key=lambda item: -abs(item[2] - item[1]))
+		return shifts
+
+	@staticmethod
+	def formatKind(kind):
+		level, ioKind, codePath = kind
+		if ioKind:
+			return '{level} {ioKind} - {codePath}'.format(level=level, ioKind=ioKind, codePath=codePath)
+		return '{level} - {codePath}'.format(level=level, codePath=codePath)
+
+	def getReport(self, nTop=20):
+		"""Returns the differences as a text to be displayed in a browseable message."""
+
+		lines = []
+		# Translators: A line of the log comparison report.
+		lines.append(_("Old log: {n} messages in {minutes:.1f} minutes").format(
+			n=self.old.nMessages,
+			minutes=self.old.durationMinutes,
+		))
+		# Translators: A line of the log comparison report.
+		lines.append(_("New log: {n} messages in {minutes:.1f} minutes").format(
+			n=self.new.nMessages,
+			minutes=self.new.durationMinutes,
+		))
+
+		for title, errors, profile in (
+			# Translators: A title in the log comparison report.
+			(_("New errors:"), self.getNewErrors(), self.new),
+			# Translators: A title in the log comparison report.
+			(_("Vanished errors:"), self.getVanishedErrors(), self.old),
+		):
+			lines.append('')
+			lines.append(title)
+			if not errors:
+				# Translators: Displayed in the log comparison report when a section is empty.
+				lines.append(_("None"))
+			for fingerprint, count in errors[:nTop]:
+				lines.append('{desc} ({count})'.format(desc=profile.errorDescriptions[fingerprint], count=count))
+
+		for title, kinds in (
+			# Translators: A title in the log comparison report.
+			(_("Message kinds only in the new log:"), self.getOwnKinds(self.new, self.old)),
+			# Translators: A title in the log comparison report.
+			(_("Message kinds only in the old log:"), self.getOwnKinds(self.old, self.new)),
+		):
+			lines.append('')
+			lines.append(title)
+			if not kinds:
+				# Translators: Displayed in the log comparison report when a section is empty.
+				lines.append(_("None"))
+			for kind, count in kinds[:nTop]:
+				lines.append('{kind} ({count})'.format(kind=self.formatKind(kind), count=count))
+
+		lines.append('')
+		# Translators: A title in the log comparison report.
+		lines.append(_("Changed message rates (messages per minute, old -> new):"))
+		changes = self.getRateChanges()
+		if not changes:
+			# Translators: Displayed in the log comparison report when a section is empty.
+			lines.append(_("None"))
+		for module, oldRate, newRate in changes[:nTop]:
+			lines.append('{module}: {old:.1f} -> {new:.1f}'.format(module=module, old=oldRate, new=newRate))
+
+		lines.append('')
+		# Translators: A title in the log comparison report.
+		lines.append(_("Input to speech latency shifts (mean in ms, old -> new):"))
+		shifts = self.getLatencyShifts()
+		if not shifts:
+			# Translators: Displayed in the log comparison report when a section is empty.
+			lines.append(_("None"))
+		for gesture, oldMean, newMean in shifts[:nTop]:
+			lines.append('{gesture}: {old:.0f} -> {new:.0f}'.format(gesture=gesture, old=oldMean, new=newMean))
+		return '\n'.join(lines)
@@ -0,0 +1,255 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Groups the errors of a log by fingerprint, so that an error logged many times can be considered only once.
+The fingerprint of an error with a traceback is made of the exception type and of the list of the frames
+(file and function) of the traceback; line numbers and exception messages are ignored.
+"""
+
+from __future__ import unicode_literals
+
+import re
+from array import array
+
+import addonHandler
+
+from .logReader import (
+	iterHeaderMatches,
+	RE_MESSAGE_HEADER_AT,
+	RE_STACK_TRACE_LINE,
+	TRACEBACK_HEADER,
+	OFFSET_TYPECODE,
+	TYPE_STR,
+)
+from .logStore import parseTime, formatTime
+
+addonHandler.initTranslation()
+
+# The levels of the messages considered as errors.
+ERROR_LEVELS = ('ERROR', 'CRITICAL')
+
+# Variable parts of an error message without traceback, ignored in its fingerprint.
+RE_VARIABLE_PART = re.compile(r'0x[0-9A-Fa-f]+|\d+')
+
+
+class ErrorFingerprint(object):
+	"""Identifies the errors of a log that are likely to have the same cause."""
+
+	__slots__ = ('excType', 'frames', 'text')
+
+	def __init__(self, excType, frames, text=''):
+		# Exception type, e.g. "ValueError"; empty for an error without traceback.
+		self.excType = excType
+		# Tuple of (path, function) tuples, from the outermost to the innermost frame.
+		self.frames = frames
+		# Normalized message for an error without traceback, otherwise empty.
+		self.text = text
+
+	@classmethod
+	def makeFromMessage(cls, codePath, msg):
+		"""Computes the fingerprint of an error message; msg is the content of the message, without header."""
+
+		lines = msg.strip().splitlines()
+		try:
+			idxTraceback = lines.index(TRACEBACK_HEADER)
+		except ValueError:
+			firstLine = lines[0].strip() if lines else ''
+			return cls('', (), '{codePath}: {msg}'.format(codePath=codePath, msg=RE_VARIABLE_PART.sub('#', firstLine)))
+		frames = []
+		for line in lines[idxTraceback + 1:]:
+			match = RE_STACK_TRACE_LINE.match(line.strip())
+			if match:
+				path = match.group('path').replace('\\', '/').lower()
+				frames.append((path, match.group('func') or ''))
+		excType = lines[-1].partition(':')[0].strip()
+		if ' ' in excType:
+			# Not an exception line, e.g. truncated traceback.
+			excType = ''
+		return cls(excType, tuple(frames))
+
+	@property
+	def key(self):
+		return (self.excType, self.frames, self.text)
+
+	def __eq__(self, other):
+		return isinstance(other, ErrorFingerprint) and self.key == other.key
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.key)
+
+	def __repr__(self):
+		return 'ErrorFingerprint({key!r})'.format(key=self.key)
+
+
+def getErrorDescription(msg):
+	"""Returns a short description of an error message: the exception line if the message contains a traceback,
+	otherwise its first line.
+	"""
+
+	lines = [line for line in msg.strip().splitlines() if line.strip()]
+	if not lines:
+		return ''
+	if TRACEBACK_HEADER in lines:
+		return lines[-1].strip()
+	return lines[0].strip()
+
+
+class LogErrorIndex(object):
+	"""Index of the errors of a log grouped by fingerprint.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		# Columns describing each error, in the order of the log.
+		self.offsets = array(OFFSET_TYPECODE)
+		self.times = array('l')
+		self.fingerprintIds = array('L')
+		# Distinct fingerprints, in the order of their first occurrence.
+		self.fingerprints = []
+		self._fingerprintIds = {}
+		# Offset, code path and description of the first occurrence of each fingerprint.
+		self.firstOffsets = array(OFFSET_TYPECODE)
+		self.codePaths = []
+		self.descriptions = []
+		# Offset of the last header found, whatever its level.
+		self._lastHeaderOffset = None
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		index = cls()
+		index.addText(text)
+		return index
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def addText(self, text, base=0):
+		"""Indexes the errors of text.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		text may also be a bytes-like object encoded in UTF-8, such as a memory map.
+		"""
+
+		isText = isinstance(text, TYPE_STR)
+		previous = None
+		for offset, match in iterHeaderMatches(text):
+			if previous is not None:
+				self._addMessage(text, previous, offset, base, isText)
+			previous = offset, match
+		if previous is not None:
+			self._addMessage(text, previous, len(text), base, isText)
+			self._lastHeaderOffset = base + previous[0]
+		self.length = base + len(text)
+
+	def _addMessage(self, text, header, end, base, isText=True):
+		offset, match = header
+		level, codePath, time = match.group('level', 'codePath', 'time')
+		if not isText:
+			if level.decode('ascii') not in ERROR_LEVELS:
+				return
+			codePath = codePath.decode('utf-8', 'replace')
+			time = time.decode('ascii')
+			msg = text[match.end():end].decode('utf-8', 'replace')
+		else:
+			if level not in ERROR_LEVELS:
+				return
+			msg = text[match.end():end]
+		fingerprint = ErrorFingerprint.makeFromMessage(codePath, msg)
+		try:
+			fpId = self._fingerprintIds[fingerprint]
+		except KeyError:
+			fpId = len(self.fingerprints)
+			self.fingerprints.append(fingerprint)
+			self._fingerprintIds[fingerprint] = fpId
+			self.firstOffsets.append(base + offset)
+			self.codePaths.append(codePath)
+			self.descriptions.append(getErrorDescription(msg))
+		self.offsets.append(base + offset)
+		self.times.append(parseTime(time))
+		self.fingerprintIds.append(fpId)
+
+	def getUpdateStart(self):
+		if self._lastHeaderOffset is None:
+			return 0
+		return self._lastHeaderOffset
+
+	def update(self, tailText, base):
+		"""Indexes tailText, the end of the log starting at offset base.
+		The last message is indexed again since its content may have grown, e.g. while a traceback is written.
+		Returns False if tailText does not match the part of the log already indexed.
+		"""
+
+		if base > 0 and not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		if self.offsets and self.offsets[-1] == base:
+			self._removeLastError()
+		self.addText(tailText, base=base)
+		return True
+
+	def _removeLastError(self):
+		offset = self.offsets.pop()
+		self.times.pop()
+		fpId = self.fingerprintIds.pop()
+		if self.firstOffsets[fpId] == offset:
+			# This was the only occurrence of the last fingerprint.
+			del self._fingerprintIds[self.fingerprints.pop()]
+			self.firstOffsets.pop()
+			self.codePaths.pop()
+			self.descriptions.pop()
+
+	def getDistinctOffsets(self):
+		"""Returns the sorted offsets of the first occurrence of each distinct error."""
+		return self.firstOffsets
+
+	def getSummary(self):
+		"""Returns a list of (fingerprint id, count, first time, last time) tuples, the most frequent error first.
+		Times are in milliseconds since midnight.
+		"""
+
+		counts = [0] * len(self.fingerprints)
+		firstTimes = [None] * len(self.fingerprints)
+		lastTimes = [None] * len(self.fingerprints)
+		for fpId, time in zip(self.fingerprintIds, self.times):
+			counts[fpId] += 1
+			if firstTimes[fpId] is None:
+				firstTimes[fpId] = time
+			lastTimes[fpId] = time
+		summary = list(zip(range(len(counts)), counts, firstTimes, lastTimes))
+		summary.sort(key=lambda item: (-item[1], item[0]))
+		return summary
+
+	def getReport(self):
+		"""Returns the summary of the unique errors as a text to be displayed in a browseable message."""
+
+		if not self.offsets:
+			# Translators: Reported in the unique errors summary when the log contains no error.
+			return _("No error found in the log.")
+		lines = []
+		# Translators: The first line of the unique errors summary.
+		lines.append(_("{nErrors} errors, {nUnique} unique").format(
+			nErrors=len(self.offsets),
+			nUnique=len(self.fingerprints),
+		))
+		for fpId, count, firstTime, lastTime in self.getSummary():
+			lines.append('')
+			lines.append(self.descriptions[fpId])
+			# Translators: A line of the unique errors summary.
+			lines.append(_("{count} times, first at {first}, last at {last}; logged from {codePath}").format(
+				count=count,
+				first=formatTime(firstTime),
+				last=formatTime(lastTime),
+				codePath=self.codePaths[fpId],
+			))
+			frames = self.fingerprints[fpId].frames
+			if frames:
+				# Translators: A line of the unique errors summary listing the frames of the traceback.
+				lines.append(_("Stack: {frames}").format(
+					frames=', '.join('{path} {func}'.format(path=path, func=func).strip() for path, func in frames)
+				))
+		return '\n'.join(lines)
@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Searches a pattern in many log files at once, e.g. in all the backups of the logs.
+Log files are searched one after the other in a single background thread, and matches are reported as soon as
+they are found.
+Searching is CPU-bound and holds the GIL, so that more threads would not search faster and would only take
+more time from NVDA's main thread; each log is searched in chunks so that the GIL is released regularly. A
+process pool is not used since NVDA's executable cannot be used to run worker processes.
+"""
+
+from __future__ import unicode_literals
+
+import re
+import threading
+from collections import namedtuple
+
+from logHandler import log
+
+from .mappedLog import MappedLog
+
+
+class LogFileMatch(namedtuple('LogFileMatch', ('path', 'index', 'line', 'header', 'text'))):
+	"""A message matching the search in a log file.
+	index is the index of the message in the log, line the number of its header line (starting from 1), header
+	its LogMessageHeader and text the first line of its content.
+	"""
+
+	__slots__ = ()
+
+
+def searchLogFile(path, pattern, cancelEvent=None):
+	"""Yields a LogFileMatch for each message of the log file located at path matching pattern.
+	pattern is a compiled regular expression; it is searched in the raw bytes of the file.
+	The headers of the log are read from its sidecar index if it is up to date; otherwise, they are located and
+	saved in the sidecar, so that the next searches in this log do not need to locate them again.
+	The search stops when cancelEvent (a threading.Event) is set.
+	"""
+
+	with MappedLog(path, useSidecar=True) as mLog:
+		buffer = mLog.buffer
+		lastOffset = 0
+		lastLine = 1
+		for i in mLog.search(pattern):
+			if cancelEvent is not None and cancelEvent.is_set():
+				return
+			start, end = mLog.getMessageSpan(i)
+			lastLine += buffer[lastOffset:start].count(b'\n')
+			lastOffset = start
+			msg = mLog.getMessage(i)
+			yield LogFileMatch(path, i, lastLine, msg.header, msg.msg.partition('\n')[0].strip())
+
+
+class LogFilesSearch(object):
+	"""Searches a pattern in a list of log files, one after the other, in a background thread.
+	onMatch is called with a LogFileMatch for each match found, onLogDone with the path of each log when it has
+	been searched and onDone when all the logs have been searched or the search has been cancelled. These
+	callbacks are called from the search thread.
+	"""
+
+	def __init__(self, paths, pattern, onMatch, onLogDone=None, onDone=None):
+		if not hasattr(pattern, 'search'):
+			pattern = re.compile(re.escape(pattern), re.IGNORECASE)
+		self.paths = list(paths)
+		self.pattern = pattern
+		self.onMatch = onMatch
+		self.onLogDone = onLogDone
+		self.onDone = onDone
+		self._cancelEvent = threading.Event()
+		self.nSearchedLogs = 0
+
+	def start(self):
+		thread = threading.Thread(target=self._work, name=self.__class__.__name__)
+		thread.daemon = True
+		thread.start()
+
+	def cancel(self):
+		self._cancelEvent.set()
+
+	@property
+	def isCancelled(self):
+		return self._cancelEvent.is_set()
+
+	def _work(self):
+		try:
+			for path in self.paths:
+				if self._cancelEvent.is_set():
+					break
+				try:
+					for match in searchLogFile(path, self.pattern, self._cancelEvent):
+						self.onMatch(match)
+				except Exception:
+					log.error('Unable to search in {path}'.format(path=path), exc_info=True)
+				self.nSearchedLogs += 1
+				if self.onLogDone:
+					self.onLogDone(path)
+		finally:
+			if self.onDone:
+				self.onDone()
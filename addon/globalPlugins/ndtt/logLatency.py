@@ -0,0 +1,266 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Measures the latency between input gestures and speech from the IO messages of a log.
+Each input gesture ("Input: device:key") is paired with the first following speech ("Speaking [...]"); the
+latency is the difference between the times of both messages, or the value of the "x sec since input" message
+logged with the speech if any.
+"""
+
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+import addonHandler
+
+from .logReader import (
+	iterHeaderMatches,
+	RE_MESSAGE_HEADER_AT,
+	classifyIoMessage,
+	IO_INPUT,
+	IO_SPEAKING,
+	IO_TIME_SINCE_INPUT,
+)
+from .logStats import TimeUnwrapper, MS_PER_DAY
+from .logStore import parseTime, formatTime
+
+addonHandler.initTranslation()
+
+
+class LatencyPair(object):
+	"""An input gesture and the first speech following it."""
+
+	__slots__ = ('inputOffset', 'speechOffset', 'time', 'gesture', 'latency', 'codePaths')
+
+	def __init__(self, inputOffset, speechOffset, time, gesture, latency, codePaths):
+		self.inputOffset = inputOffset
+		self.speechOffset = speechOffset
+		# Time of the input in milliseconds since midnight
+		self.time = time
+		self.gesture = gesture
+		# Latency in milliseconds
+		self.latency = latency
+		# Code paths of the messages logged between the input and the speech.
+		self.codePaths = codePaths
+
+
+def getPercentile(sortedValues, percent):
+	"""Returns the percentile of a sorted list of values with the nearest-rank method."""
+	if not sortedValues:
+		return None
+	rank = max(1, int(-(-percent * len(sortedValues) // 100)))
+	return sortedValues[rank - 1]
+
+
+class LatencyAnalyzer(object):
+	"""Pairs the input gestures of a log with the speech following them.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		self.pairs = []
+		self._unwrapper = TimeUnwrapper()
+		# The input waiting for speech: (offset, time, gesture, code paths), or None.
+		self._pendingInput = None
+		# The last pair, as long as no other input has been logged, to take into account a "sec since input"
+		# message logged after the speech.
+		self._lastPair = None
+		# State of the analyzer before the last message, restored to analyze it again when the log grows.
+		self._lastState = None
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		analyzer = cls()
+		analyzer.addText(text)
+		return analyzer
+
+	def addText(self, text, base=0):
+		"""Analyzes the messages of text.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		"""
+
+		previous = None
+		for offset, match in iterHeaderMatches(text):
+			if previous is not None:
+				self._addMessage(text, previous, offset, base)
+			previous = offset, match
+		if previous is not None:
+			self._lastState = self._saveState(base + previous[0])
+			self._addMessage(text, previous, len(text), base)
+		self.length = base + len(text)
+
+	def _addMessage(self, text, header, end, base):
+		offset, match = header
+		level, codePath, time = match.group('level', 'codePath', 'time')
+		content = text[match.end():end] if level == 'IO' else None
+		self.addMessage(base + offset, level, codePath, parseTime(time), content)
+
+	def addMessage(self, offset, level, codePath, time, content):
+		"""Analyzes a message; time is in milliseconds since midnight and content is only needed for IO
+		messages.
+		"""
+
+		time = self._unwrapper.unwrap(time)
+		if level != 'IO':
+			if self._pendingInput is not None:
+				self._pendingInput[3].add(codePath)
+			return
+		info = classifyIoMessage(content.strip())
+		if info.kind == IO_INPUT:
+			gesture = '{device}:{key}'.format(device=info.field('device'), key=info.field('key').strip())
+			self._pendingInput = (offset, time, gesture, set())
+			self._lastPair = None
+		elif info.kind == IO_SPEAKING and self._pendingInput is not None:
+			inputOffset, inputTime, gesture, codePaths = self._pendingInput
+			pair = LatencyPair(inputOffset, offset, inputTime, gesture, time - inputTime, codePaths)
+			self.addPair(pair)
+			self._pendingInput = None
+			self._lastPair = pair
+		elif info.kind == IO_TIME_SINCE_INPUT and self._lastPair is not None:
+			self._lastPair.latency = int(round(float(info.field('time')) * 1000))
+			self._lastPair = None
+
+	def addPair(self, pair):
+		self.pairs.append(pair)
+
+	def _saveState(self, offset):
+		pendingInput = self._pendingInput
+		if pendingInput is not None:
+			pendingInput = pendingInput[:3] + (set(pendingInput[3]),)
+		lastPair = self._lastPair
+		return (
+			offset,
+			len(self.pairs),
+			pendingInput,
+			lastPair,
+			lastPair.latency if lastPair is not None else None,
+			self._unwrapper.dayOffset,
+			self._unwrapper.lastTime,
+		)
+
+	def getUpdateStart(self):
+		if self._lastState is None:
+			return 0
+		return self._lastState[0]
+
+	def update(self, tailText, base):
+		"""Analyzes tailText, the end of the log starting at offset base, i.e. at the last analyzed header.
+		Returns False if tailText does not match the part of the log already analyzed.
+		"""
+
+		if base > 0 and not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		if self._lastState is not None:
+			# Analyze again the last message since it may have been incompletely written.
+			offset, nPairs, pendingInput, lastPair, lastLatency, dayOffset, lastTime = self._lastState
+			del self.pairs[nPairs:]
+			self._pendingInput = pendingInput
+			self._lastPair = lastPair
+			if lastPair is not None:
+				lastPair.latency = lastLatency
+			self._unwrapper.dayOffset = dayOffset
+			self._unwrapper.lastTime = lastTime
+			self._lastState = None
+		self.addText(tailText, base=base)
+		return True
+
+	def getSortedLatencies(self):
+		return sorted(pair.latency for pair in self.pairs)
+
+	def getOutlierThreshold(self):
+		"""Returns the latency above which a pair is considered as an outlier: the upper fence of Tukey's method,
+		i.e. the third quartile plus 1.5 times the interquartile range.
+		"""
+
+		latencies = self.getSortedLatencies()
+		if not latencies:
+			return None
+		q1 = getPercentile(latencies, 25)
+		q3 = getPercentile(latencies, 75)
+		return q3 + 1.5 * (q3 - q1)
+
+	def getOutliers(self):
+		"""Returns the pairs whose latency is above the outlier threshold, in the order of the log."""
+		threshold = self.getOutlierThreshold()
+		if threshold is None:
+			return []
+		return [pair for pair in self.pairs if pair.latency > threshold]
+
+	def getOutlierOffsets(self):
+		"""Returns the sorted offsets of the input messages of the outliers."""
+		return [pair.inputOffset for pair in self.getOutliers()]
+
+	@staticmethod
+	def getWorstGroups(pairs, getKeys, nTop):
+		"""Groups pairs by the keys returned by getKeys(pair) and returns the nTop groups with the highest mean
+		latency, as (key, count, mean latency, max latency) tuples.
+		"""
+
+		groups = defaultdict(list)
+		for pair in pairs:
+			for key in getKeys(pair):
+				groups[key].append(pair.latency)
+		stats = [
+			(key, len(latencies), float(sum(latencies)) / len(latencies), max(latencies))
+			for key, latencies in groups.items()
+		]
+		stats.sort(key=lambda item: -item[2])
+		return stats[:nTop]
+
+	def getReport(self, nTop=20):
+		"""Returns the latency report as a text to be displayed in a browseable message."""
+
+		if not self.pairs:
+			# Translators: Reported in the latency report when no input followed by speech is found in the log.
+			return _(
+				"No input followed by speech found in the log. "
+				"Make sure that the log level is at least input/output."
+			)
+		lines = []
+		# Translators: A line of the latency report.
+		lines.append(_("{n} inputs followed by speech").format(n=len(self.pairs)))
+		latencies = self.getSortedLatencies()
+		# Translators: A line of the latency report.
+		lines.append(_("Latency: p50 {p50} ms, p90 {p90} ms, p99 {p99} ms, max {max} ms").format(
+			p50=getPercentile(latencies, 50),
+			p90=getPercentile(latencies, 90),
+			p99=getPercentile(latencies, 99),
+			max=latencies[-1],
+		))
+
+		lines.append('')
+		# Translators: A title in the latency report.
+		lines.append(_("Gestures with the highest mean latency:"))
+		for gesture, count, mean, maxLatency in self.getWorstGroups(self.pairs, lambda p: [p.gesture], nTop):
+			# Translators: A line of the latency report.
+			lines.append(_("{key}: mean {mean:.0f} ms, max {max} ms, {count} times").format(
+				key=gesture, mean=mean, max=maxLatency, count=count,
+			))
+
+		lines.append('')
+		# Translators: A title in the latency report.
+		lines.append(_("Code paths logging between input and speech with the highest mean latency:"))
+		for codePath, count, mean, maxLatency in self.getWorstGroups(self.pairs, lambda p: p.codePaths, nTop):
+			# Translators: A line of the latency report.
+			lines.append(_("{key}: mean {mean:.0f} ms, max {max} ms, {count} times").format(
+				key=codePath, mean=mean, max=maxLatency, count=count,
+			))
+
+		outliers = self.getOutliers()
+		lines.append('')
+		# Translators: A title in the latency report.
+		lines.append(_("Outliers (latency above {threshold:.0f} ms): {n}").format(
+			threshold=self.getOutlierThreshold(),
+			n=len(outliers),
+		))
+		for pair in sorted(outliers, key=lambda p: -p.latency)[:nTop]:
+			lines.append('{time}: {gesture}, {latency} ms'.format(
+				time=formatTime(pair.time % MS_PER_DAY),
+				gesture=pair.gesture,
+				latency=pair.latency,
+			))
+		return '\n'.join(lines)
@@ -31,6 +31,7 @@ except ImportError:
 from io import open
 import weakref
 import re
+import threading
 
 import wx
 
@@ -40,6 +41,7 @@ import addonHandler
 import config
 import queueHandler
 import logHandler
+import ui
 from logHandler import log
 import gui
 from gui import guiHelper, nvdaControls
@@ -53,14 +55,13 @@ from .compa import appDir, matchDict
 from .fileOpener import openSourceFile, FileOpenerError
 from .ndttGui import NDTTSettingsPanel
 from .utils import getBaseProfileConfigValue
+from .logTimeIndex import TOKEN_INITIALIZATION, DT_FORMAT_STRING
+from .logSidecar import SIDECAR_EXTENSION
 
 addonHandler.initTranslation()
 
 ADDON_SUMMARY = addonHandler.getCodeAddon().manifest["summary"]
 
-TOKEN_INITIALIZATION = 'NDTT - Log management initialization: '
-DT_FORMAT_STRING = '%Y-%m-%d_%H-%M-%S'
-
 RES_LOG_BACKUP_FILENAME = (
 	r'nvda_'
 	r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})_(?P<hour>\d{2})-(?P<minute>\d{2})-(?P<second>\d{2})'
@@ -156,14 +157,37 @@ def logsCleanup():
 		for file in logList[:-nMax]:
 			log.debug('Removing {file}'.format(file=file))
 			try:
-				os.remove(file)
+				removeLogFile(file)
 			except Exception:
 				log.warning('Unable to remove {file}', exc_info=True)
-			
+		removeOrphanSidecars(logDirPath)
+		if getBaseProfileConfigValue('ndtt', 'logArchive'):
+			# Archive only after the cleanup, so that the archive never reads a backup being removed.
+			from .logArchive import archiveBackupLogs
+			archiveBackupLogs(logDirPath, getBaseProfileConfigValue('ndtt', 'logArchiveMaxDays'))
 		return
 	raise NotImplementedError
 
 
+def removeLogFile(path):
+	"""Removes a backup log and its sidecar index if any."""
+	os.remove(path)
+	try:
+		os.remove(path + SIDECAR_EXTENSION)
+	except OSError:
+		pass
+
+
+def removeOrphanSidecars(folderPath):
+	"""Removes the sidecar indexes whose log does not exist anymore."""
+	for path in glob(os.path.join(folderPath, "nvda_*.log" + SIDECAR_EXTENSION)):
+		if not os.path.exists(path[:-len(SIDECAR_EXTENSION)]):
+			try:
+				os.remove(path)
+			except OSError:
+				log.debugWarning('Unable to remove {path}'.format(path=path), exc_info=True)
+
+
 def listLogFiles(folderPath):
 	pattern = os.path.join(folderPath, "nvda_*-*-*_*-*-*.log")
 	return sorted([p for p in glob(pattern) if RE_BACKUP_LOG_PATH.match(p)])
@@ -319,6 +343,14 @@ class LogsManagerDialog(
 		self.deleteButton = entryButtonsHelper.addButton(self, label=_("&Delete"))
 		self.deleteButton.Disable()
 		self.deleteButton.Bind(wx.EVT_BUTTON, self.onDeleteClick)
+		# Translators: The label for a button in Logs Manager dialog to compare the two selected logs.
+		self.compareButton = entryButtonsHelper.addButton(self, label=_("Co&mpare"))
+		self.compareButton.Disable()
+		self.compareButton.Bind(wx.EVT_BUTTON, self.onCompareClick)
+		# Translators: The label for a button in Logs Manager dialog to list the unique errors of the selected log.
+		self.uniqueErrorsButton = entryButtonsHelper.addButton(self, label=_("&Unique errors"))
+		self.uniqueErrorsButton.Disable()
+		self.uniqueErrorsButton.Bind(wx.EVT_BUTTON, self.onUniqueErrorsClick)
 		listAndButtonsSizerHelper.addItem(entryButtonsHelper.sizer)
 
 		mainSizer.Add(
@@ -333,6 +365,9 @@ class LogsManagerDialog(
 		# Translators: The label of a button in Logs Manager to open the settings panel.
 		self.openSettingsButton = generalActions.addButton(self, label=_("Settings..."))
 		self.openSettingsButton.Bind(wx.EVT_BUTTON, self.onOpenSettingsClick)
+		# Translators: The label of a button in Logs Manager to search in all the logs.
+		self.searchButton = generalActions.addButton(self, label=_("Searc&h in logs..."))
+		self.searchButton.Bind(wx.EVT_BUTTON, self.onSearchClick)
 
 		mainSizer.Add(
 			generalActions.sizer,
@@ -390,6 +425,8 @@ class LogsManagerDialog(
 		else:
 			self.openButton.Disable()
 			self.deleteButton.Disable()
+			self.compareButton.Disable()
+			self.uniqueErrorsButton.Disable()
 
 	def getSelectedLogs(self):
 		selected = []
@@ -411,6 +448,8 @@ class LogsManagerDialog(
 		nSelected = self.logsList.SelectedItemCount
 		self.openButton.Enable(nSelected > 0)
 		self.deleteButton.Enable(nSelected > 0)
+		self.compareButton.Enable(nSelected == 2)
+		self.uniqueErrorsButton.Enable(nSelected == 1)
 
 	def onClose(self,evt):
 		self.DestroyChildren()
@@ -458,7 +497,7 @@ class LogsManagerDialog(
 		notDeleted = []
 		for oLog, index in selectedLogs:
 			try:
-				os.remove(oLog.fullPath)
+				removeLogFile(oLog.fullPath)
 				deleted.append(index)
 			except Exception:
 				log.warning('Unable to remove {file}'.format(file=oLog.fullPath), exc_info=True)
@@ -482,6 +521,65 @@ class LogsManagerDialog(
 				parent=self,
 			)
 
+	def onCompareClick(self, evt):
+		selectedLogs = [oLog for oLog, index in self.getSelectedLogs()]
+		if len(selectedLogs) != 2:
+			return
+		oldLog, newLog = sorted(selectedLogs)
+		# Translators: Reported when starting to compare two logs in the logs manager.
+		ui.message(_("Comparing logs..."))
+		threading.Thread(
+			target=self._compareLogs,
+			args=(oldLog, newLog),
+			name='NDTT-compareLogs',
+		).start()
+
+	def _compareLogs(self, oldLog, newLog):
+		"""Compares two logs in a background thread and displays the result."""
+		from .logDiff import LogDiff
+		try:
+			report = LogDiff.makeFromFiles(oldLog.fullPath, newLog.fullPath).getReport()
+		except Exception:
+			log.error(
+				'Unable to compare {old} and {new}'.format(old=oldLog.fullPath, new=newLog.fullPath),
+				exc_info=True,
+			)
+			# Translators: A message displayed when the comparison of two logs has failed.
+			msg = _("The logs could not be compared. See NVDA's log for details.")
+			wx.CallAfter(messageBox, message=msg, style=wx.ICON_ERROR)
+			return
+		# Translators: The title of the window displaying the comparison of two logs.
+		title = _("Comparison of {old} and {new}").format(old=oldLog.filename, new=newLog.filename)
+		wx.CallAfter(ui.browseableMessage, report, title)
+
+	def onUniqueErrorsClick(self, evt):
+		selectedLogs = [oLog for oLog, index in self.getSelectedLogs()]
+		if len(selectedLogs) != 1:
+			return
+		threading.Thread(
+			target=self._listUniqueErrors,
+			args=(selectedLogs[0],),
+			name='NDTT-listUniqueErrors',
+		).start()
+
+	def _listUniqueErrors(self, oLog):
+		"""Lists the unique errors of a log in a background thread.
+		The errors are read from the sidecar index of the log, which is built and saved the first time.
+		"""
+		from .mappedLog import MappedLog
+		try:
+			with MappedLog(oLog.fullPath, useSidecar=True) as mLog:
+				report = mLog.sidecar.errorIndex.getReport()
+		except Exception:
+			log.error('Unable to list the unique errors of {path}'.format(path=oLog.fullPath), exc_info=True)
+			# Translators: A message displayed when the unique errors of a log could not be listed.
+			msg = _("The errors of the log could not be listed. See NVDA's log for details.")
+			wx.CallAfter(messageBox, message=msg, style=wx.ICON_ERROR)
+			return
+		# Translators: The title of the window listing the unique errors of a log.
+		title = _("Unique errors of {log}").format(log=oLog.filename)
+		wx.CallAfter(ui.browseableMessage, report, title)
+
 	def onOpenSettingsClick(self, evt):
 		wx.CallAfter(
 			gui.mainFrame._popupSettingsDialog,
@@ -489,6 +587,215 @@ class LogsManagerDialog(
 			NDTTSettingsPanel,
 		)
 
+	def onSearchClick(self, evt):
+		d = LogsSearchDialog(self, sorted(getAvailableLogs(self.folder)))
+		d.Show()
+
+
+class LogsSearchDialog(
+		DpiScalingHelperMixinWithoutInit,
+		wx.Dialog  # wxPython does not seem to call base class initializer, put last in MRO
+):
+	"""A dialog to search a text in many logs at once; matches are listed as soon as they are found."""
+
+	# Maximum number of listed matches; the search is stopped when it is reached.
+	MAX_MATCHES = 10000
+
+	def __init__(self, parent, logs):
+		# Translators: The title of the dialog to search in the logs.
+		title = _("Search in logs")
+		super(LogsSearchDialog, self).__init__(
+			parent=parent,
+			title=title,
+			style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.MAXIMIZE_BOX,
+		)
+		self.logs = logs
+		self.logsByPath = {oLog.fullPath: oLog for oLog in logs}
+		self.search = None
+		self.matches = []
+		self._pendingMatches = []
+		self._lock = threading.Lock()
+		
+		mainSizer = wx.BoxSizer(wx.VERTICAL)
+		sHelper = guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+		# Translators: The label of the edit field containing the text to search in the logs.
+		self.searchEdit = sHelper.addLabeledControl(_("Search &for:"), wx.TextCtrl)
+		# Translators: The label of a checkbox in the dialog to search in the logs.
+		self.regexpCheckBox = sHelper.addItem(wx.CheckBox(self, label=_("&Regular expression")))
+		sHelper.addItem(wx.StaticText(
+			self,
+			# Translators: A note in the dialog to search in the logs.
+			label=_(
+				"The index of each searched log is saved next to it in a .ndttidx file, so that searching it again"
+				" is faster."
+			),
+		))
+		searchButtons = guiHelper.ButtonHelper(wx.HORIZONTAL)
+		# Translators: The label of the button starting the search in the logs.
+		self.startButton = searchButtons.addButton(self, label=_("&Search"))
+		self.startButton.SetDefault()
+		self.startButton.Bind(wx.EVT_BUTTON, self.onStartClick)
+		# Translators: The label of the button stopping the search in the logs.
+		self.stopButton = searchButtons.addButton(self, label=_("S&top"))
+		self.stopButton.Disable()
+		self.stopButton.Bind(wx.EVT_BUTTON, self.onStopClick)
+		sHelper.addItem(searchButtons)
+		self.statusText = sHelper.addItem(wx.StaticText(self, label=""))
+		self.matchesList = sHelper.addItem(
+			nvdaControls.AutoWidthColumnListCtrl(
+				parent=self,
+				style=wx.LC_REPORT | wx.LC_SINGLE_SEL,
+			),
+			flag=wx.EXPAND,
+			proportion=1,
+		)
+		# Translators: The label for a column in the list of the matches found in the logs
+		self.matchesList.InsertColumn(0, _("Log"), width=self.scaleSize(150))
+		# Translators: The label for a column in the list of the matches found in the logs
+		self.matchesList.InsertColumn(1, _("Time"), width=self.scaleSize(100))
+		# Translators: The label for a column in the list of the matches found in the logs
+		self.matchesList.InsertColumn(2, _("Level"), width=self.scaleSize(100))
+		# Translators: The label for a column in the list of the matches found in the logs
+		self.matchesList.InsertColumn(3, _("Message"), width=self.scaleSize(400))
+		self.matchesList.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.onOpenClick)
+		# Translators: The label for a button to open the log of the selected match at its line.
+		self.openButton = sHelper.addItem(wx.Button(self, label=_("&Open")))
+		self.openButton.Bind(wx.EVT_BUTTON, self.onOpenClick)
+		mainSizer.Add(
+			sHelper.sizer,
+			border=guiHelper.BORDER_FOR_DIALOGS,
+			flag=wx.ALL | wx.EXPAND,
+			proportion=1,
+		)
+		# Translators: The label of a button to close the dialog to search in the logs.
+		closeButton = wx.Button(self, label=_("&Close"), id=wx.ID_CLOSE)
+		closeButton.Bind(wx.EVT_BUTTON, lambda evt: self.Close())
+		mainSizer.Add(
+			closeButton,
+			border=guiHelper.BORDER_FOR_DIALOGS,
+			flag=wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.CENTER | wx.ALIGN_RIGHT
+		)
+		self.Bind(wx.EVT_CLOSE, self.onClose)
+		self.EscapeId = wx.ID_CLOSE
+		mainSizer.Fit(self)
+		self.SetSizer(mainSizer)
+		self.SetMinSize(mainSizer.GetMinSize())
+		self.SetSize(self.scaleSize((763, 509)))
+		self.CentreOnScreen()
+		self.searchEdit.SetFocus()
+
+	def onStartClick(self, evt):
+		from .logFilesSearch import LogFilesSearch
+		text = self.searchEdit.GetValue()
+		if not text:
+			return
+		if self.regexpCheckBox.GetValue():
+			try:
+				pattern = re.compile(text, re.IGNORECASE)
+			except re.error as e:
+				messageBox(
+					# Translators: A message displayed when the regular expression to search in the logs is invalid.
+					message=_("Invalid regular expression: {error}").format(error=e),
+					style=wx.ICON_ERROR,
+					parent=self,
+				)
+				return
+		else:
+			pattern = re.compile(re.escape(text), re.IGNORECASE)
+		self.cancelSearch()
+		self.matchesList.DeleteAllItems()
+		self.matches = []
+		with self._lock:
+			self._pendingMatches = []
+		search = LogFilesSearch(
+			[oLog.fullPath for oLog in self.logs],
+			pattern,
+			onMatch=lambda match: self._queueMatch(search, match),
+			onLogDone=lambda path: wx.CallAfter(self._onLogDone, search),
+			onDone=lambda: wx.CallAfter(self._onDone, search),
+		)
+		self.search = search
+		self.startButton.Disable()
+		self.stopButton.Enable()
+		self.updateStatus()
+		search.start()
+
+	def onStopClick(self, evt):
+		self.cancelSearch()
+
+	def cancelSearch(self):
+		if self.search is not None:
+			self.search.cancel()
+
+	def _queueMatch(self, search, match):
+		"""Called from the search thread; matches are added to the list in batches in the GUI thread."""
+		with self._lock:
+			self._pendingMatches.append(match)
+			isFirstPending = len(self._pendingMatches) == 1
+		if isFirstPending:
+			wx.CallAfter(self._addPendingMatches, search)
+
+	def _addPendingMatches(self, search):
+		with self._lock:
+			matches, self._pendingMatches = self._pendingMatches, []
+		if search is not self.search:
+			return
+		for match in matches[:self.MAX_MATCHES - len(self.matches)]:
+			self.matches.append(match)
+			oLog = self.logsByPath.get(match.path)
+			self.matchesList.Append((
+				oLog.displayedDate if oLog else os.path.basename(match.path),
+				match.header.time,
+				match.header.level,
+				match.text,
+			))
+		if len(self.matches) >= self.MAX_MATCHES:
+			search.cancel()
+		self.updateStatus()
+
+	def _onLogDone(self, search):
+		if search is self.search:
+			self.updateStatus()
+
+	def _onDone(self, search):
+		if search is not self.search:
+			return
+		self._addPendingMatches(search)
+		self.startButton.Enable()
+		self.stopButton.Disable()
+		self.updateStatus(done=True)
+
+	def updateStatus(self, done=False):
+		search = self.search
+		if done:
+			# Translators: The status of the search in the logs when it is finished.
+			label = _("Search finished: {nMatches} matches in {nLogs} logs")
+		else:
+			# Translators: The status of the search in the logs while it is running.
+			label = _("Searching... {nMatches} matches, {nSearchedLogs} of {nLogs} logs searched")
+		self.statusText.SetLabel(label.format(
+			nMatches=len(self.matches),
+			nSearchedLogs=search.nSearchedLogs,
+			nLogs=len(search.paths),
+		))
+
+	def onOpenClick(self, evt):
+		index = self.matchesList.GetFirstSelected()
+		if index < 0:
+			return
+		match = self.matches[index]
+		try:
+			openSourceFile(match.path, match.line)
+		except FileOpenerError as e:
+			log.debugWarning(str(e))
+			messageBox(message=e.getUserFriendlyMessage(), style=wx.ICON_ERROR, parent=self)
+
+	def onClose(self, evt):
+		self.cancelSearch()
+		self.search = None
+		self.DestroyChildren()
+		self.Destroy()
+
 
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
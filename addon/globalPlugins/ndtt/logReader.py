@@ -13,6 +13,7 @@ import scriptHandler
 from scriptHandler import script
 import ui
 import textInfos
+import textInfos.offsets
 import speech
 try:
 	from speech.commands import (
@@ -47,6 +48,32 @@ except ImportError:
 		#ConfigProfileTriggerCommand,
 	)
 	preSpeechRefactor = True
+# The speech commands that may be rebuilt from their representation in the log.
+# CallbackCommand and ConfigProfileTriggerCommand are not rebuilt to avoid producing errors or unexpected side
+# effects.
+if preSpeechRefactor:
+	SPEAKABLE_COMMAND_CLASSES = (
+		CharacterModeCommand,
+		LangChangeCommand,
+		BreakCommand,
+		PitchCommand,
+		VolumeCommand,
+		RateCommand,
+		PhonemeCommand,
+	)
+else:
+	SPEAKABLE_COMMAND_CLASSES = (
+		CharacterModeCommand,
+		LangChangeCommand,
+		BreakCommand,
+		EndUtteranceCommand,
+		PitchCommand,
+		VolumeCommand,
+		RateCommand,
+		PhonemeCommand,
+		BeepCommand,
+		WaveFileCommand,
+	)
 from logHandler import log
 from treeInterceptorHandler import TreeInterceptor
 import editableText
@@ -55,6 +82,7 @@ import config
 from inputCore import normalizeGestureIdentifier
 import gui.logViewer
 import core
+import wx
 
 from .compa import controlTypesCompatWrapper as controlTypes
 from .fileOpener import (
@@ -66,6 +94,18 @@ from .fileOpener import (
 
 import re
 import os
+import sys
+# For Python 2.7, open the open of Python 3, allowing to specify encoding.
+from io import open
+from array import array
+from bisect import bisect_left, bisect_right
+from ast import literal_eval
+from collections import namedtuple
+try:
+	from time import perf_counter
+except ImportError:
+	# Python 2
+	from time import clock as perf_counter
 
 
 addonHandler.initTranslation()
@@ -89,6 +129,24 @@ RES_MESSAGE_HEADER = (
 
 RE_MESSAGE_HEADER = re.compile(RES_MESSAGE_HEADER.format(levelName=RES_ANY_LEVEL_NAME))
 
+# Regexp string used to scan a whole log buffer for message headers.
+# Lazy quantifiers and a literal line break prefix (instead of "^" in multiline mode) make the scan of a big
+# buffer several times faster; the header at the very start of the buffer has to be checked separately.
+RES_MESSAGE_HEADER_SCAN = (
+	r"(?P<level>{levelName}) - ".format(levelName=RES_ANY_LEVEL_NAME)
+	+ r"(?P<codePath>{cp}?) ".format(cp=RES_CODE_PATH)
+	+ r"\((?P<time>{t})\)".format(t=RES_TIME)
+	+ r"( - (?P<threadName>{thrName}?) \((?P<thread>{thr})\))?".format(thrName=RES_THREAD_NAME, thr=RES_THREAD)
+	+ ":"
+)
+RE_MESSAGE_HEADER_AT = re.compile(RES_MESSAGE_HEADER_SCAN)
+RE_MESSAGE_HEADER_SCAN_LF = re.compile('\n' + RES_MESSAGE_HEADER_SCAN)
+RE_MESSAGE_HEADER_SCAN_CR = re.compile('\r' + RES_MESSAGE_HEADER_SCAN)
+# Same regexps to scan raw bytes, e.g. a memory-mapped log file.
+REB_MESSAGE_HEADER_AT = re.compile(RES_MESSAGE_HEADER_SCAN.encode('ascii'))
+REB_MESSAGE_HEADER_SCAN_LF = re.compile(b'\n' + RES_MESSAGE_HEADER_SCAN.encode('ascii'))
+REB_MESSAGE_HEADER_SCAN_CR = re.compile(b'\r' + RES_MESSAGE_HEADER_SCAN.encode('ascii'))
+
 # Regexps for Io messages:
 RE_MSG_SPEAKING = re.compile(r'^Speaking (?P<seq>\[.+\])')
 RE_MSG_BEEP = re.compile(r'^Beep at pitch (?P<freq>[0-9.]+), for (?P<duration>\d+) ms, left volume (?P<leftVol>\d+), right volume (?P<rightVol>\d+)') 
@@ -98,18 +156,47 @@ RE_MSG_BRAILLE_REGION = re.compile(r'^Braille regions text: \[(?P<text>.*)\]')
 RE_MSG_BRAILLE_DOTS = re.compile(r'^Braille window dots:(?P<dots>.*)')
 RE_MSG_TIME_SINCE_INPUT = re.compile(r'^(?P<time>\d+.\d*) sec since input')
 
-# Regexps for speech sequence commands
-RE_CANCELLABLE_SPEECH = re.compile(
-	r"CancellableSpeech \("
-	r"(cancelled|still valid)"
-	r"(, devInfo<.+>)?"
-	r"\)"
-	r"((?=\])|, )"
+# Kinds of IO messages
+IO_SPEAKING = 'speaking'
+IO_BEEP = 'beep'
+IO_INPUT = 'input'
+IO_TYPED_WORD = 'typedWord'
+IO_BRAILLE_REGION = 'brailleRegion'
+IO_BRAILLE_DOTS = 'brailleDots'
+IO_TIME_SINCE_INPUT = 'timeSinceInput'
+IO_UNKNOWN = 'unknown'
+
+IO_MESSAGE_REGEXPS = (
+	(IO_SPEAKING, RE_MSG_SPEAKING),
+	(IO_BEEP, RE_MSG_BEEP),
+	(IO_INPUT, RE_MSG_INPUT),
+	(IO_TYPED_WORD, RE_MSG_TYPED_WORD),
+	(IO_BRAILLE_REGION, RE_MSG_BRAILLE_REGION),
+	(IO_BRAILLE_DOTS, RE_MSG_BRAILLE_DOTS),
+	(IO_TIME_SINCE_INPUT, RE_MSG_TIME_SINCE_INPUT),
 )
-RE_CALLBACK_COMMAND = re.compile(r'CallbackCommand\(name=say-all:[A-Za-z]+\)((?=\])|, )')
+# A single regexp matching all the kinds of IO messages, each kind being captured by a named group enclosing
+# the groups of the original regexp, so that the kind is given by the last group of the match.
+RE_MSG_IO = re.compile('|'.join(
+	'(?P<{kind}>{pattern})'.format(kind=kind, pattern=regexp.pattern.lstrip('^'))
+	for kind, regexp in IO_MESSAGE_REGEXPS
+))
+IO_MESSAGE_FIELDS = {kind: tuple(regexp.groupindex) for kind, regexp in IO_MESSAGE_REGEXPS}
+IO_MESSAGE_FIELDS[IO_UNKNOWN] = ()
+
+# Regexps for the tokens of logged speech sequences
+RE_SEQ_STRING = re.compile(r"""[uU]?(?:'(?:[^'\\\r\n]|\\.)*'|"(?:[^"\\\r\n]|\\.)*")""")
+RE_SEQ_NUMBER = re.compile(r'-?\d+(?P<float>\.\d*)?(?:[eE][-+]?\d+)?')
+RE_SEQ_NAME = re.compile(r'[A-Za-z_]\w*')
+RE_SEQ_SPACES = re.compile(r'\s*')
 
 # Regexps of log line containing a file path and a line number.
-RE_STACK_TRACE_LINE = re.compile(r'^File "(?P<drive>(?:[A-Z]:\\)|)(?P<path>[^:"]+\.pyw?)[co]?", line (?P<line>\d+)(?:, in .+)?$')
+RE_STACK_TRACE_LINE = re.compile(
+	r'^File "(?P<drive>(?:[A-Z]:\\)|)(?P<path>[^:"]+\.pyw?)[co]?", line (?P<line>\d+)(?:, in (?P<func>.+))?$'
+)
+
+# First line of a traceback, as logged.
+TRACEBACK_HEADER = 'Traceback (most recent call last):'
 
 #zzz # Regexps of console output line containing an object definition
 #zzz RE_NVDA_HELP = re.compile(r'^File "(?P<path>[^:"]+\.py)c?", line (?P<line>\d+)(?:, in .+)?$')
@@ -118,6 +205,24 @@ RE_STACK_TRACE_LINE = re.compile(r'^File "(?P<drive>(?:[A-Z]:\\)|)(?P<path>[^:"]
 
 TYPE_STR = type('')
 
+UTF16_ENCODING = 'utf_16_le'
+# The characters encoded with more than one unit: characters outside the BMP in UTF-16 and non-ASCII
+# characters in other encodings.
+if sys.maxunicode > 0xffff:
+	RE_NON_BMP = re.compile('[\U00010000-\U0010ffff]')
+else:
+	# Python 2 narrow build: string indexes are already UTF-16 code units.
+	RE_NON_BMP = None
+RE_NON_ASCII = re.compile('[^\x00-\x7f]')
+
+# Typecode of the arrays storing offsets; 64-bit integers are needed for logs bigger than 2 GB.
+try:
+	array('q')
+	OFFSET_TYPECODE = 'q'
+except ValueError:
+	# Python 2
+	OFFSET_TYPECODE = 'l'
+
 def matchDict(m):
 	"""A helper function to get the match dictionary (useful in Python 2)
 	"""
@@ -127,7 +232,274 @@ def matchDict(m):
 	return m.groupdict()
 
 
+def iterHeaderMatches(text, start=0, end=None):
+	"""Yields a tuple (offset, match) for each message header found in text between start and end.
+	start should be located at the beginning of a line.
+	text may be a string or a bytes-like object such as a memory map; in the latter case, the groups of the
+	yielded matches are bytes.
+	"""
+	
+	if end is None:
+		end = len(text)
+	if isinstance(text, TYPE_STR):
+		lf, cr = '\n', '\r'
+		regexpAt, regexpLF, regexpCR = RE_MESSAGE_HEADER_AT, RE_MESSAGE_HEADER_SCAN_LF, RE_MESSAGE_HEADER_SCAN_CR
+	else:
+		lf, cr = b'\n', b'\r'
+		regexpAt, regexpLF, regexpCR = REB_MESSAGE_HEADER_AT, REB_MESSAGE_HEADER_SCAN_LF, REB_MESSAGE_HEADER_SCAN_CR
+	if start == 0 or text[start - 1:start] in (lf, cr):
+		match = regexpAt.match(text, start, end)
+		if match:
+			yield start, match
+	# Logs written to a file use "\n" or "\r\n" as line break; rich edit controls only use "\r".
+	if text.find(lf, start, end) >= 0:
+		regexp = regexpLF
+	else:
+		regexp = regexpCR
+	for match in regexp.finditer(text, start, end):
+		yield match.start() + 1, match
+
+
+def getTextInfoOffsets(info):
+	"""Returns the start and end offsets of a TextInfo in its story
+	or None if this TextInfo does not expose offsets.
+	"""
+	
+	if isinstance(info, textInfos.offsets.OffsetsTextInfo):
+		return info._startOffset, info._endOffset
+	try:
+		# ITextDocument based TextInfo, e.g. in NVDA's log viewer.
+		return info._rangeObj.start, info._rangeObj.end
+	except AttributeError:
+		return None
+
+
+def getTextInfoEncoding(info):
+	"""Returns the encoding in which the offsets of a TextInfo are counted, or None if they are indexes in its
+	text, as a Python string.
+	"""
+	
+	if isinstance(info, textInfos.offsets.OffsetsTextInfo):
+		# Before NVDA 2020.4, offsets are always string indexes.
+		return getattr(info, 'encoding', None)
+	# ITextDocument based TextInfo: UTF-16 code units.
+	return UTF16_ENCODING
+
+
+def makeTextInfoFromOffsets(obj, start, end):
+	"""Returns a TextInfo of obj spanning the given offsets or None if obj does not support offsets."""
+	
+	try:
+		return obj.makeTextInfo(textInfos.offsets.Offsets(start, end))
+	except (ValueError, TypeError, NotImplementedError, LookupError):
+		return None
+
+
+class IoMessageInfo(namedtuple('IoMessageInfo', ('kind', 'match'))):
+	"""The result of the classification of an IO message.
+	kind is one of the IO_* constants and match the match object, or None for unknown messages.
+	Fields are only extracted from the match when they are requested.
+	"""
+	
+	__slots__ = ()
+	
+	def field(self, name):
+		return self.match.group(name)
+	
+	@property
+	def fields(self):
+		"""A dictionary of the values captured in the message."""
+		return {name: self.match.group(name) for name in IO_MESSAGE_FIELDS[self.kind]}
+
+
+def classifyIoMessage(msg):
+	"""Determines the kind of an IO message with a single regexp match and returns an IoMessageInfo."""
+	
+	match = RE_MSG_IO.match(msg)
+	if not match:
+		return IoMessageInfo(IO_UNKNOWN, None)
+	return IoMessageInfo(match.lastgroup, match)
+
+
+class SpeechSequenceParser(object):
+	"""Parses the representation of a speech sequence as logged by NVDA, e.g.:
+	['Hello', LangChangeCommand ('fr_FR'), 'Bonjour', BreakCommand(time=100)]
+	The sequence is rebuilt without calling eval on the content of the log.
+	Only the commands whose class is passed to the constructor are rebuilt; other items such as
+	CancellableSpeech or CallbackCommand are omitted.
+	Parsed sequences are memorized so that a repeated utterance is rebuilt without being parsed again.
+	"""
+	
+	CONSTANTS = {
+		'True': True,
+		'False': False,
+		'None': None,
+	}
+	MAX_CACHE_SIZE = 2000
+	
+	class ParseError(ValueError):
+		pass
+	
+	def __init__(self, commandClasses):
+		self.commandClasses = {cls.__name__: cls for cls in commandClasses}
+		self._cache = {}
+	
+	def parse(self, text):
+		"""Returns a new speech sequence (list) from its logged representation.
+		Raises SpeechSequenceParser.ParseError if text is not a valid representation.
+		"""
+		
+		try:
+			items = self._cache[text]
+		except KeyError:
+			items = self._parseItems(text)
+			if len(self._cache) >= self.MAX_CACHE_SIZE:
+				self._cache.clear()
+			self._cache[text] = items
+		# Commands are created again for each call so that the returned sequence is never shared.
+		return [item if isinstance(item, TYPE_STR) else item[0](*item[1], **item[2]) for item in items]
+	
+	def _parseItems(self, text):
+		"""Returns a tuple of items where strings are kept as is and commands are stored as
+		(class, args, kwargs) tuples.
+		"""
+		
+		items = []
+		pos = self._expect(text, 0, '[')
+		if self._peek(text, pos) == ']':
+			return ()
+		while True:
+			pos = RE_SEQ_SPACES.match(text, pos).end()
+			match = RE_SEQ_STRING.match(text, pos)
+			if match:
+				items.append(self._evalString(match.group()))
+				pos = match.end()
+			else:
+				item, pos = self._parseCommand(text, pos)
+				if item is not None:
+					items.append(item)
+			pos = RE_SEQ_SPACES.match(text, pos).end()
+			if text.startswith(',', pos):
+				pos += 1
+			elif text.startswith(']', pos):
+				return tuple(items)
+			else:
+				raise self.ParseError('Unexpected character at {pos} in {text}'.format(pos=pos, text=text))
+	
+	def _parseCommand(self, text, pos):
+		"""Parses a command such as "BreakCommand(time=100)".
+		Returns a tuple (item, pos) where item is None if the command is unknown or if its arguments cannot be
+		parsed, e.g. "CancellableSpeech (cancelled)".
+		"""
+		
+		match = RE_SEQ_NAME.match(text, pos)
+		if not match:
+			raise self.ParseError('Command expected at {pos} in {text}'.format(pos=pos, text=text))
+		name = match.group()
+		# Some commands such as LangChangeCommand have a space before the parenthesis.
+		pos = self._expect(text, match.end(), '(')
+		cls = self.commandClasses.get(name)
+		if cls is not None:
+			try:
+				args, kwargs, end = self._parseArgs(text, pos)
+				# Check that the command can be built with these arguments.
+				cls(*args, **kwargs)
+				return (cls, args, kwargs), end
+			except self.ParseError:
+				pass
+			except Exception:
+				log.debugWarning('Unable to rebuild {name} from {text}'.format(name=name, text=text), exc_info=True)
+		return None, self._skipArgs(text, pos)
+	
+	def _parseArgs(self, text, pos):
+		args = []
+		kwargs = {}
+		if self._peek(text, pos) == ')':
+			return tuple(args), kwargs, RE_SEQ_SPACES.match(text, pos).end() + 1
+		while True:
+			pos = RE_SEQ_SPACES.match(text, pos).end()
+			key = None
+			match = RE_SEQ_NAME.match(text, pos)
+			if match and match.group() not in self.CONSTANTS:
+				key = str(match.group())
+				pos = self._expect(text, match.end(), '=')
+			value, pos = self._parseValue(text, pos)
+			if key is None:
+				if kwargs:
+					raise self.ParseError('Positional argument after keyword argument in {text}'.format(text=text))
+				args.append(value)
+			else:
+				kwargs[key] = value
+			pos = RE_SEQ_SPACES.match(text, pos).end()
+			if text.startswith(',', pos):
+				pos += 1
+			elif text.startswith(')', pos):
+				return tuple(args), kwargs, pos + 1
+			else:
+				raise self.ParseError('Unexpected character at {pos} in {text}'.format(pos=pos, text=text))
+	
+	def _parseValue(self, text, pos):
+		pos = RE_SEQ_SPACES.match(text, pos).end()
+		match = RE_SEQ_STRING.match(text, pos)
+		if match:
+			return self._evalString(match.group()), match.end()
+		match = RE_SEQ_NUMBER.match(text, pos)
+		if match:
+			if match.group('float') is not None or 'e' in match.group().lower():
+				return float(match.group()), match.end()
+			return int(match.group()), match.end()
+		match = RE_SEQ_NAME.match(text, pos)
+		if match and match.group() in self.CONSTANTS:
+			return self.CONSTANTS[match.group()], match.end()
+		raise self.ParseError('Value expected at {pos} in {text}'.format(pos=pos, text=text))
+	
+	def _skipArgs(self, text, pos):
+		"""Returns the position after the parenthesis closing the arguments starting at pos."""
+		
+		depth = 1
+		size = len(text)
+		while pos < size:
+			c = text[pos]
+			if c in '\'"':
+				match = RE_SEQ_STRING.match(text, pos)
+				if match:
+					pos = match.end()
+					continue
+			elif c in '([<':
+				depth += 1
+			elif c in ')]>':
+				depth -= 1
+				if depth == 0:
+					return pos + 1
+			pos += 1
+		raise self.ParseError('Unbalanced parenthesis in {text}'.format(text=text))
+	
+	def _expect(self, text, pos, char):
+		pos = RE_SEQ_SPACES.match(text, pos).end()
+		if not text.startswith(char, pos):
+			raise self.ParseError('"{char}" expected at {pos} in {text}'.format(char=char, pos=pos, text=text))
+		return pos + 1
+	
+	@staticmethod
+	def _peek(text, pos):
+		pos = RE_SEQ_SPACES.match(text, pos).end()
+		return text[pos:pos + 1]
+	
+	@staticmethod
+	def _evalString(literal):
+		if '\\' not in literal:
+			# Fast path: no escape sequence to decode.
+			return literal[literal.index(literal[-1]) + 1:-1]
+		# literal_eval only evaluates Python literals, it cannot execute any code.
+		return literal_eval(literal)
+
+
+speechSequenceParser = SpeechSequenceParser(SPEAKABLE_COMMAND_CLASSES)
+
+
 class LogMessageHeader(object):
+	__slots__ = ('level', 'codePath', 'time', 'threadName', 'thread')
+	
 	def __init__(self, level, codePath, time, threadName=None, thread=None):
 		self.level = level
 		self.codePath = codePath
@@ -138,64 +510,54 @@ class LogMessageHeader(object):
 	@classmethod
 	def makeFromLine(cls, text):
 		"""Create a LogMessageHeader from a header line"""
-		match = matchDict(RE_MESSAGE_HEADER.match(text))
+		match = RE_MESSAGE_HEADER.match(text)
 		if not match:
 			raise LookupError
-		return cls(match['level'], match['codePath'], match['time'], match['threadName'], match['thread'])
+		return cls.makeFromMatch(match)
+	
+	@classmethod
+	def makeFromMatch(cls, match):
+		"""Create a LogMessageHeader from a match of one of the message header regexps"""
+		return cls(*match.group('level', 'codePath', 'time', 'threadName', 'thread'))
 
 class LogMessage(object):
+	__slots__ = ('header', 'msg')
+	
 	def __init__(self, header, msg):
 		self.header = header
 		self.msg = msg.strip()
 	
+	@classmethod
+	def makeFromText(cls, text):
+		"""Create a LogMessage from the text of a whole message, i.e. its header line followed by its content."""
+		header, sep, msg = text.lstrip('\r\n').partition('\n')
+		if not sep:
+			header, sep, msg = header.partition('\r')
+		return cls(LogMessageHeader.makeFromLine(header.strip()), msg)
+	
 	def getSpeakMessage(self, mode):
 		if self.header.level == 'IO':
-			match = matchDict(RE_MSG_SPEAKING.match(self.msg))
-			if match:
+			info = classifyIoMessage(self.msg)
+			kind = info.kind
+			if kind == IO_SPEAKING:
 				try:
-					txtSeq = match['seq']
-				except Exception:
-					log.error("Sequence cannot be spoken: {seq}".format(seq=match['seq']))
+					return speechSequenceParser.parse(info.field('seq'))
+				except SpeechSequenceParser.ParseError:
+					log.debugWarning("Sequence cannot be spoken: {seq}".format(seq=info.field('seq')), exc_info=True)
 					return self.msg
-				txtSeq = RE_CANCELLABLE_SPEECH.sub('', txtSeq)
-				txtSeq = RE_CALLBACK_COMMAND.sub('', txtSeq)
-				seq = eval(txtSeq)
-				# Ignore CallbackCommand and ConfigProfileTriggerCommand to avoid producing errors or unexpected side effect.
-				if not preSpeechRefactor:
-					seq = [c for c in seq if not isinstance(c, (CallbackCommand, ConfigProfileTriggerCommand))]
-				return seq
-				
-			match = matchDict(RE_MSG_BEEP.match(self.msg))
-			if match:
+			
+			elif kind == IO_BEEP:
 				return [BeepCommand(
-					float(match['freq']),
-					int(match['duration']),
-					int(match['leftVol']),
-					int(match['rightVol']),
+					float(info.field('freq')),
+					int(info.field('duration')),
+					int(info.field('leftVol')),
+					int(info.field('rightVol')),
 				)]
 			
-			# Check for input gesture:
-			match = matchDict(RE_MSG_INPUT.match(self.msg))
-			if match:
-				return "Input: {key}, {device}".format(key=match['key'], device=match['device'])
-			
-			match = matchDict(RE_MSG_TYPED_WORD.match(self.msg))
-			if match:
-				return self.msg
-			
-			match = matchDict(RE_MSG_BRAILLE_REGION.match(self.msg))
-			if match:
-				return self.msg
-			else:
-				import globalVars as gv
-				gv.dbg = self.msg
-			
-			match = matchDict(RE_MSG_BRAILLE_DOTS.match(self.msg))
-			if match:
-				return self.msg
+			elif kind == IO_INPUT:
+				return "Input: {key}, {device}".format(key=info.field('key'), device=info.field('device'))
 			
-			match = matchDict(RE_MSG_TIME_SINCE_INPUT.match(self.msg))
-			if match:
+			elif kind in (IO_TYPED_WORD, IO_BRAILLE_REGION, IO_BRAILLE_DOTS, IO_TIME_SINCE_INPUT):
 				return self.msg
 			
 			# Unknown message format; to be implemented.
@@ -205,7 +567,7 @@ class LogMessage(object):
 		elif self.header.level == 'ERROR':
 			msgList = self.msg.split('\r')
 			try:
-				idxTraceback = msgList.index('Traceback (most recent call last):')
+				idxTraceback = msgList.index(TRACEBACK_HEADER)
 			except ValueError:
 				return self.msg
 			else:
@@ -248,6 +610,250 @@ class LogMessage(object):
 		return cls(header, msg)	
 
 
+def iterLogMessages(lines):
+	"""Yields lazily the LogMessage objects parsed from an iterable of log lines, e.g. an open log file.
+	Only one message is kept in memory at a time, so that logs of any size can be processed.
+	Lines located before the first message header are ignored.
+	"""
+	
+	headerMatch = RE_MESSAGE_HEADER.match
+	header = None
+	msgLines = []
+	for line in lines:
+		match = headerMatch(line)
+		if match:
+			if header is not None:
+				yield LogMessage(header, ''.join(msgLines))
+				msgLines = []
+			header = LogMessageHeader.makeFromMatch(match)
+		elif header is not None:
+			msgLines.append(line)
+	if header is not None:
+		yield LogMessage(header, ''.join(msgLines))
+
+
+def iterLogFileMessages(path, encoding='utf-8'):
+	"""Yields lazily the LogMessage objects of the log file located at path."""
+	
+	with open(path, 'r', encoding=encoding, errors='replace') as f:
+		for msg in iterLogMessages(f):
+			yield msg
+
+
+def iterLogTextMessages(text):
+	"""Yields lazily the LogMessage objects of a log contained in a text buffer.
+	Messages are sliced from the buffer one at a time, without splitting the whole buffer into lines.
+	"""
+	
+	header = None
+	msgStart = None
+	for offset, match in iterHeaderMatches(text):
+		if header is not None:
+			yield LogMessage(header, text[msgStart:offset])
+		header = LogMessageHeader.makeFromMatch(match)
+		msgStart = match.end()
+	if header is not None:
+		yield LogMessage(header, text[msgStart:])
+
+
+def findNextOffset(offsets, offset):
+	"""Returns the first item of the sorted sequence offsets greater than offset, or None if there is none."""
+	i = bisect_right(offsets, offset)
+	if i < len(offsets):
+		return offsets[i]
+	return None
+
+
+def findPreviousOffset(offsets, offset):
+	"""Returns the last item of the sorted sequence offsets lower than offset, or None if there is none."""
+	i = bisect_left(offsets, offset)
+	if i > 0:
+		return offsets[i - 1]
+	return None
+
+
+class LogHeaderIndex(object):
+	"""An index of the message headers of a log.
+	It stores the offset of each header, globally and per level, so that quick navigation commands can find
+	the next or previous header with a binary search rather than reading the log line by line.
+	"""
+	
+	def __init__(self):
+		# Offsets of all the headers, in increasing order.
+		self.offsets = array(OFFSET_TYPECODE)
+		# Offsets of the headers, grouped by level name.
+		self.levelOffsets = {}
+		# Length of the text that has been indexed.
+		self.length = 0
+		# Length of the story as reported by the TextInfo offsets; it may differ from the text length.
+		self.storyLength = None
+	
+	@classmethod
+	def makeFromText(cls, text):
+		index = cls()
+		index.addText(text)
+		return index
+	
+	def addText(self, text, start=0, base=0):
+		"""Indexes the headers of text located after start.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		text may also be a bytes-like object, in which case the offsets are byte offsets.
+		"""
+		
+		offsets = self.offsets
+		levelOffsets = self.levelOffsets
+		for offset, match in iterHeaderMatches(text, start):
+			offset += base
+			offsets.append(offset)
+			level = match.group('level')
+			if not isinstance(level, TYPE_STR):
+				level = level.decode('ascii')
+			try:
+				levelOffsets[level].append(offset)
+			except KeyError:
+				levelOffsets[level] = array(OFFSET_TYPECODE, [offset])
+		self.length = base + len(text)
+	
+	def getUpdateStart(self):
+		"""Returns the offset from which the log needs to be indexed again when text has been appended to it.
+		This is the start of the last indexed message since its header may have been incompletely written.
+		"""
+		
+		if self.offsets:
+			return self.offsets[-1]
+		return 0
+	
+	def truncate(self, offset):
+		"""Removes from the index the headers located at or after offset."""
+		del self.offsets[bisect_left(self.offsets, offset):]
+		for levelOffsets in self.levelOffsets.values():
+			del levelOffsets[bisect_left(levelOffsets, offset):]
+		self.length = min(self.length, offset)
+	
+	def update(self, tailText, base):
+		"""Updates the index with the end of the log, tailText, starting at offset base.
+		base should be the value returned by getUpdateStart.
+		Returns False if tailText does not match the indexed part of the log, i.e. if the index needs to be
+		rebuilt from scratch.
+		"""
+		
+		if base > 0 and not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		self.truncate(base)
+		self.addText(tailText, base=base)
+		return True
+	
+	def getOffsets(self, level=None):
+		if level is None:
+			return self.offsets
+		return self.levelOffsets.get(level, ())
+	
+	def findNext(self, offset, level=None):
+		"""Returns the offset of the first header after offset, or None if there is none."""
+		return findNextOffset(self.getOffsets(level), offset)
+	
+	def findPrevious(self, offset, level=None):
+		"""Returns the offset of the last header before offset, or None if there is none."""
+		return findPreviousOffset(self.getOffsets(level), offset)
+	
+	def getMessageEnd(self, offset):
+		"""Returns the end offset of the message whose header starts at offset."""
+		end = self.findNext(offset)
+		if end is None:
+			return self.length
+		return end
+
+
+def reportIndexOutOfDate():
+	# Translators: Reported when the index of the log does not match its text, e.g. when it has been modified;
+	# it is then rebuilt at the next command.
+	ui.message(_('The log has changed; please try again'))
+
+
+class LogOffsetConverter(object):
+	"""Converts the offsets in the text of a log, i.e. indexes in a Python string as stored by all the log
+	indexes, into the offsets of its TextInfos, and back.
+	TextInfo offsets are counted in units of the encoding of the TextInfo: UTF-16 code units in rich edit
+	controls such as the log viewer, bytes in Scintilla controls such as Notepad++. Only the characters encoded
+	with more than one unit are stored, so that the conversion is cheap when the log is mostly ASCII.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+	
+	def __init__(self, encoding=None):
+		self.encoding = encoding
+		if encoding is None:
+			self._regexp = None
+		elif encoding.replace('-', '_').lower() in ('utf_16_le', 'utf_16'):
+			self._regexp = RE_NON_BMP
+		else:
+			self._regexp = RE_NON_ASCII
+		# String offsets of the characters encoded with more than one unit.
+		self.positions = array(OFFSET_TYPECODE)
+		# TextInfo offsets of these characters.
+		self.encodedPositions = array(OFFSET_TYPECODE)
+		# Number of units in excess of one of these characters, summed up to each of them included.
+		self.extraUnits = array(OFFSET_TYPECODE)
+		self._widths = {}
+		self.length = 0
+		self.storyLength = None
+	
+	def getWidth(self, char):
+		"""Returns the number of units of char in the encoding."""
+		try:
+			return self._widths[char]
+		except KeyError:
+			pass
+		if self._regexp is RE_NON_BMP:
+			width = 2
+		else:
+			try:
+				width = len(char.encode(self.encoding, 'replace'))
+			except LookupError:
+				width = 1
+		self._widths[char] = width
+		return width
+	
+	def addText(self, text, base=0):
+		"""Adds the characters of text, located at offset base in the log."""
+		i = bisect_left(self.positions, base)
+		del self.positions[i:]
+		del self.encodedPositions[i:]
+		del self.extraUnits[i:]
+		if self._regexp is not None:
+			positions, encodedPositions, extraUnits = self.positions, self.encodedPositions, self.extraUnits
+			extra = extraUnits[-1] if extraUnits else 0
+			getWidth = self.getWidth
+			for match in self._regexp.finditer(text):
+				width = getWidth(match.group())
+				if width > 1:
+					offset = base + match.start()
+					positions.append(offset)
+					encodedPositions.append(offset + extra)
+					extra += width - 1
+					extraUnits.append(extra)
+		self.length = base + len(text)
+	
+	def getUpdateStart(self):
+		return self.length
+	
+	def toTextInfoOffset(self, offset):
+		"""Converts an offset in the text of the log into a TextInfo offset."""
+		i = bisect_left(self.positions, offset)
+		if i == 0:
+			return offset
+		return offset + self.extraUnits[i - 1]
+	
+	def fromTextInfoOffset(self, offset):
+		"""Converts a TextInfo offset into an offset in the text of the log.
+		An offset located inside a character encoded with more than one unit is converted to the start of this
+		character.
+		"""
+		i = bisect_left(self.encodedPositions, offset)
+		if i == 0:
+			return offset
+		return max(offset - self.extraUnits[i - 1], self.positions[i - 1])
+
+
 class LogReader(object):
 
 	SEARCHERS = {k: re.compile(RES_MESSAGE_HEADER.format(levelName=k.upper())) for k in (
@@ -263,12 +869,218 @@ class LogReader(object):
 		'Output': re.compile(RES_MESSAGE_HEADER.format(levelName='IO')),
 	})
 	
+	# The level name corresponding to each search type; None means any level.
+	SEARCH_LEVELS = {k: k.upper() for k in SEARCHERS}
+	SEARCH_LEVELS.update({
+		'Message': None,
+		'Output': 'IO',
+	})
+	
 	def __init__(self, obj):
 		self.obj = obj
 		self.ti = obj.makeTextInfo(textInfos.POSITION_CARET)
 		self.ti.collapse()
 	
 	def moveToHeader(self, direction, searchType):
+		index = self.obj.getHeaderIndex()
+		if index is None:
+			self.moveToHeaderByLine(direction, searchType)
+			return
+		level = self.SEARCH_LEVELS[searchType]
+		threadKey = LogContainer.threadFilterTable.get(self.obj.getWindowHandle())
+		if threadKey is not None:
+			from .logThreads import LogThreadIndex
+			threadIndex = self.obj.getLogIndex(LogThreadIndex)
+			if threadIndex is not None:
+				self.moveToNextOffset(threadIndex.getOffsets(threadKey, level), direction, index, searchType)
+				return
+		offsets = index.getOffsets(level)
+		if self.moveToNextOffset(offsets, direction, index, searchType, reportError=False) is False:
+			# The index does not match the text of the log; read it line by line as if no index were available.
+			self.ti = self.obj.makeTextInfo(textInfos.POSITION_CARET)
+			self.ti.collapse()
+			self.moveToHeaderByLine(direction, searchType)
+	
+	def getCaretLineStart(self):
+		"""Returns the offset of the start of the caret's line in the text of the log, as stored in the
+		indexes.
+		"""
+		tiLine = self.ti.copy()
+		tiLine.expand(textInfos.UNIT_LINE)
+		return self.obj.getLogOffset(getTextInfoOffsets(tiLine)[0])
+	
+	def moveToNextOffset(self, offsets, direction, index, searchType, reportError=True):
+		"""Moves to the next (direction=1) or previous (direction=-1) message whose header offset is in the
+		sorted sequence offsets, relative to the caret's line.
+		Returns False if the index does not match the text of the log, as moveToOffset.
+		"""
+		
+		lineStart = self.getCaretLineStart()
+		if direction == 1:
+			offset = findNextOffset(offsets, lineStart)
+		else:
+			offset = findPreviousOffset(offsets, lineStart)
+		if offset is None:
+			# Translators: Reported when pressing a quick navigation command in the log.
+			ui.message(_('No more item'))
+			return None
+		return self.moveToOffset(offset, index, searchType, reportError)
+	
+	def moveToSearchHit(self, direction, query, reportCount=False):
+		from .logSearch import LogSearchIndex
+		index = self.obj.getHeaderIndex()
+		searchIndex = self.obj.getLogIndex(LogSearchIndex)
+		if index is None or searchIndex is None:
+			# Translators: Reported when trying to search in a log whose text does not support it.
+			ui.message(_('Search is not available in this document'))
+			return
+		hits = searchIndex.searchOffsets(query)
+		if reportCount:
+			# Translators: Reported after a search in the log.
+			ui.message(_('{n} messages found').format(n=len(hits)))
+		if hits:
+			self.moveToNextOffset(hits, direction, index, 'Message')
+	
+	def moveToDistinctError(self, direction):
+		"""Moves to the next or previous error whose fingerprint has not been found before in the log."""
+		
+		from .logErrors import LogErrorIndex
+		index = self.obj.getHeaderIndex()
+		errorIndex = self.obj.getLogIndex(LogErrorIndex)
+		if index is None or errorIndex is None:
+			# Translators: Reported when trying to move to the next distinct error in a log whose text does not
+			# support it.
+			ui.message(_('Distinct error navigation is not available in this document'))
+			return
+		self.moveToNextOffset(errorIndex.getDistinctOffsets(), direction, index, 'Error')
+	
+	def moveToLatencyOutlier(self, direction):
+		"""Moves to the next or previous input whose speech latency is an outlier."""
+		
+		from .logLatency import LatencyAnalyzer
+		index = self.obj.getHeaderIndex()
+		analyzer = self.obj.getLogIndex(LatencyAnalyzer)
+		if index is None or analyzer is None:
+			# Translators: Reported when trying to move to a latency outlier in a log whose text does not support it.
+			ui.message(_('Latency outlier navigation is not available in this document'))
+			return
+		self.moveToNextOffset(analyzer.getOutlierOffsets(), direction, index, 'Io')
+	
+	def moveToTracebackFrame(self, direction):
+		"""Moves to the next or previous traceback frame line and reports it."""
+		
+		from .logTracebacks import LogFrameIndex
+		frameIndex = self.obj.getLogIndex(LogFrameIndex)
+		if frameIndex is None:
+			# Translators: Reported when trying to move to a traceback frame in a log whose text does not support it.
+			ui.message(_('Traceback frame navigation is not available in this document'))
+			return
+		lineStart = self.getCaretLineStart()
+		if direction == 1:
+			offset = findNextOffset(frameIndex.offsets, lineStart)
+		else:
+			offset = findPreviousOffset(frameIndex.offsets, lineStart)
+		if offset is None:
+			# Translators: Reported when pressing a quick navigation command in the log.
+			ui.message(_('No more item'))
+			return
+		tiLine = self.obj.makeTextInfoFromLogOffsets(offset, offset)
+		if tiLine is not None:
+			tiLine.expand(textInfos.UNIT_LINE)
+			line = tiLine.text.strip()
+		if tiLine is None or not RE_STACK_TRACE_LINE.match(line):
+			# The index does not match the text anymore; the log has probably been modified.
+			log.debugWarning('Frame index out of date for {obj}'.format(obj=self.obj))
+			self.obj.invalidateLogIndexes()
+			reportIndexOutOfDate()
+			return
+		self.ti = tiLine.copy()
+		self.ti.collapse()
+		self.ti.updateSelection()
+		ui.message(line)
+	
+	def getCaretMessageText(self):
+		"""Returns the text of the message containing the caret, or None if not available."""
+		
+		index = self.obj.getHeaderIndex()
+		if index is None:
+			return None
+		start = findPreviousOffset(index.offsets, self.getCaretLineStart() + 1)
+		if start is None:
+			return None
+		tiMsg = self.obj.makeTextInfoFromLogOffsets(start, index.getMessageEnd(start))
+		if tiMsg is None:
+			return None
+		return tiMsg.text
+	
+	def getTimeIndex(self):
+		from .logTimeIndex import LogTimeIndex
+		return self.obj.getLogIndex(LogTimeIndex)
+	
+	def getCaretTime(self):
+		"""Returns the time of the message at the caret formatted for the user, or None if not available."""
+		
+		timeIndex = self.getTimeIndex()
+		if timeIndex is None:
+			return None
+		time = timeIndex.getTimeAt(self.getCaretLineStart())
+		if time is None:
+			return None
+		return timeIndex.formatTime(time)
+	
+	def moveToTime(self, text):
+		"""Moves to the first message logged at or after the time entered by the user in text."""
+		
+		from .logTimeIndex import parseTimeInput, TimeInputError
+		index = self.obj.getHeaderIndex()
+		timeIndex = self.getTimeIndex()
+		if index is None or timeIndex is None:
+			# Translators: Reported when trying to jump to a time in a log whose text does not support it.
+			ui.message(_('Jump to time is not available in this document'))
+			return
+		try:
+			date, time = parseTimeInput(text)
+		except TimeInputError:
+			# Translators: Reported when the time entered to jump to a time in the log is not valid.
+			ui.message(_('Invalid time: {time}').format(time=text))
+			return
+		offset = timeIndex.findOffset(timeIndex.getTime(date, time))
+		if offset is None:
+			# Translators: Reported when no message has been logged after the time entered by the user.
+			ui.message(_('No message logged after {time}').format(time=text))
+			return
+		self.moveToOffset(offset, index, 'Message')
+	
+	def moveToOffset(self, offset, index, searchType, reportError=True):
+		"""Moves the caret to the message header located at offset and reports this message.
+		Returns False if the index does not match the text of the log; the indexes are then invalidated and, if
+		reportError is True, the user is told to try again.
+		"""
+		
+		tiMsg = self.obj.makeTextInfoFromLogOffsets(offset, index.getMessageEnd(offset))
+		try:
+			if tiMsg is None:
+				raise LookupError
+			msg = LogMessage.makeFromText(tiMsg.text)
+		except LookupError:
+			# The index does not match the text anymore; the log has probably been modified.
+			log.debugWarning('Header index out of date for {obj}'.format(obj=self.obj))
+			self.obj.invalidateLogIndexes()
+			if reportError:
+				reportIndexOutOfDate()
+			return False
+		self.ti = tiMsg
+		self.ti.collapse()
+		self.ti.updateSelection()
+		msg.speak(reason=controlTypes.OutputReason.CARET, mode=searchType)
+		return True
+	
+	def moveToHeaderByLine(self, direction, searchType):
+		"""Moves to the next header reading the log line by line.
+		This is used for documents whose TextInfo does not expose offsets so that no index can be used, or when
+		the index does not match the text of the log anymore.
+		"""
+		
 		while self.ti.move(textInfos.UNIT_LINE, direction):
 			tiLine = self.ti.copy()
 			tiLine.expand(textInfos.UNIT_LINE)
@@ -287,6 +1099,16 @@ class LogContainer(ScriptableObject):
 	isLogViewer = False
 	
 	enableTable = {}
+	# The indexes built on the logs (header index, statistics, etc.), mapped by (index class, window handle).
+	logIndexTable = {}
+	# The signature of the log on which the indexes of each window have been built, mapped by window handle.
+	logSignatureTable = {}
+	# Number of characters at the beginning of a log in which its first header is searched for its signature.
+	SIGNATURE_SEARCH_LENGTH = 1024
+	# The last search query of each log, mapped by window handle.
+	searchQueryTable = {}
+	# The thread to which quick navigation is limited in each log, mapped by window handle.
+	threadFilterTable = {}
 
 	def moveToHeaderFactory(dir, searchType):
 		if dir == 1:
@@ -320,23 +1142,45 @@ class LogContainer(ScriptableObject):
 		locals()['script_moveToNext{st}'.format(st=searchType)] = scriptMaker(1, searchType)
 		locals()['script_moveToPrevious{st}'.format(st=searchType)] = scriptMaker(-1, searchType)
 	
-	def initialize(self):
-		if not hasattr(self, 'scriptTable'):
-			self.scriptTable = {}
-			for qn, (searchType, scriptMaker) in self.QUICK_NAV_SCRIPT_INFO.items():
-				gestureId = normalizeGestureIdentifier('kb:' + qn)
-				self.scriptTable[gestureId] = 'script_moveToNext{st}'.format(st=searchType)
-				gestureId = normalizeGestureIdentifier('kb:shift+' + qn)
-				self.scriptTable[gestureId] = 'script_moveToPrevious{st}'.format(st=searchType)
-			self.scriptTable['kb:c'] = 'script_openSourceFile'
+	# Gestures of the log reader commands other than quick navigation, mapped to their script names.
+	READER_COMMAND_GESTURES = (
+		('kb:c', 'script_openSourceFile'),
+		('kb:shift+c', 'script_reportTracebackFrames'),
+		('kb:j', 'script_moveToNextTracebackFrame'),
+		('kb:shift+j', 'script_moveToPreviousTracebackFrame'),
+		('kb:s', 'script_reportStatistics'),
+		('kb:x', 'script_moveToNextDistinctError'),
+		('kb:shift+x', 'script_moveToPreviousDistinctError'),
+		('kb:u', 'script_reportUniqueErrors'),
+		('kb:t', 'script_jumpToTime'),
+		('kb:h', 'script_chooseThreadFilter'),
+		('kb:l', 'script_reportLatency'),
+		('kb:o', 'script_moveToNextLatencyOutlier'),
+		('kb:shift+o', 'script_moveToPreviousLatencyOutlier'),
+		# Not control+F and F3, so that the Find commands of the editor or browser displaying the log still work.
+		('kb:/', 'script_searchLog'),
+		('kb:n', 'script_moveToNextSearchHit'),
+		('kb:shift+n', 'script_moveToPreviousSearchHit'),
+	)
+	
+	# All the gestures of the log reader, normalized, mapped to their script names; shared by all the logs.
+	readerGestureMap = {}
+	for qn, (searchType, scriptMaker) in QUICK_NAV_SCRIPT_INFO.items():
+		readerGestureMap[normalizeGestureIdentifier('kb:' + qn)] = 'script_moveToNext{st}'.format(st=searchType)
+		readerGestureMap[normalizeGestureIdentifier('kb:shift+' + qn)] = 'script_moveToPrevious{st}'.format(
+			st=searchType
+		)
+	for gestureId, scriptName in READER_COMMAND_GESTURES:
+		readerGestureMap[normalizeGestureIdentifier(gestureId)] = scriptName
+	del gestureId, scriptName
 	
 	def getLogReaderCommandScript(self, gesture):
 		if self.isLogReaderEnabled:
+			gestureMap = self.readerGestureMap
 			for gestureId in gesture.normalizedIdentifiers:
-				try:
-					return getattr(self, self.scriptTable[gestureId])
-				except KeyError:
-					pass
+				scriptName = gestureMap.get(gestureId)
+				if scriptName:
+					return getattr(self, scriptName)
 		return None
 	
 	@property
@@ -346,6 +1190,159 @@ class LogContainer(ScriptableObject):
 	@isLogReaderEnabled.setter
 	def isLogReaderEnabled(self, value):
 		LogContainer.enableTable[self.getWindowHandle()] = value
+		if not value:
+			# The indexes of a big log take much memory; they will be built again if the reader is enabled again.
+			self.invalidateLogIndexes()
+		updateGestureDispatcher()
+	
+	def getHeaderIndex(self):
+		"""Returns the header index of this log, building it if needed.
+		Returns None if the TextInfo of this object does not support offsets.
+		"""
+		
+		return self.getLogIndex(LogHeaderIndex)
+	
+	def getLogIndex(self, indexClass):
+		"""Returns the index of class indexClass built on this log (e.g. LogHeaderIndex), building it if needed
+		or updating it if text has been appended to the log.
+		indexClass should provide makeFromText, getUpdateStart and update methods and a storyLength attribute.
+		Returns None if the TextInfo of this object does not support offsets.
+		"""
+		
+		info = self.makeTextInfo(textInfos.POSITION_ALL)
+		offsets = getTextInfoOffsets(info)
+		if offsets is None:
+			return None
+		storyLength = offsets[1]
+		hwnd = self.getWindowHandle()
+		signature = self.getLogSignature(storyLength)
+		if LogContainer.logSignatureTable.get(hwnd) != signature:
+			# Another log is displayed in this window, e.g. in another tab of an editor, or the window handle has
+			# been reused: the indexes built so far cannot be used, even if the length matches.
+			if hwnd in LogContainer.logSignatureTable:
+				# The thread chosen for the previous log may not exist in this one.
+				LogContainer.threadFilterTable.pop(hwnd, None)
+			self.invalidateLogIndexes()
+			LogContainer.logSignatureTable[hwnd] = signature
+		converter = self.getOffsetConverter(info, storyLength)
+		if indexClass is LogOffsetConverter:
+			return converter
+		key = (indexClass, hwnd)
+		index = LogContainer.logIndexTable.get(key)
+		if index is not None:
+			if index.storyLength == storyLength:
+				return index
+			if index.storyLength < storyLength and self.updateLogIndex(index, storyLength, converter):
+				return index
+		index = indexClass.makeFromText(info.text)
+		index.storyLength = storyLength
+		LogContainer.logIndexTable[key] = index
+		return index
+	
+	def getOffsetConverter(self, info, storyLength):
+		"""Returns the LogOffsetConverter of this log, building or updating it if needed.
+		info is a TextInfo spanning the whole log and storyLength its end offset.
+		The converter is updated first, since the other indexes need it to get the text appended to the log.
+		"""
+		
+		key = (LogOffsetConverter, self.getWindowHandle())
+		converter = LogContainer.logIndexTable.get(key)
+		encoding = getTextInfoEncoding(info)
+		if converter is not None and converter.encoding == encoding:
+			if converter.storyLength == storyLength:
+				return converter
+			if converter.storyLength < storyLength:
+				start = converter.getUpdateStart()
+				tailInfo = makeTextInfoFromOffsets(self, converter.toTextInfoOffset(start), storyLength)
+				if tailInfo is not None:
+					converter.addText(tailInfo.text, start)
+					converter.storyLength = storyLength
+					return converter
+		converter = LogOffsetConverter(encoding)
+		converter.addText(info.text)
+		converter.storyLength = storyLength
+		LogContainer.logIndexTable[key] = converter
+		return converter
+	
+	def updateLogIndex(self, index, storyLength, converter):
+		"""Indexes only the text appended to the log since the index has been built, e.g. when the log viewer is
+		refreshed.
+		Returns False if the index could not be updated and needs to be rebuilt.
+		"""
+		
+		start = index.getUpdateStart()
+		info = makeTextInfoFromOffsets(self, converter.toTextInfoOffset(start), storyLength)
+		if info is None or not index.update(info.text, start):
+			return False
+		index.storyLength = storyLength
+		return True
+	
+	def getLogOffset(self, textInfoOffset):
+		"""Converts a TextInfo offset of this log into an offset in its text, as stored in the log indexes."""
+		converter = self.getLogIndex(LogOffsetConverter)
+		if converter is None:
+			return textInfoOffset
+		return converter.fromTextInfoOffset(textInfoOffset)
+	
+	def makeTextInfoFromLogOffsets(self, start, end):
+		"""Returns a TextInfo spanning the given offsets in the text of this log, as stored in the log indexes,
+		or None if not available.
+		"""
+		converter = self.getLogIndex(LogOffsetConverter)
+		if converter is None:
+			return None
+		return makeTextInfoFromOffsets(
+			self,
+			converter.toTextInfoOffset(start),
+			converter.toTextInfoOffset(end),
+		)
+	
+	def getLogSignature(self, storyLength):
+		"""Returns the offset and the text of the first message header of this log, used with its length to check
+		that the indexes of the window have been built on the same log.
+		Returns None if there is no header at the beginning of the log.
+		"""
+		
+		info = makeTextInfoFromOffsets(self, 0, min(storyLength, self.SIGNATURE_SEARCH_LENGTH))
+		if info is None:
+			return None
+		for offset, match in iterHeaderMatches(info.text):
+			return offset, match.group().strip()
+		return None
+	
+	def invalidateLogIndexes(self):
+		LogContainer.forgetLogIndexes(self.getWindowHandle())
+	
+	@staticmethod
+	def forgetLogIndexes(hwnd):
+		"""Removes the indexes built on the log of the window hwnd."""
+		for key in [k for k in LogContainer.logIndexTable if k[1] == hwnd]:
+			del LogContainer.logIndexTable[key]
+		LogContainer.logSignatureTable.pop(hwnd, None)
+	
+	@staticmethod
+	def forgetWindow(hwnd):
+		"""Removes all the data stored for the window hwnd, e.g. when it has been destroyed.
+		updateGestureDispatcher should then be called, since the log reader may not be enabled anywhere anymore.
+		"""
+		LogContainer.enableTable.pop(hwnd, None)
+		LogContainer.forgetLogIndexes(hwnd)
+		LogContainer.searchQueryTable.pop(hwnd, None)
+		LogContainer.threadFilterTable.pop(hwnd, None)
+	
+	@staticmethod
+	def forgetDestroyedWindows():
+		"""Removes the data stored for the windows that do not exist anymore."""
+		hwnds = set(hwnd for indexClass, hwnd in LogContainer.logIndexTable)
+		hwnds.update(
+			LogContainer.enableTable,
+			LogContainer.logSignatureTable,
+			LogContainer.searchQueryTable,
+			LogContainer.threadFilterTable,
+		)
+		for hwnd in hwnds:
+			if not winUser.isWindow(hwnd):
+				LogContainer.forgetWindow(hwnd)
 	
 	def getWindowHandle(self):
 		""" Returns the handle of the window containing this LogContainer.
@@ -395,6 +1392,270 @@ class LogContainer(ScriptableObject):
 		# Translators: A message reported when trying to open the source code from the current line.
 		ui.message(_('No file path or object found on this line.'))
 	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_("Moves to the next frame of a traceback."),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToNextTracebackFrame(self, gesture):
+		LogReader(self).moveToTracebackFrame(1)
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_("Moves to the previous frame of a traceback."),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToPreviousTracebackFrame(self, gesture):
+		LogReader(self).moveToTracebackFrame(-1)
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_(
+			"Displays all the frames of the traceback of the current message with their source code line."
+		),
+		category=ADDON_SUMMARY,
+	)
+	def script_reportTracebackFrames(self, gesture):
+		from .logTracebacks import iterFrames, FrameResolver
+		text = LogReader(self).getCaretMessageText()
+		if text is None:
+			# Translators: Reported when trying to list the frames of a traceback in a log whose text does not
+			# support it.
+			ui.message(_('Traceback frame list is not available in this document'))
+			return
+		frames = list(iterFrames(text))
+		if not frames:
+			# Translators: Reported when trying to list the frames of a traceback in a message without traceback.
+			ui.message(_('No traceback in this message'))
+			return
+		# Translators: The title of the window displaying the frames of a traceback.
+		ui.browseableMessage(FrameResolver().getReport(frames), _("Traceback frames"))
+	
+	@script(
+		# Translators: Input help mode message for the log statistics script.
+		description=_(
+			"Displays statistics on the messages of the log: "
+			"number of messages per level, code path, thread and time."
+		),
+		category=ADDON_SUMMARY,
+	)
+	def script_reportStatistics(self, gesture):
+		from .logStats import LogStatistics
+		stats = self.getLogIndex(LogStatistics)
+		if stats is None:
+			stats = LogStatistics.makeFromText(self.makeTextInfo(textInfos.POSITION_ALL).text)
+		# Translators: The title of the window displaying the log statistics.
+		ui.browseableMessage(stats.getReport(), _("Log statistics"))
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_(
+			"Moves to the next error that has not been logged before, "
+			"ignoring the repetitions of the same error."
+		),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToNextDistinctError(self, gesture):
+		LogReader(self).moveToDistinctError(1)
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_(
+			"Moves to the previous error that has not been logged before, "
+			"ignoring the repetitions of the same error."
+		),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToPreviousDistinctError(self, gesture):
+		LogReader(self).moveToDistinctError(-1)
+	
+	@script(
+		# Translators: Input help mode message for the unique errors summary script.
+		description=_("Displays the list of the unique errors of the log with their number of occurrences."),
+		category=ADDON_SUMMARY,
+	)
+	def script_reportUniqueErrors(self, gesture):
+		from .logErrors import LogErrorIndex
+		errorIndex = self.getLogIndex(LogErrorIndex)
+		if errorIndex is None:
+			errorIndex = LogErrorIndex.makeFromText(self.makeTextInfo(textInfos.POSITION_ALL).text)
+		# Translators: The title of the window displaying the unique errors of the log.
+		ui.browseableMessage(errorIndex.getReport(), _("Unique errors"))
+	
+	@script(
+		# Translators: Input help mode message for the search script of the log reader.
+		description=_("Searches the messages of the log containing some words."),
+		category=ADDON_SUMMARY,
+	)
+	def script_searchLog(self, gesture):
+		query = LogContainer.searchQueryTable.get(self.getWindowHandle(), '')
+		wx.CallAfter(self.popupSearchDialog, query)
+	
+	def popupSearchDialog(self, query):
+		gui.mainFrame.prePopup()
+		dlg = wx.TextEntryDialog(
+			gui.mainFrame,
+			# Translators: The label of the edit field of the log search dialog.
+			_(
+				"Words to search (e.g. UIA focus). "
+				"Use level:LEVEL to search only one level "
+				"and from:text to search only messages whose code path contains text."
+			),
+			# Translators: The title of the log search dialog.
+			_("Search in log"),
+			value=query,
+		)
+		try:
+			res = dlg.ShowModal()
+			query = dlg.GetValue().strip()
+		finally:
+			dlg.Destroy()
+			gui.mainFrame.postPopup()
+		if res != wx.ID_OK or not query:
+			return
+		LogContainer.searchQueryTable[self.getWindowHandle()] = query
+		# Let the focus come back to the log before moving the caret.
+		core.callLater(100, self.moveToSearchHit, 1, reportCount=True)
+	
+	def moveToSearchHit(self, direction, reportCount=False):
+		query = LogContainer.searchQueryTable.get(self.getWindowHandle())
+		if not query:
+			# Translators: Reported when moving to the next search result before having searched in the log.
+			ui.message(_('No search performed'))
+			return
+		LogReader(self).moveToSearchHit(direction, query, reportCount=reportCount)
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_("Moves to the next message matching the last search in the log."),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToNextSearchHit(self, gesture):
+		self.moveToSearchHit(1)
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_("Moves to the previous message matching the last search in the log."),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToPreviousSearchHit(self, gesture):
+		self.moveToSearchHit(-1)
+	
+	@script(
+		# Translators: Input help mode message for the latency report script of the log reader.
+		description=_("Displays the distribution of the latency between input gestures and speech in the log."),
+		category=ADDON_SUMMARY,
+	)
+	def script_reportLatency(self, gesture):
+		from .logLatency import LatencyAnalyzer
+		analyzer = self.getLogIndex(LatencyAnalyzer)
+		if analyzer is None:
+			analyzer = LatencyAnalyzer.makeFromText(self.makeTextInfo(textInfos.POSITION_ALL).text)
+		# Translators: The title of the window displaying the latency report.
+		ui.browseableMessage(analyzer.getReport(), _("Input to speech latency"))
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_("Moves to the next input gesture whose speech latency is abnormally high."),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToNextLatencyOutlier(self, gesture):
+		LogReader(self).moveToLatencyOutlier(1)
+	
+	@script(
+		# Translators: Input help mode message for a script of the log reader.
+		description=_("Moves to the previous input gesture whose speech latency is abnormally high."),
+		category=ADDON_SUMMARY,
+	)
+	def script_moveToPreviousLatencyOutlier(self, gesture):
+		LogReader(self).moveToLatencyOutlier(-1)
+	
+	@script(
+		# Translators: Input help mode message for the jump to time script of the log reader.
+		description=_("Moves to the first message logged at or after a time."),
+		category=ADDON_SUMMARY,
+	)
+	def script_jumpToTime(self, gesture):
+		time = LogReader(self).getCaretTime()
+		wx.CallAfter(self.popupJumpToTimeDialog, time or '')
+	
+	def popupJumpToTimeDialog(self, time):
+		gui.mainFrame.prePopup()
+		dlg = wx.TextEntryDialog(
+			gui.mainFrame,
+			# Translators: The label of the edit field of the jump to time dialog.
+			_("Time (HH:MM:SS.mmm or YYYY-MM-DD HH:MM:SS.mmm):"),
+			# Translators: The title of the jump to time dialog.
+			_("Jump to time"),
+			value=time,
+		)
+		try:
+			res = dlg.ShowModal()
+			time = dlg.GetValue().strip()
+		finally:
+			dlg.Destroy()
+			gui.mainFrame.postPopup()
+		if res != wx.ID_OK or not time:
+			return
+		# Let the focus come back to the log before moving the caret.
+		core.callLater(100, LogReader(self).moveToTime, time)
+	
+	@script(
+		# Translators: Input help mode message for the thread filter script of the log reader.
+		description=_(
+			"Lists the threads of the log with their number of messages and allows to limit quick navigation "
+			"to the messages of one of them."
+		),
+		category=ADDON_SUMMARY,
+	)
+	def script_chooseThreadFilter(self, gesture):
+		from .logThreads import LogThreadIndex
+		threadIndex = self.getLogIndex(LogThreadIndex)
+		if threadIndex is None:
+			# Translators: Reported when trying to filter a thread in a log whose text does not support it.
+			ui.message(_('Thread filter is not available in this document'))
+			return
+		wx.CallAfter(self.popupThreadFilterDialog, threadIndex.getThreadCounts())
+	
+	def popupThreadFilterDialog(self, threadCounts):
+		from .logThreads import formatThread
+		# Translators: The first choice of the thread filter dialog, to navigate among the messages of all threads.
+		choices = [_("All threads")]
+		for key, count in threadCounts:
+			# Translators: A choice of the thread filter dialog.
+			choices.append(_("{thread}: {count} messages").format(thread=formatThread(key), count=count))
+		currentKey = LogContainer.threadFilterTable.get(self.getWindowHandle())
+		threadKeys = [key for key, count in threadCounts]
+		gui.mainFrame.prePopup()
+		dlg = wx.SingleChoiceDialog(
+			gui.mainFrame,
+			# Translators: The message of the thread filter dialog.
+			_("Limit quick navigation to the messages of the following thread:"),
+			# Translators: The title of the thread filter dialog.
+			_("Thread filter"),
+			choices,
+		)
+		if currentKey in threadKeys:
+			dlg.SetSelection(threadKeys.index(currentKey) + 1)
+		try:
+			res = dlg.ShowModal()
+			selection = dlg.GetSelection()
+		finally:
+			dlg.Destroy()
+			gui.mainFrame.postPopup()
+		if res != wx.ID_OK:
+			return
+		if selection <= 0:
+			LogContainer.threadFilterTable.pop(self.getWindowHandle(), None)
+			# Translators: Reported when the thread filter is removed.
+			msg = _("Navigating among the messages of all threads")
+		else:
+			key = threadKeys[selection - 1]
+			LogContainer.threadFilterTable[self.getWindowHandle()] = key
+			# Translators: Reported when quick navigation is limited to one thread.
+			msg = _("Navigating among the messages of {thread}").format(thread=formatThread(key))
+		core.callLater(100, ui.message, msg)
+	
 	@staticmethod
 	def openStackTraceLine(line):
 		match = matchDict(RE_STACK_TRACE_LINE.match(line))
@@ -426,54 +1687,193 @@ class LogContainer(ScriptableObject):
 
 
 class EditableTextLogContainer(LogContainer):
-	def initOverlayClass(self):
-		self.initialize()
+	pass
 
 class LogViewerLogContainer(EditableTextLogContainer):
 	isLogViewer = True
+	
+	def initOverlayClass(self):
+		# The log reader is enabled by default in the log viewer.
+		if self.getWindowHandle() not in LogContainer.enableTable:
+			self.isLogReaderEnabled = True
 
 class DocumentWithLog(Window):
+	
+	# The classes mixing DocumentWithLogTreeInterceptor with a tree interceptor class, mapped by the latter, so
+	# that each of them is only created once.
+	_mixedTreeInterceptorClasses = {}
 
 	def _get_treeInterceptorClass(self):
 		cls = super(DocumentWithLog, self).treeInterceptorClass
+		try:
+			return DocumentWithLog._mixedTreeInterceptorClasses[cls]
+		except KeyError:
+			pass
 		bases = (DocumentWithLogTreeInterceptor, cls)
 		# Python 2/3: use str() to convert type since it is str in both version of Python
 		name = str('Mixed_[{classList}]').format(classList=str("+").join([x.__name__ for x in bases]))
 		newCls = type(name, bases, {"__module__": __name__})
+		DocumentWithLog._mixedTreeInterceptorClasses[cls] = newCls
 		return newCls
 	
 	
 class DocumentWithLogTreeInterceptor(TreeInterceptor, LogContainer):
-	def __init__(self, *args, **kw):
-		super(DocumentWithLogTreeInterceptor, self).__init__(*args, **kw)
-		self.initialize()
+	pass
+
+class GestureDispatchStats(object):
+	"""Counters of the gestures handled by the patched scriptHandler._getObjScript and of the time added to
+	their handling by the log reader.
+	"""
+	
+	def __init__(self):
+		self.reset()
+	
+	def reset(self):
+		self.nGestures = 0
+		self.nReaderScripts = 0
+		self.totalTime = 0.
+		self.maxTime = 0.
+	
+	def add(self, duration, isReaderScript):
+		self.nGestures += 1
+		if isReaderScript:
+			self.nReaderScripts += 1
+		self.totalTime += duration
+		if duration > self.maxTime:
+			self.maxTime = duration
+	
+	def getReport(self):
+		return (
+			'{n} gestures dispatched while the log reader was enabled, {nScripts} log reader commands; '
+			'added time: total {total:.3f} ms, mean {mean:.1f} us, max {max:.1f} us'
+		).format(
+			n=self.nGestures,
+			nScripts=self.nReaderScripts,
+			total=self.totalTime * 1e3,
+			mean=self.totalTime * 1e6 / self.nGestures if self.nGestures else 0.,
+			max=self.maxTime * 1e6,
+		)
+
+
+# Can be inspected from the Python console: globalPlugins.ndtt.logReader.gestureDispatchStats.getReport()
+gestureDispatchStats = GestureDispatchStats()
+
+# The function replaced by _getObjScript_patched, captured when the patch is installed; None if it is not.
+_getObjScript_original = None
+# True if the patch could not be removed because scriptHandler._getObjScript has been patched again since.
+_getObjScript_isWrapped = False
+
 
-_getObjScript_original = scriptHandler._getObjScript
 def _getObjScript_patched(obj, gesture, globalMapScripts, *args, **kw):
 	""" This function patches scriptHandler._getObjScript in order to return a log reader command script
 	if one matches the gesture before searching the global gesture maps for a match.
+	It is only installed while the log reader is enabled in at least one window.
 	"""
 	
 	if isinstance(obj, LogContainer):
+		start = perf_counter()
+		script = None
 		try:
 			script = obj.getLogReaderCommandScript(gesture)
-			if script:
-				return script
 		except Exception:  # Prevent a faulty add-on from breaking script handling altogether (#5446)
 			log.exception()
+		gestureDispatchStats.add(perf_counter() - start, script is not None)
+		if script:
+			return script
 	return _getObjScript_original(obj, gesture, globalMapScripts, *args, **kw)
 
+
+def updateGestureDispatcher():
+	"""Patches scriptHandler._getObjScript if the log reader is enabled in a window and restores it otherwise,
+	so that gestures are not slowed down when the log reader is not used.
+	"""
+	
+	global _getObjScript_original, _getObjScript_isWrapped
+	if any(LogContainer.enableTable.values()):
+		if _getObjScript_original is None:
+			# Capture the current function rather than the one found at import time, since another add-on may have
+			# patched it in the meantime.
+			_getObjScript_original = scriptHandler._getObjScript
+			scriptHandler._getObjScript = _getObjScript_patched
+	elif _getObjScript_original is not None and not _getObjScript_isWrapped:
+		if scriptHandler._getObjScript is _getObjScript_patched:
+			scriptHandler._getObjScript = _getObjScript_original
+			_getObjScript_original = None
+		else:
+			# Another add-on has patched the function after this one: restoring the original function would remove
+			# its patch, so ours stays installed.
+			log.warning(
+				'scriptHandler._getObjScript has been patched again since the log reader patched it;'
+				' the log reader patch cannot be removed.'
+			)
+			_getObjScript_isWrapped = True
+
+
+class OverlayCacheStats(object):
+	"""Counters of the cache of the log viewer window classification in chooseNVDAObjectOverlayClasses."""
+	
+	def __init__(self):
+		self.reset()
+	
+	def reset(self):
+		self.nHits = 0
+		self.nMisses = 0
+		self.missTime = 0.
+	
+	def addMiss(self, duration):
+		self.nMisses += 1
+		self.missTime += duration
+	
+	def getReport(self):
+		meanMissTime = self.missTime / self.nMisses if self.nMisses else 0.
+		return (
+			'{hits} cache hits, {misses} misses; mean classification time {mean:.1f} us; '
+			'estimated time saved: {saved:.3f} ms'
+		).format(
+			hits=self.nHits,
+			misses=self.nMisses,
+			mean=meanMissTime * 1e6,
+			saved=self.nHits * meanMissTime * 1e3,
+		)
+
+
+# Can be inspected from the Python console: globalPlugins.ndtt.logReader.overlayCacheStats.getReport()
+overlayCacheStats = OverlayCacheStats()
+
+
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
+	
+	# Maximum number of windows whose classification is cached.
+	MAX_CACHED_WINDOWS = 1000
 
 	def __init__(self, *args, **kwargs):
 		super(GlobalPlugin, self).__init__(*args, **kwargs)
-		scriptHandler._getObjScript = _getObjScript_patched
+		# Whether each window is the log viewer's edit control, mapped by window handle.
+		self._logViewerWindowCache = {}
+		self._logViewerState = None
+		overlayCacheStats.reset()
 		LogContainer.enableTable = {}
+		LogContainer.logIndexTable = {}
+		LogContainer.logSignatureTable = {}
+		LogContainer.searchQueryTable = {}
+		LogContainer.threadFilterTable = {}
+		gestureDispatchStats.reset()
 		
 	def terminate(self, *args, **kwargs):
-		scriptHandler._getObjScript = _getObjScript_original
+		LogContainer.enableTable = {}
+		LogContainer.logIndexTable = {}
+		LogContainer.logSignatureTable = {}
+		updateGestureDispatcher()
 		super(GlobalPlugin, self).terminate(*args, **kwargs)
 	
+	def event_foreground(self, obj, nextHandler):
+		# Windows are often closed when the foreground changes, e.g. the log viewer; their data are not needed
+		# anymore and gestures do not need to be patched if the log reader was only enabled in them.
+		self.updateLogViewerState()
+		LogContainer.forgetDestroyedWindows()
+		updateGestureDispatcher()
+		nextHandler()
+	
 	def chooseNVDAObjectOverlayClasses(self, obj, clsList):
 	# Note: chooseNVDAObjectOverlayClasses needs to be explicitely called in the mother class; else, NVDA will skip it.
 		if obj.role == controlTypes.Role.DOCUMENT:
@@ -485,14 +1885,52 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		else:
 			isEditable = False
 		if isEditable:
-			isLogViewer = False
-			hParent = winUser.getAncestor(obj.windowHandle, winUser.GA_PARENT)
-			try:
-				hLogViewer = gui.logViewer.logViewer.GetHandle()
-				isLogViewer = hLogViewer == hParent
-			except (AttributeError, RuntimeError):  # Error when logViewer is None or when its windows has been dismissedor closed.
-				isLogViewer = False
-			if isLogViewer:
+			if self.isLogViewerWindow(obj.windowHandle):
 				clsList.insert(0, LogViewerLogContainer)
 			else:
 				clsList.insert(0, EditableTextLogContainer)
+	
+	def updateLogViewerState(self):
+		"""Clears the cache of the window classification if the log viewer has been opened or closed since the
+		last call; the data stored for the windows of the previous log viewer are then removed.
+		Returns the log viewer, or None if it has never been opened.
+		"""
+		
+		logViewer = getattr(gui.logViewer, 'logViewer', None)
+		# A destroyed wx window evaluates to False.
+		logViewerState = (id(logViewer), bool(logViewer))
+		if logViewerState != self._logViewerState:
+			for hwnd, isLogViewer in self._logViewerWindowCache.items():
+				if isLogViewer:
+					LogContainer.forgetWindow(hwnd)
+			self._logViewerWindowCache.clear()
+			self._logViewerState = logViewerState
+		return logViewer
+	
+	def isLogViewerWindow(self, hwnd):
+		"""Returns True if hwnd is the edit control of NVDA's log viewer.
+		The result is cached per window; the cache is cleared when the log viewer is opened or closed.
+		"""
+		
+		logViewer = self.updateLogViewerState()
+		cache = self._logViewerWindowCache
+		if len(cache) >= self.MAX_CACHED_WINDOWS:
+			cache.clear()
+		try:
+			isLogViewer = cache[hwnd]
+		except KeyError:
+			pass
+		else:
+			overlayCacheStats.nHits += 1
+			return isLogViewer
+		start = perf_counter()
+		hParent = winUser.getAncestor(hwnd, winUser.GA_PARENT)
+		try:
+			hLogViewer = logViewer.GetHandle()
+			isLogViewer = hLogViewer == hParent
+		except (AttributeError, RuntimeError):
+			# Error when logViewer is None or when its window has been dismissed or closed.
+			isLogViewer = False
+		cache[hwnd] = isLogViewer
+		overlayCacheStats.addMiss(perf_counter() - start)
+		return isLogViewer
@@ -0,0 +1,192 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Provides a full-text inverted index on the messages of a log.
+Each word found in the content of a message is mapped to the list of the messages containing it, so that a
+query only needs to intersect a few lists instead of reading the whole log.
+"""
+
+from __future__ import unicode_literals
+
+import re
+from array import array
+from bisect import bisect_left
+
+from .logReader import (
+	iterHeaderMatches,
+	RE_MESSAGE_HEADER_AT,
+	OFFSET_TYPECODE,
+)
+from .logStore import StringTable
+
+RE_WORD = re.compile(r'\w+', re.UNICODE)
+
+# Prefixes of the query terms used to filter on message header fields.
+QUERY_FILTER_LEVEL = 'level:'
+QUERY_FILTER_CODE_PATH = 'from:'
+
+
+class SearchQuery(object):
+	"""A parsed search query.
+	A query is a list of space separated terms, all of which have to match:
+	- a word, that should be found in the content of the message (case insensitive); a word ending with "*"
+	matches all the words beginning with it;
+	- "level:LEVEL", e.g. "level:error", to search only messages of this level;
+	- "from:text", e.g. "from:IAccessibleHandler", to search only messages whose code path contains text.
+	"""
+
+	def __init__(self, text):
+		self.text = text
+		self.words = []
+		self.prefixes = []
+		self.levels = []
+		self.codePaths = []
+		for term in text.split():
+			lowerTerm = term.lower()
+			if lowerTerm.startswith(QUERY_FILTER_LEVEL):
+				self.levels.append(term[len(QUERY_FILTER_LEVEL):].upper())
+			elif lowerTerm.startswith(QUERY_FILTER_CODE_PATH):
+				self.codePaths.append(lowerTerm[len(QUERY_FILTER_CODE_PATH):])
+			elif term.endswith('*') and RE_WORD.match(term):
+				self.prefixes.append(lowerTerm.rstrip('*'))
+			else:
+				self.words.extend(RE_WORD.findall(lowerTerm))
+
+	@property
+	def isEmpty(self):
+		return not (self.words or self.prefixes or self.levels or self.codePaths)
+
+
+class LogSearchIndex(object):
+	"""An inverted index of the words found in the messages of a log.
+	Messages are identified by their number in the log; their offsets are kept to navigate to them.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		# Offset of the header of each message
+		self.offsets = array(OFFSET_TYPECODE)
+		self.levels = array('B')
+		self.codePaths = array('L')
+		self.levelNames = StringTable()
+		self.codePathNames = StringTable()
+		# Word -> message numbers, in increasing order
+		self.postings = {}
+		# Words of the last message, needed to remove it when the index is updated.
+		self._lastWords = ()
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		index = cls()
+		index.addText(text)
+		return index
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def addText(self, text, base=0):
+		"""Indexes the messages of text.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		"""
+
+		previous = None
+		for offset, match in iterHeaderMatches(text):
+			if previous is not None:
+				self._addMessage(text, previous, offset, base)
+			previous = offset, match
+		if previous is not None:
+			self._addMessage(text, previous, len(text), base)
+		self.length = base + len(text)
+
+	def _addMessage(self, text, header, end, base):
+		offset, match = header
+		msgId = len(self.offsets)
+		self.offsets.append(base + offset)
+		self.levels.append(self.levelNames.getId(match.group('level')))
+		self.codePaths.append(self.codePathNames.getId(match.group('codePath')))
+		words = set(RE_WORD.findall(text[match.end():end].lower()))
+		postings = self.postings
+		for word in words:
+			try:
+				postings[word].append(msgId)
+			except KeyError:
+				postings[word] = array('l', [msgId])
+		self._lastWords = words
+
+	def getUpdateStart(self):
+		if not self.offsets:
+			return 0
+		return self.offsets[-1]
+
+	def update(self, tailText, base):
+		"""Indexes tailText, the end of the log starting at offset base.
+		The last indexed message is indexed again since its content may have grown.
+		Returns False if tailText does not match the part of the log already indexed.
+		"""
+
+		if base > 0 and not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		if self.offsets:
+			for word in self._lastWords:
+				msgIds = self.postings[word]
+				msgIds.pop()
+				if not msgIds:
+					del self.postings[word]
+			for col in (self.offsets, self.levels, self.codePaths):
+				col.pop()
+		self.addText(tailText, base=base)
+		return True
+
+	def getWordMessages(self, word):
+		return self.postings.get(word, ())
+
+	def getPrefixMessages(self, prefix):
+		"""Returns the sorted numbers of the messages containing a word beginning with prefix."""
+		msgIds = set()
+		for word, wordMsgIds in self.postings.items():
+			if word.startswith(prefix):
+				msgIds.update(wordMsgIds)
+		return sorted(msgIds)
+
+	def search(self, query):
+		"""Returns the sorted list of the numbers of the messages matching query (a SearchQuery or a string)."""
+
+		if not isinstance(query, SearchQuery):
+			query = SearchQuery(query)
+		if query.isEmpty:
+			return []
+		candidates = [self.getWordMessages(word) for word in query.words]
+		candidates.extend(self.getPrefixMessages(prefix) for prefix in query.prefixes)
+		candidates.sort(key=len)
+		if candidates:
+			# Check each message of the shortest list against the other lists with a binary search.
+			smallest, others = candidates[0], candidates[1:]
+			result = [msgId for msgId in smallest if all(_contains(msgIds, msgId) for msgIds in others)]
+		else:
+			result = range(len(self.offsets))
+		if query.levels:
+			levelIds = {
+				id for id, level in enumerate(self.levelNames.strings) if level in query.levels
+			}
+			result = [msgId for msgId in result if self.levels[msgId] in levelIds]
+		if query.codePaths:
+			codePathIds = {
+				id for id, codePath in enumerate(self.codePathNames.strings)
+				if all(term in codePath.lower() for term in query.codePaths)
+			}
+			result = [msgId for msgId in result if self.codePaths[msgId] in codePathIds]
+		return list(result)
+
+	def searchOffsets(self, query):
+		"""Returns the sorted list of the header offsets of the messages matching query."""
+		offsets = self.offsets
+		return [offsets[msgId] for msgId in self.search(query)]
+
+
+def _contains(sortedSeq, value):
+	i = bisect_left(sortedSeq, value)
+	return i < len(sortedSeq) and sortedSeq[i] == value
@@ -0,0 +1,199 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Saves the indexes of a log file (headers, times and errors) in a binary sidecar file next to it, so that
+they do not need to be built again when the log is reopened, e.g. after NVDA has been restarted.
+The sidecar records the size and modification time of the log; it is ignored and rebuilt if they have
+changed.
+Offsets stored in the sidecar are byte offsets in the log file.
+Sidecars are written when backup logs are searched, when their unique errors are listed in the Logs Manager
+and when they are archived.
+
+Format of the sidecar: SIDECAR_MAGIC, the length of the metadata (unsigned 32-bit little endian integer), the
+metadata as UTF-8 encoded JSON, then the raw content of the arrays listed in the metadata.
+"""
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import struct
+from array import array
+from datetime import datetime
+
+from logHandler import log
+
+from .logReader import LogHeaderIndex
+from .logTimeIndex import LogTimeIndex
+from .logStats import MS_PER_DAY
+from .logErrors import LogErrorIndex, ErrorFingerprint
+
+# Extension of the sidecar file storing the indexes of a log, appended to the log's file name.
+SIDECAR_EXTENSION = '.ndttidx'
+SIDECAR_MAGIC = b'NDTTIDX\x03'
+META_LENGTH_FORMAT = str('<I')
+
+
+def getSidecarPath(logPath):
+	return logPath + SIDECAR_EXTENSION
+
+
+def getFileKey(path):
+	"""Returns the (size, modification time in nanoseconds) of a file, used to detect that it has changed."""
+	st = os.stat(path)
+	mtime = getattr(st, 'st_mtime_ns', None)
+	if mtime is None:
+		# Python 2
+		mtime = int(st.st_mtime * 1e9)
+	return st.st_size, mtime
+
+
+class LogSidecar(object):
+	"""The indexes of a log file, that can be saved to and loaded from a sidecar file."""
+
+	def __init__(self, headerIndex, timeIndex, errorIndex):
+		self.headerIndex = headerIndex
+		self.timeIndex = timeIndex
+		self.errorIndex = errorIndex
+
+	@classmethod
+	def makeFromBuffer(cls, buffer):
+		"""Builds the indexes of a log from its bytes, e.g. a memory map."""
+		headerIndex = LogHeaderIndex()
+		headerIndex.addText(buffer)
+		timeIndex = LogTimeIndex()
+		timeIndex.addText(buffer)
+		errorIndex = LogErrorIndex()
+		errorIndex.addText(buffer)
+		return cls(headerIndex, timeIndex, errorIndex)
+
+	@classmethod
+	def loadOrBuild(cls, logPath, buffer):
+		"""Loads the sidecar of a log if it is up to date; otherwise builds the indexes from buffer, the bytes of
+		the log, and saves them in the sidecar.
+		"""
+
+		fileKey = getFileKey(logPath)
+		sidecar = cls.load(getSidecarPath(logPath), fileKey)
+		if sidecar is None:
+			sidecar = cls.makeFromBuffer(buffer)
+			sidecar.save(getSidecarPath(logPath), fileKey)
+		return sidecar
+
+	def getArrays(self):
+		"""Returns a list of (name, array) tuples for all the arrays to be saved."""
+		headerIndex, timeIndex, errorIndex = self.headerIndex, self.timeIndex, self.errorIndex
+		arrays = [('offsets', headerIndex.offsets)]
+		arrays.extend(
+			('level:' + level, offsets) for level, offsets in sorted(headerIndex.levelOffsets.items())
+		)
+		arrays.extend([
+			('times', timeIndex.times),
+			('searchTimes', timeIndex.searchTimes),
+			('errorOffsets', errorIndex.offsets),
+			('errorTimes', errorIndex.times),
+			('errorFingerprintIds', errorIndex.fingerprintIds),
+			('errorFirstOffsets', errorIndex.firstOffsets),
+		])
+		return arrays
+
+	def save(self, path, fileKey):
+		"""Saves the sidecar; fileKey is the value returned by getFileKey for the log."""
+
+		arrays = self.getArrays()
+		firstDate = self.timeIndex.firstDate
+		meta = {
+			'size': fileKey[0],
+			'mtime': fileKey[1],
+			'byteorder': sys.byteorder,
+			'length': self.headerIndex.length,
+			'firstDate': firstDate.isoformat() if firstDate is not None else None,
+			'fingerprints': [[fp.excType, fp.frames, fp.text] for fp in self.errorIndex.fingerprints],
+			'codePaths': self.errorIndex.codePaths,
+			'descriptions': self.errorIndex.descriptions,
+			'arrays': [[name, arr.typecode, len(arr)] for name, arr in arrays],
+		}
+		metaBytes = json.dumps(meta).encode('utf-8')
+		try:
+			with open(path, 'wb') as f:
+				f.write(SIDECAR_MAGIC)
+				f.write(struct.pack(META_LENGTH_FORMAT, len(metaBytes)))
+				f.write(metaBytes)
+				for name, arr in arrays:
+					arr.tofile(f)
+		except (IOError, OSError):
+			log.debugWarning('Unable to save the log index {path}'.format(path=path), exc_info=True)
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+			return False
+		return True
+
+	@classmethod
+	def load(cls, path, fileKey):
+		"""Loads a sidecar; returns None if it does not exist, is not valid or does not match fileKey."""
+
+		try:
+			with open(path, 'rb') as f:
+				if f.read(len(SIDECAR_MAGIC)) != SIDECAR_MAGIC:
+					return None
+				metaLength, = struct.unpack(META_LENGTH_FORMAT, f.read(struct.calcsize(META_LENGTH_FORMAT)))
+				meta = json.loads(f.read(metaLength).decode('utf-8'))
+				if (meta['size'], meta['mtime']) != tuple(fileKey) or meta['byteorder'] != sys.byteorder:
+					return None
+				arrays = {}
+				for name, typecode, length in meta['arrays']:
+					arr = array(str(typecode))
+					arr.fromfile(f, length)
+					arrays[name] = arr
+			return cls.makeFromData(meta, arrays)
+		except (IOError, OSError):
+			# The sidecar does not exist yet.
+			return None
+		except (ValueError, KeyError, TypeError, EOFError, struct.error):
+			log.debugWarning('Invalid log index {path}'.format(path=path), exc_info=True)
+			return None
+
+	@classmethod
+	def makeFromData(cls, meta, arrays):
+		length = meta['length']
+		headerIndex = LogHeaderIndex()
+		headerIndex.offsets = arrays['offsets']
+		headerIndex.levelOffsets = {
+			name[len('level:'):]: arr for name, arr in arrays.items() if name.startswith('level:')
+		}
+		headerIndex.length = length
+
+		timeIndex = LogTimeIndex()
+		# The header index and the time index may be updated separately, e.g. if the log grows.
+		timeIndex.offsets = array(headerIndex.offsets.typecode, headerIndex.offsets)
+		timeIndex.times = arrays['times']
+		timeIndex.searchTimes = arrays['searchTimes']
+		if timeIndex.times:
+			lastTime = timeIndex.times[-1]
+			timeIndex._unwrapper.lastTime = lastTime % MS_PER_DAY
+			timeIndex._unwrapper.dayOffset = lastTime - lastTime % MS_PER_DAY
+		if meta['firstDate'] is not None:
+			timeIndex.firstDate = datetime.strptime(meta['firstDate'], '%Y-%m-%d').date()
+		timeIndex.length = length
+
+		errorIndex = LogErrorIndex()
+		errorIndex.offsets = arrays['errorOffsets']
+		errorIndex.times = arrays['errorTimes']
+		errorIndex.fingerprintIds = arrays['errorFingerprintIds']
+		errorIndex.firstOffsets = arrays['errorFirstOffsets']
+		errorIndex.fingerprints = [
+			ErrorFingerprint(excType, tuple(tuple(frame) for frame in frames), text)
+			for excType, frames, text in meta['fingerprints']
+		]
+		errorIndex._fingerprintIds = {fp: fpId for fpId, fp in enumerate(errorIndex.fingerprints)}
+		errorIndex.codePaths = meta['codePaths']
+		errorIndex.descriptions = meta['descriptions']
+		if headerIndex.offsets:
+			errorIndex._lastHeaderOffset = headerIndex.offsets[-1]
+		errorIndex.length = length
+		return cls(headerIndex, timeIndex, errorIndex)
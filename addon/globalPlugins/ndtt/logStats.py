@@ -0,0 +1,222 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Computes statistics on the messages of a log: counts per level, code path, thread and per second.
+Only message headers are read, in a single streaming pass over the log.
+"""
+
+from __future__ import unicode_literals
+
+from collections import Counter, defaultdict
+
+import addonHandler
+
+from .logReader import iterHeaderMatches, RE_MESSAGE_HEADER_AT, TYPE_STR
+from .logStore import parseTime, formatTime
+
+addonHandler.initTranslation()
+
+MS_PER_DAY = 24 * 3600 * 1000
+
+
+class TimeUnwrapper(object):
+	"""Converts the successive logged times (milliseconds since midnight) into milliseconds since the midnight
+	preceding the first message, so that times keep increasing when a log spans midnight.
+	"""
+
+	# A time going back more than this is considered as a new day rather than out-of-order messages.
+	ROLLOVER_THRESHOLD = 12 * 3600 * 1000
+
+	def __init__(self):
+		self.dayOffset = 0
+		self.lastTime = None
+
+	def unwrap(self, time):
+		if self.lastTime is not None and time + self.ROLLOVER_THRESHOLD < self.lastTime:
+			self.dayOffset += MS_PER_DAY
+		self.lastTime = time
+		return time + self.dayOffset
+
+
+class LogStatistics(object):
+	"""Statistics on the messages of a log.
+	They can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		self.nMessages = 0
+		self.levels = Counter()
+		self.codePaths = Counter()
+		# Number of messages per level for each code path and each thread.
+		self.codePathLevels = defaultdict(Counter)
+		self.threadLevels = defaultdict(Counter)
+		# Number of messages per second; keys are seconds since the midnight preceding the first message.
+		self.seconds = Counter()
+		self.firstTime = None
+		self.lastTime = None
+		self._unwrapper = TimeUnwrapper()
+		# Offset of the last counted header.
+		self._lastHeaderOffset = None
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		stats = cls()
+		stats.addText(text)
+		return stats
+
+	@classmethod
+	def makeFromFile(cls, path):
+		"""Computes the statistics of a log file, reading it through a memory map."""
+		from .mappedLog import MappedLog
+		stats = cls()
+		with MappedLog(path, indexed=False) as mLog:
+			stats.addText(mLog.buffer)
+		return stats
+
+	def addHeader(self, level, codePath, time, threadName, thread):
+		self.nMessages += 1
+		self.levels[level] += 1
+		self.codePaths[codePath] += 1
+		self.codePathLevels[codePath][level] += 1
+		self.threadLevels[(threadName, thread)][level] += 1
+		ms = self._unwrapper.unwrap(parseTime(time))
+		if self.firstTime is None:
+			self.firstTime = ms
+		self.lastTime = ms
+		self.seconds[ms // 1000] += 1
+
+	def addText(self, text, start=0, base=0):
+		"""Counts the messages whose header is located after start in text.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		text may also be a bytes-like object such as a memory map.
+		"""
+
+		isText = isinstance(text, TYPE_STR)
+		addHeader = self.addHeader
+		offset = None
+		for offset, match in iterHeaderMatches(text, start):
+			groups = match.group('level', 'codePath', 'time', 'threadName', 'thread')
+			if not isText:
+				groups = [g.decode('utf-8', 'replace') if g is not None else None for g in groups]
+			addHeader(*groups)
+		if offset is not None:
+			self._lastHeaderOffset = base + offset
+		self.length = base + len(text)
+
+	def getUpdateStart(self):
+		if self._lastHeaderOffset is None:
+			return 0
+		return self._lastHeaderOffset
+
+	def update(self, tailText, base):
+		"""Counts the messages of tailText, the end of the log starting at offset base.
+		Returns False if tailText does not match the part of the log already counted.
+		"""
+
+		if base == 0:
+			if self.nMessages > 0:
+				return False
+			self.addText(tailText)
+			return True
+		if not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		# The header at the start of tailText has already been counted.
+		self.addText(tailText, start=1, base=base)
+		return True
+
+	@property
+	def duration(self):
+		"""Duration of the log in milliseconds."""
+		if self.firstTime is None:
+			return 0
+		return self.lastTime - self.firstTime
+
+	def getMinuteCounts(self):
+		"""Returns a sorted list of (minute, number of messages) tuples; minutes are counted from the midnight
+		preceding the first message.
+		"""
+		minutes = Counter()
+		for second, count in self.seconds.items():
+			minutes[second // 60] += count
+		return sorted(minutes.items())
+
+	def getReport(self, nTop=20):
+		"""Returns the statistics as a text to be displayed in a browseable message."""
+
+		lines = []
+		if self.nMessages == 0:
+			# Translators: Reported in the log statistics when the log contains no message.
+			return _("No message found in the log.")
+		# Translators: A line of the log statistics.
+		lines.append(_("{n} messages from {start} to {end}").format(
+			n=self.nMessages,
+			start=formatTime(self.firstTime % MS_PER_DAY),
+			end=formatTime(self.lastTime % MS_PER_DAY),
+		))
+		seconds = max(self.duration / 1000., 1.)
+		peakSecond, peakCount = max(self.seconds.items(), key=lambda item: item[1])
+		# Translators: A line of the log statistics.
+		lines.append(_("Average rate: {rate:.1f} messages per second; peak: {peak} messages at {time}").format(
+			rate=self.nMessages / seconds,
+			peak=peakCount,
+			time=formatTime((peakSecond * 1000) % MS_PER_DAY)[:8],
+		))
+
+		lines.append('')
+		# Translators: A title in the log statistics.
+		lines.append(_("Messages per level:"))
+		for level, count in self.levels.most_common():
+			lines.append('{level}: {count} ({percent:.1f}%)'.format(
+				level=level,
+				count=count,
+				percent=100. * count / self.nMessages,
+			))
+
+		lines.append('')
+		# Translators: A title in the log statistics.
+		lines.append(_("Top {n} code paths:").format(n=min(nTop, len(self.codePaths))))
+		for codePath, count in self.codePaths.most_common(nTop):
+			lines.append('{codePath}: {count} ({levels})'.format(
+				codePath=codePath,
+				count=count,
+				levels=self.formatLevelCounts(self.codePathLevels[codePath]),
+			))
+
+		lines.append('')
+		# Translators: A title in the log statistics.
+		lines.append(_("Messages per thread:"))
+		threads = sorted(self.threadLevels.items(), key=lambda item: -sum(item[1].values()))
+		for (threadName, thread), levels in threads:
+			if threadName is None:
+				# Translators: Used in the log statistics for messages logged without thread information.
+				threadLabel = _("Unknown thread")
+			else:
+				threadLabel = '{name} ({id})'.format(name=threadName, id=thread)
+			lines.append('{thread}: {count} ({levels})'.format(
+				thread=threadLabel,
+				count=sum(levels.values()),
+				levels=self.formatLevelCounts(levels),
+			))
+
+		lines.append('')
+		# Translators: A title in the log statistics.
+		lines.append(_("Busiest seconds:"))
+		for second, count in sorted(self.seconds.items(), key=lambda item: -item[1])[:nTop]:
+			lines.append('{time}: {count}'.format(time=formatTime((second * 1000) % MS_PER_DAY)[:8], count=count))
+
+		lines.append('')
+		# Translators: A title in the log statistics.
+		lines.append(_("Messages per minute:"))
+		for minute, count in self.getMinuteCounts():
+			lines.append('{time}: {count}'.format(time=formatTime((minute * 60000) % MS_PER_DAY)[:5], count=count))
+		return '\n'.join(lines)
+
+	@staticmethod
+	def formatLevelCounts(levels):
+		return ', '.join(
+			'{level} {count}'.format(level=level, count=count) for level, count in levels.most_common()
+		)
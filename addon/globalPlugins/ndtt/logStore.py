@@ -0,0 +1,248 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Provides a compact in-memory store for the parsed messages of a log.
+Header fields are stored in columns (arrays) rather than in one object per message; repeated strings such as
+code paths and thread names are interned and message contents are kept as offsets in the source buffer.
+LogMessage and LogMessageHeader objects are only created as thin views when a message is accessed.
+"""
+
+from __future__ import unicode_literals
+
+from array import array
+
+from .logReader import (
+	LogMessage,
+	LogMessageHeader,
+	iterHeaderMatches,
+	OFFSET_TYPECODE,
+	TYPE_STR,
+)
+
+
+def parseTime(time):
+	"""Converts a logged time ("HH:MM:SS.mmm") into a number of milliseconds since midnight."""
+	hours, minutes, seconds = time.split(':')
+	seconds, ms = seconds[:-4], seconds[-3:]
+	return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(ms)
+
+
+def formatTime(ms):
+	"""Converts a number of milliseconds since midnight into a time as logged ("HH:MM:SS.mmm")."""
+	seconds, ms = divmod(ms, 1000)
+	minutes, seconds = divmod(seconds, 60)
+	hours, minutes = divmod(minutes, 60)
+	return '{h:02d}:{m:02d}:{s:02d}.{ms:03d}'.format(h=hours, m=minutes, s=seconds, ms=ms)
+
+
+class StringTable(object):
+	"""Interns strings, mapping each distinct string to an integer id."""
+
+	def __init__(self):
+		self.strings = []
+		self._ids = {}
+
+	def getId(self, key, decode=None):
+		"""Returns the id of key, adding it if needed.
+		key may be bytes, in which case decode is called to get the stored string when key is first seen.
+		"""
+		try:
+			return self._ids[key]
+		except KeyError:
+			id = len(self.strings)
+			self.strings.append(key if decode is None else decode(key))
+			self._ids[key] = id
+			return id
+
+	def __getitem__(self, id):
+		return self.strings[id]
+
+	def __len__(self):
+		return len(self.strings)
+
+
+class StoredLogMessageHeader(LogMessageHeader):
+	"""A LogMessageHeader reading its fields from a LogMessageStore."""
+
+	__slots__ = ('store', 'index')
+
+	def __init__(self, store, index):
+		self.store = store
+		self.index = index
+
+	@property
+	def level(self):
+		return self.store.levelNames[self.store.levels[self.index]]
+
+	@property
+	def codePath(self):
+		return self.store.codePathNames[self.store.codePaths[self.index]]
+
+	@property
+	def time(self):
+		return formatTime(self.store.times[self.index])
+
+	@property
+	def threadName(self):
+		return self.store.threadNameNames[self.store.threadNames[self.index]]
+
+	@property
+	def thread(self):
+		thread = self.store.threads[self.index]
+		if thread == LogMessageStore.NO_THREAD:
+			return None
+		return str(thread)
+
+
+class StoredLogMessage(LogMessage):
+	"""A LogMessage reading its header and content from a LogMessageStore."""
+
+	__slots__ = ('store', 'index')
+
+	def __init__(self, store, index):
+		self.store = store
+		self.index = index
+
+	@property
+	def header(self):
+		return StoredLogMessageHeader(self.store, self.index)
+
+	@property
+	def msg(self):
+		return self.store.getMessageContent(self.index).strip()
+
+
+class LogMessageStore(object):
+	"""A columnar store of the messages of a log contained in a buffer.
+	The buffer may be a string or a bytes-like object such as the memory map of a MappedLog; in the latter case,
+	message contents are decoded when they are accessed.
+	"""
+
+	# Value stored in the thread column for messages without thread information.
+	NO_THREAD = 0
+
+	def __init__(self, buffer, encoding='utf-8'):
+		self.buffer = buffer
+		self.encoding = encoding
+		self.isText = isinstance(buffer, TYPE_STR)
+		# Columns
+		self.levels = array('B')
+		self.codePaths = array('L')
+		self.times = array('l')
+		self.threadNames = array('L')
+		self.threads = array('L')
+		self.offsets = array(OFFSET_TYPECODE)
+		self.contentOffsets = array(OFFSET_TYPECODE)
+		# Interned strings
+		self.levelNames = StringTable()
+		self.codePathNames = StringTable()
+		self.threadNameNames = StringTable()
+		self.threadNameNames.getId(None)
+		self.addBuffer(buffer)
+
+	def decode(self, data):
+		return data.decode(self.encoding, 'replace')
+
+	def addBuffer(self, buffer, start=0):
+		"""Adds the messages whose header is located after start in buffer.
+		buffer should contain the text already stored, e.g. the same log after it has grown; start should be
+		located at the beginning of a line, after the last stored message.
+		"""
+
+		self.buffer = buffer
+		decode = None if self.isText else self.decode
+		levelId = self.levelNames.getId
+		codePathId = self.codePathNames.getId
+		threadNameId = self.threadNameNames.getId
+		noThread = self.NO_THREAD
+		for offset, match in iterHeaderMatches(buffer, start):
+			level, codePath, time, threadName, thread = match.group(
+				'level', 'codePath', 'time', 'threadName', 'thread'
+			)
+			self.levels.append(levelId(level, decode))
+			self.codePaths.append(codePathId(codePath, decode))
+			if decode:
+				time = decode(time)
+			self.times.append(parseTime(time))
+			self.threadNames.append(threadNameId(threadName, decode) if threadName is not None else 0)
+			self.threads.append(int(thread) if thread is not None else noThread)
+			self.offsets.append(offset)
+			self.contentOffsets.append(match.end())
+
+	def update(self, buffer):
+		"""Updates the store after the log contained in buffer has grown.
+		The last stored message is parsed again since its header may have been incompletely written.
+		"""
+
+		if not self.offsets:
+			self.addBuffer(buffer)
+			return
+		start = self.offsets[-1]
+		for col in self.columns:
+			del col[-1]
+		self.addBuffer(buffer, start)
+
+	@property
+	def columns(self):
+		return (
+			self.levels,
+			self.codePaths,
+			self.times,
+			self.threadNames,
+			self.threads,
+			self.offsets,
+			self.contentOffsets,
+		)
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def __getitem__(self, index):
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError(index)
+		return StoredLogMessage(self, index)
+
+	def __iter__(self):
+		for index in range(len(self)):
+			yield StoredLogMessage(self, index)
+
+	def getMessageContent(self, index):
+		start = self.contentOffsets[index]
+		if index + 1 < len(self.offsets):
+			end = self.offsets[index + 1]
+		else:
+			end = len(self.buffer)
+		content = self.buffer[start:end]
+		if not self.isText:
+			content = self.decode(content)
+		return content
+
+	def getLevelCode(self, level):
+		"""Returns the code of a level name in the level column, or None if no message has this level."""
+		try:
+			return self.levelNames.strings.index(level)
+		except ValueError:
+			return None
+
+	def iterIndexes(self, level=None, thread=None):
+		"""Yields the indexes of the messages of the given level and thread; None means any."""
+		levels = self.levels
+		threads = self.threads
+		if level is not None:
+			levelCode = self.getLevelCode(level)
+			if levelCode is None:
+				return
+		for index in range(len(self)):
+			if level is not None and levels[index] != levelCode:
+				continue
+			if thread is not None and threads[index] != thread:
+				continue
+			yield index
+
+	def getMemorySize(self):
+		"""Returns an estimate of the memory used by the columns in bytes, the buffer excluded."""
+		return sum(col.itemsize * len(col) for col in self.columns)
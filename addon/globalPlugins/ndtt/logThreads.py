@@ -0,0 +1,122 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Provides an index of the messages of a log per thread, to navigate among the messages of a single
+thread.
+A thread is identified by its (name, id) tuple as logged in the message headers; messages logged without
+thread information are grouped under the (None, None) key.
+"""
+
+from __future__ import unicode_literals
+
+from array import array
+
+import addonHandler
+
+from .logReader import (
+	iterHeaderMatches,
+	RE_MESSAGE_HEADER_AT,
+	OFFSET_TYPECODE,
+)
+
+addonHandler.initTranslation()
+
+# Key of the messages logged without thread information.
+NO_THREAD_KEY = (None, None)
+
+
+def formatThread(key):
+	"""Returns the label of a thread for the user."""
+	threadName, thread = key
+	if threadName is None:
+		# Translators: Label of the messages logged without thread information.
+		return _("Unknown thread")
+	return '{name} ({id})'.format(name=threadName, id=thread)
+
+
+class LogThreadIndex(object):
+	"""Index of the header offsets of the messages of a log per thread, and per thread and level.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		# Thread keys in the order of their first message.
+		self.threads = []
+		# Thread key -> header offsets of its messages
+		self.threadOffsets = {}
+		# (thread key, level) -> header offsets of the messages of this level
+		self.threadLevelOffsets = {}
+		# Thread key and level of the last indexed message.
+		self._lastKeys = None
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		index = cls()
+		index.addText(text)
+		return index
+
+	def addText(self, text, base=0):
+		"""Indexes the messages of text.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		"""
+
+		threadOffsets = self.threadOffsets
+		threadLevelOffsets = self.threadLevelOffsets
+		for offset, match in iterHeaderMatches(text):
+			level, threadName, thread = match.group('level', 'threadName', 'thread')
+			key = (threadName, thread)
+			try:
+				threadOffsets[key].append(base + offset)
+			except KeyError:
+				self.threads.append(key)
+				threadOffsets[key] = array(OFFSET_TYPECODE, [base + offset])
+			try:
+				threadLevelOffsets[key, level].append(base + offset)
+			except KeyError:
+				threadLevelOffsets[key, level] = array(OFFSET_TYPECODE, [base + offset])
+			self._lastKeys = key, level
+		self.length = base + len(text)
+
+	def getUpdateStart(self):
+		if self._lastKeys is None:
+			return 0
+		return self.threadOffsets[self._lastKeys[0]][-1]
+
+	def update(self, tailText, base):
+		"""Indexes tailText, the end of the log starting at offset base, i.e. at the last indexed header.
+		Returns False if tailText does not match the part of the log already indexed.
+		"""
+
+		if base > 0 and not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		if self._lastKeys is not None:
+			# The last header is indexed again since it may have been incompletely written.
+			key, level = self._lastKeys
+			for offsets, table, tableKey in (
+				(self.threadOffsets[key], self.threadOffsets, key),
+				(self.threadLevelOffsets[key, level], self.threadLevelOffsets, (key, level)),
+			):
+				offsets.pop()
+				if not offsets:
+					del table[tableKey]
+			if key not in self.threadOffsets:
+				self.threads.remove(key)
+			self._lastKeys = None
+		self.addText(tailText, base=base)
+		return True
+
+	def getOffsets(self, key, level=None):
+		"""Returns the sorted header offsets of the messages of a thread, of all levels if level is None."""
+		if level is None:
+			return self.threadOffsets.get(key, ())
+		return self.threadLevelOffsets.get((key, level), ())
+
+	def getThreadCounts(self):
+		"""Returns a list of (thread key, number of messages) tuples, in the order of the first message of each
+		thread.
+		"""
+		return [(key, len(self.threadOffsets[key])) for key in self.threads]
@@ -0,0 +1,216 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Provides an index of the times of the messages of a log, to find the first message logged at or after a
+given time with a binary search.
+Logged times only contain the time of the day; they are converted to a number of milliseconds since the
+midnight preceding the first message so that they keep increasing when the log spans midnight. When the log
+contains the UTC date logged at startup by the logs management module, it is used to find the date of each
+message.
+"""
+
+from __future__ import unicode_literals
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from .logReader import (
+	iterHeaderMatches,
+	RE_MESSAGE_HEADER_AT,
+	OFFSET_TYPECODE,
+	TYPE_STR,
+)
+from .logStats import TimeUnwrapper, MS_PER_DAY
+from .logStore import parseTime, formatTime
+
+# The message logged at startup by the logs management module, followed by the UTC date and time.
+TOKEN_INITIALIZATION = 'NDTT - Log management initialization: '
+DT_FORMAT_STRING = '%Y-%m-%d_%H-%M-%S'
+
+# A time entered by the user, e.g. "14:05", "14:05:30.250" or "2023-05-14 14:05:30".
+RE_TIME_INPUT = re.compile(
+	r'^(?:(?P<date>\d{4}-\d{1,2}-\d{1,2})[ T_])?'
+	r'(?P<hour>\d{1,2})[:h](?P<minute>\d{2})(?::(?P<second>\d{2})(?:[.,](?P<ms>\d{1,3}))?)?$'
+)
+
+# Maximum difference between the local time and UTC.
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+
+class TimeInputError(ValueError):
+	"""Raised when a time entered by the user cannot be parsed."""
+
+
+def parseTimeInput(text):
+	"""Parses a time entered by the user.
+	Returns a (date, ms) tuple where date is a datetime.date or None if not specified and ms is the number of
+	milliseconds since midnight.
+	"""
+
+	match = RE_TIME_INPUT.match(text.strip())
+	if not match:
+		raise TimeInputError(text)
+	hour, minute = int(match.group('hour')), int(match.group('minute'))
+	second = int(match.group('second') or 0)
+	ms = int((match.group('ms') or '0').ljust(3, '0'))
+	if hour > 23 or minute > 59 or second > 59:
+		raise TimeInputError(text)
+	date = None
+	if match.group('date'):
+		try:
+			date = datetime.strptime(match.group('date'), '%Y-%m-%d').date()
+		except ValueError:
+			raise TimeInputError(text)
+	return date, ((hour * 60 + minute) * 60 + second) * 1000 + ms
+
+
+def getLocalDate(utcDateTime, localTime):
+	"""Returns the local date of a message logged at localTime (milliseconds since midnight), knowing that it
+	has been logged at utcDateTime (a naive datetime in UTC).
+	"""
+
+	localTimeDelta = timedelta(milliseconds=localTime)
+	for dayShift in (0, -1, 1):
+		date = utcDateTime.date() + timedelta(days=dayShift)
+		localDateTime = datetime.combine(date, datetime.min.time()) + localTimeDelta
+		if abs(localDateTime - utcDateTime) <= MAX_UTC_OFFSET:
+			return date
+	return None
+
+
+class LogTimeIndex(object):
+	"""Index of the times of the messages of a log.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		self.offsets = array(OFFSET_TYPECODE)
+		# Times in milliseconds since the midnight preceding the first message.
+		self.times = array('l')
+		# Same as times, but never decreasing even if some messages are logged out of order, to allow a binary
+		# search.
+		self.searchTimes = array('l')
+		self._unwrapper = TimeUnwrapper()
+		# Local date of the first message; None if the log does not contain the initialization date.
+		self.firstDate = None
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		index = cls()
+		index.addText(text)
+		return index
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def addText(self, text, base=0):
+		"""Indexes the times of the messages of text.
+		base is the offset of text in the whole log, when text only contains the end of the log.
+		text may also be a bytes-like object such as a memory map.
+		"""
+
+		isText = isinstance(text, TYPE_STR)
+		unwrap = self._unwrapper.unwrap
+		searchTime = self.searchTimes[-1] if self.searchTimes else 0
+		for offset, match in iterHeaderMatches(text):
+			time = match.group('time')
+			if not isText:
+				time = time.decode('ascii')
+			time = unwrap(parseTime(time))
+			self.offsets.append(base + offset)
+			self.times.append(time)
+			searchTime = max(searchTime, time)
+			self.searchTimes.append(searchTime)
+		if self.firstDate is None:
+			self.findFirstDate(text, base)
+		self.length = base + len(text)
+
+	def findFirstDate(self, text, base):
+		"""Finds the date of the first message from the UTC date and time logged at NVDA startup."""
+		token = TOKEN_INITIALIZATION
+		if not isinstance(text, TYPE_STR):
+			token = token.encode('ascii')
+		pos = text.find(token)
+		if pos < 0:
+			return
+		i = bisect_right(self.offsets, base + pos) - 1
+		if i < 0:
+			return
+		dtString = text[pos + len(token):pos + len(token) + 40].split(None, 1)[0]
+		if not isinstance(dtString, TYPE_STR):
+			dtString = dtString.decode('ascii', 'replace')
+		try:
+			utcDateTime = datetime.strptime(dtString, DT_FORMAT_STRING)
+		except ValueError:
+			return
+		time = self.times[i]
+		date = getLocalDate(utcDateTime, time % MS_PER_DAY)
+		if date is not None:
+			self.firstDate = date - timedelta(days=time // MS_PER_DAY)
+
+	def getUpdateStart(self):
+		if not self.offsets:
+			return 0
+		return self.offsets[-1]
+
+	def update(self, tailText, base):
+		"""Indexes tailText, the end of the log starting at offset base, i.e. at the last indexed header.
+		Returns False if tailText does not match the part of the log already indexed.
+		"""
+
+		if base > 0 and not RE_MESSAGE_HEADER_AT.match(tailText):
+			return False
+		if self.offsets:
+			for col in (self.offsets, self.times, self.searchTimes):
+				col.pop()
+			if self.times:
+				lastTime = self.times[-1]
+				self._unwrapper.lastTime = lastTime % MS_PER_DAY
+				self._unwrapper.dayOffset = lastTime - lastTime % MS_PER_DAY
+			else:
+				self._unwrapper = TimeUnwrapper()
+		self.addText(tailText, base=base)
+		return True
+
+	def getTime(self, date, time):
+		"""Converts a date and a time of the day (milliseconds since midnight) to a time of the index.
+		If date is None, the first occurrence of this time of the day in the log is considered.
+		"""
+
+		if date is not None and self.firstDate is not None:
+			return (date - self.firstDate).days * MS_PER_DAY + time
+		if self.times and time < self.times[0]:
+			# This time of the day is only reached on the next day.
+			return time + MS_PER_DAY
+		return time
+
+	def findOffset(self, time):
+		"""Returns the offset of the header of the first message logged at or after time (a time of the index),
+		or None if there is none.
+		"""
+
+		i = bisect_left(self.searchTimes, time)
+		if i < len(self.offsets):
+			return self.offsets[i]
+		return None
+
+	def getTimeAt(self, offset):
+		"""Returns the time of the message containing offset, or None if offset is before the first message."""
+		i = bisect_right(self.offsets, offset) - 1
+		if i < 0:
+			return None
+		return self.times[i]
+
+	def formatTime(self, time):
+		"""Formats a time of the index for the user, with its date if it is known."""
+		timeStr = formatTime(time % MS_PER_DAY)
+		if self.firstDate is not None:
+			date = self.firstDate + timedelta(days=time // MS_PER_DAY)
+			return '{date} {time}'.format(date=date.isoformat(), time=timeStr)
+		return timeStr
@@ -0,0 +1,156 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Indexes the frames of the tracebacks of a log (the 'File "...", line N, in func' lines) and resolves them
+to source files, so that all the frames of a traceback can be reviewed at once.
+"""
+
+from __future__ import unicode_literals
+
+import os
+import re
+import linecache
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+import addonHandler
+
+from .logReader import OFFSET_TYPECODE
+from .fileOpener import getNvdaCodePath, FileOpenerError
+
+addonHandler.initTranslation()
+
+# A traceback frame at the beginning of a line; logs use "\n" or "\r\n" as line break, rich edit controls
+# "\r".
+RE_FRAME_SCAN = re.compile(
+	r'(?:^|(?<=[\r\n]))[ \t]*File "(?P<drive>(?:[A-Z]:\\)|)(?P<path>[^:"\r\n]+\.pyw?)[co]?", '
+	r'line (?P<line>\d+)(?:, in (?P<func>[^\r\n]+))?'
+)
+
+
+class TracebackFrame(namedtuple('TracebackFrame', ('offset', 'drive', 'path', 'line', 'func'))):
+	"""A frame of a traceback; offset is the offset of its line in the text where it has been found."""
+
+	__slots__ = ()
+
+	@classmethod
+	def makeFromMatch(cls, match, base=0):
+		return cls(
+			base + match.start(),
+			match.group('drive'),
+			match.group('path'),
+			int(match.group('line')),
+			match.group('func'),
+		)
+
+
+def iterFrames(text, base=0):
+	"""Yields a TracebackFrame for each frame line of text."""
+	for match in RE_FRAME_SCAN.finditer(text):
+		yield TracebackFrame.makeFromMatch(match, base)
+
+
+class LogFrameIndex(object):
+	"""Index of the offsets of the traceback frame lines of a log.
+	It can be updated incrementally when text is appended to the log, as other log indexes.
+	"""
+
+	def __init__(self):
+		self.offsets = array(OFFSET_TYPECODE)
+		self.length = 0
+		self.storyLength = None
+
+	@classmethod
+	def makeFromText(cls, text):
+		index = cls()
+		index.addText(text)
+		return index
+
+	def addText(self, text, base=0):
+		offsets = self.offsets
+		for match in RE_FRAME_SCAN.finditer(text):
+			offsets.append(base + match.start())
+		self.length = base + len(text)
+
+	def getUpdateStart(self):
+		"""The last frame line may have been incompletely written, so the log is indexed again from it."""
+		if not self.offsets:
+			return 0
+		return self.offsets[-1]
+
+	def update(self, tailText, base):
+		if base > 0 and not RE_FRAME_SCAN.match(tailText):
+			return False
+		del self.offsets[bisect_left(self.offsets, base):]
+		self.addText(tailText, base=base)
+		return True
+
+
+class FrameResolver(object):
+	"""Resolves traceback frames to source files.
+	The NVDA source path and the existence of the files are cached, since the same files appear in many frames.
+	The source lines are read through linecache, which is checked the first time a file is resolved, so that
+	a file modified since it has been cached is read again.
+	"""
+
+	def __init__(self):
+		self._nvdaCodePath = None
+		self.nvdaCodePathError = None
+		self._exists = {}
+
+	@property
+	def nvdaCodePath(self):
+		if self._nvdaCodePath is None and self.nvdaCodePathError is None:
+			try:
+				self._nvdaCodePath = getNvdaCodePath() or ''
+			except FileOpenerError as e:
+				self.nvdaCodePathError = e
+				self._nvdaCodePath = ''
+		return self._nvdaCodePath
+
+	def getPath(self, frame):
+		"""Returns the path of the source file of frame, or None if it cannot be found."""
+		if frame.drive:
+			path = frame.drive + frame.path
+		else:
+			if not self.nvdaCodePath:
+				return None
+			path = os.path.join(self.nvdaCodePath, frame.path)
+		try:
+			exists = self._exists[path]
+		except KeyError:
+			exists = self._exists[path] = os.path.isfile(path)
+			# The file may have been edited since its lines have been cached, e.g. by a previous resolver.
+			linecache.checkcache(path)
+		return path if exists else None
+
+	def getSourceLine(self, frame):
+		"""Returns the source line of frame, or None if it is not available."""
+		path = self.getPath(frame)
+		if path is None:
+			return None
+		return linecache.getline(path, frame.line).strip() or None
+
+	def getReport(self, frames):
+		"""Returns the text listing frames with their source line."""
+		lines = []
+		for frame in frames:
+			path = frame.drive + frame.path
+			if frame.func:
+				# Translators: A frame in the list of the frames of a traceback.
+				lines.append(_('{path}, line {line}, in {func}').format(path=path, line=frame.line, func=frame.func))
+			else:
+				# Translators: A frame in the list of the frames of a traceback.
+				lines.append(_('{path}, line {line}').format(path=path, line=frame.line))
+			source = self.getSourceLine(frame)
+			if source is None:
+				# Translators: Displayed instead of the source line of a frame when its file cannot be found.
+				source = _('(source not available)')
+			lines.append('    ' + source)
+		if self.nvdaCodePathError is not None:
+			lines.append('')
+			lines.append(self.nvdaCodePathError.getUserFriendlyMessage())
+		return '\n'.join(lines)
@@ -0,0 +1,217 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Provides an access to big log files through a memory map.
+The file is never loaded in memory as a whole: message headers are located scanning the raw bytes of the map
+and messages are only decoded when they are requested.
+When all the messages are iterated, their headers are parsed once into a LogMessageStore and the messages are
+yielded as views over it.
+"""
+
+from __future__ import unicode_literals
+
+import os
+import re
+import mmap
+from bisect import bisect_left, bisect_right
+
+from .logReader import (
+	LogHeaderIndex,
+	LogMessage,
+	LogMessageHeader,
+	TYPE_STR,
+)
+from .logSidecar import LogSidecar
+from .logStore import LogMessageStore
+
+# Approximate size of the parts of the map searched at once; the GIL is held during each of them.
+SEARCH_CHUNK_SIZE = 1 << 20
+
+
+class MappedLog(object):
+	"""A log file opened through a memory map.
+	Messages are identified by their index in the log, starting from 0.
+	Usage:
+	with MappedLog(path) as mLog:
+		for msg in mLog.iterMessages(level='ERROR'):
+			...
+	"""
+
+	def __init__(self, path, encoding='utf-8', indexed=True, useSidecar=False):
+		"""If indexed is False, message headers are not indexed; only the buffer can then be used, e.g. to be
+		scanned by another tool.
+		If useSidecar is True, the indexes of the log are loaded from its sidecar file if it is up to date, or
+		built and saved in the sidecar otherwise; they are then available in the sidecar attribute. Otherwise, the
+		sidecar attribute is None and only the header index is built, in memory.
+		"""
+
+		self.path = path
+		self.encoding = encoding
+		self._file = open(path, 'rb')
+		try:
+			self._map = self._makeMap()
+		except Exception:
+			self._file.close()
+			raise
+		self.sidecar = None
+		self._store = None
+		if indexed and useSidecar:
+			self.sidecar = LogSidecar.loadOrBuild(path, self._map)
+		if self.sidecar is not None:
+			self.index = self.sidecar.headerIndex
+		else:
+			self.index = LogHeaderIndex()
+			if indexed:
+				self.index.addText(self._map)
+
+	def _makeMap(self):
+		if os.fstat(self._file.fileno()).st_size == 0:
+			# Empty files cannot be mapped.
+			return b''
+		return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+	def refresh(self):
+		"""Maps the file again if it has grown, e.g. for the log of the running NVDA, and indexes only the part
+		of the file that has not been indexed yet.
+		Returns True if new content has been found.
+		"""
+
+		if os.fstat(self._file.fileno()).st_size <= len(self._map):
+			return False
+		if isinstance(self._map, mmap.mmap):
+			self._map.close()
+		self._map = self._makeMap()
+		# The sidecar does not match the file anymore; only the header index is kept up to date.
+		self.sidecar = None
+		start = self.index.getUpdateStart()
+		self.index.truncate(start)
+		self.index.addText(self._map, start=start)
+		if self._store is not None:
+			self._store.update(self._map)
+		return True
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		if isinstance(self._map, mmap.mmap):
+			self._map.close()
+		self._file.close()
+
+	def __len__(self):
+		return len(self.index.offsets)
+
+	@property
+	def buffer(self):
+		"""The bytes of the file, as a memory map."""
+		return self._map
+
+	@property
+	def store(self):
+		"""The LogMessageStore of the messages of the log, built when first accessed.
+		Its message indexes are the same as the ones of the MappedLog.
+		"""
+		if self._store is None:
+			self._store = LogMessageStore(self._map, self.encoding)
+		return self._store
+
+	@property
+	def size(self):
+		return len(self._map)
+
+	def decode(self, data):
+		return data.decode(self.encoding, 'replace')
+
+	def getMessageSpan(self, i):
+		"""Returns the byte offsets (start, end) of the i-th message, header included."""
+		offsets = self.index.offsets
+		start = offsets[i]
+		if i + 1 < len(offsets):
+			end = offsets[i + 1]
+		else:
+			end = len(self._map)
+		return start, end
+
+	def getMessageIndex(self, offset):
+		"""Returns the index of the message containing the byte at offset, or -1 if offset is located before the
+		first message.
+		"""
+		return bisect_right(self.index.offsets, offset) - 1
+
+	def getHeaderLine(self, i):
+		start, end = self.getMessageSpan(i)
+		lineEnd = self._map.find(b'\n', start, end)
+		if lineEnd < 0:
+			lineEnd = end
+		return self.decode(self._map[start:lineEnd]).strip()
+
+	def getHeader(self, i):
+		return LogMessageHeader.makeFromLine(self.getHeaderLine(i))
+
+	def getMessage(self, i):
+		start, end = self.getMessageSpan(i)
+		return LogMessage.makeFromText(self.decode(self._map[start:end]))
+
+	def getMessageText(self, i):
+		"""Returns the raw text of the i-th message, header included."""
+		start, end = self.getMessageSpan(i)
+		return self.decode(self._map[start:end])
+
+	def iterIndexes(self, level=None):
+		"""Yields the indexes of the messages of the given level, or of all messages if level is None."""
+		if level is None:
+			return iter(range(len(self)))
+		return (self.getMessageIndex(offset) for offset in self.index.getOffsets(level))
+
+	def iterHeaders(self, level=None):
+		"""Yields (index, header) tuples; the headers are views over the store."""
+		store = self.store
+		for i in self.iterIndexes(level):
+			yield i, store[i].header
+
+	def iterMessages(self, level=None):
+		"""Yields the messages as views over the store; their content is only decoded when accessed."""
+		store = self.store
+		for i in self.iterIndexes(level):
+			yield store[i]
+
+	def search(self, pattern, flags=0, level=None, chunkSize=SEARCH_CHUNK_SIZE):
+		"""Yields the indexes of the messages matching pattern, each index being yielded only once.
+		pattern is a regular expression, either as a string or compiled. It is searched in the raw bytes of the
+		map, so that no message needs to be decoded.
+		The map is searched in chunks of about chunkSize bytes ending at a message boundary, so that the GIL is
+		released between them when the log is big; a match cannot span several chunks.
+		"""
+
+		if isinstance(pattern, TYPE_STR):
+			pattern = re.compile(pattern.encode(self.encoding), flags)
+		elif isinstance(pattern.pattern, TYPE_STR):
+			pattern = re.compile(pattern.pattern.encode(self.encoding), pattern.flags & ~re.UNICODE)
+		if level is not None:
+			levelOffsets = frozenset(self.index.getOffsets(level))
+		offsets = self.index.offsets
+		lastIndex = -1
+		pos = 0
+		size = len(self._map)
+		while pos < size:
+			i = bisect_left(offsets, pos + chunkSize)
+			chunkEnd = offsets[i] if i < len(offsets) else size
+			match = pattern.search(self._map, pos, chunkEnd)
+			if not match:
+				pos = chunkEnd
+				continue
+			i = self.getMessageIndex(match.start())
+			if i > lastIndex and i >= 0:
+				if level is None or offsets[i] in levelOffsets:
+					yield i
+				lastIndex = i
+			# Resume the search at the next message.
+			if i + 1 < len(self):
+				pos = max(offsets[i + 1], match.end())
+			else:
+				break
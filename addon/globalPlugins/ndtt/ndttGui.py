@@ -82,6 +82,22 @@ class NDTTSettingsPanel(gui.SettingsPanel):
 			max=maxNbBackups,
 			initial=getBaseProfileConfigValue('ndtt', 'logBackupMaxNumber'),
 		)
+
+		# Translators: This is a label for a checkbox in the NDTT Settings panel.
+		text = _("&Archive the messages of the backup logs in a database")
+		self.logArchiveCheckBox = sHelper.addItem(wx.CheckBox(self, label=text))
+		self.logArchiveCheckBox.SetValue(getBaseProfileConfigValue('ndtt', 'logArchive'))
+		self.logArchiveCheckBox.Bind(wx.EVT_CHECKBOX, self.onLogArchiveCheckBoxChanged)
+
+		# Translators: This is a label for a setting in the settings panel
+		text = _("Delete the archived messages older than (days, 0 to keep them all):")
+		self.archiveMaxDaysEdit = sHelper.addLabeledControl(
+			text,
+			nvdaControls.SelectOnFocusSpinCtrl,
+			min=int(self.getParameterBound("logArchiveMaxDays", "min")),
+			max=int(self.getParameterBound("logArchiveMaxDays", "max")),
+			initial=getBaseProfileConfigValue('ndtt', 'logArchiveMaxDays'),
+		)
 		self.updateNbBackupsEdit(backupType)
 
 	@staticmethod
@@ -105,6 +121,15 @@ class NDTTSettingsPanel(gui.SettingsPanel):
 	
 	def updateNbBackupsEdit(self, backupType):
 		self.nbBackupsEdit.Enable(backupType == 'maxNumber')
+		from .logArchive import isAvailable
+		self.logArchiveCheckBox.Enable(backupType == 'maxNumber' and isAvailable())
+		self.updateArchiveMaxDaysEdit()
+
+	def onLogArchiveCheckBoxChanged(self, evt):
+		self.updateArchiveMaxDaysEdit()
+
+	def updateArchiveMaxDaysEdit(self):
+		self.archiveMaxDaysEdit.Enable(self.logArchiveCheckBox.IsEnabled() and self.logArchiveCheckBox.IsChecked())
 
 	def onSave(self):
 		config.conf.profiles[0]['ndtt']['sourceFileOpener'] = self.openInEditorCmdEdit.GetValue()
@@ -112,3 +137,5 @@ class NDTTSettingsPanel(gui.SettingsPanel):
 		config.conf.profiles[0]['ndtt']['logBackup'] = self.BACKUP_TYPES[self.makeBackupsList.Selection][0]
 		nBackups = int(self.nbBackupsEdit.Value)
 		config.conf.profiles[0]['ndtt']['logBackupMaxNumber'] = nBackups
+		config.conf.profiles[0]['ndtt']['logArchive'] = self.logArchiveCheckBox.IsChecked()
+		config.conf.profiles[0]['ndtt']['logArchiveMaxDays'] = int(self.archiveMaxDaysEdit.Value)
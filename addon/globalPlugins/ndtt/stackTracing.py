@@ -1,50 +1,590 @@
 # -*- coding: UTF-8 -*-
 # NVDA Dev & Test Toolbox add-on for NVDA
-# Copyright (C) 2019 Cyrille Bougot
+# Copyright (C) 2019-2023 Cyrille Bougot
 # This file is covered by the GNU General Public License.
 
-# INSTRUCTIONS to modify the function whose stack trrace is logged:
-# To change the trigger function search this file for "ToBeCustomized" strings.
-# E.g. to trigger stack trace log on braille.BrailleHandler.update
-# - import braille instead of speech
-# - replace speech.speak function by braille.BrailleHandler.update function
-# Good candidate functions may be the ones found in NVDA's journal on lines beginning with 'IO - ', e.g. braille.update, braille.BrailleBuffer.update, tones.beep, etc.
+# Logs the stack trace each time some functions are called, to find out which code calls them.
+# The functions are given by their dotted path, e.g. "tones.beep" or "braille.BrailleHandler.update"; good
+# candidates may be the ones found in NVDA's log on lines beginning with 'IO - '.
+# Hooks can be managed in the stack trace hooks dialog or from the Python console, e.g.:
+# globalPlugins.ndtt.stackTracing.hookManager.addHook('tones.beep')
+# In latency mode, hooks measure the duration of the calls instead, to profile hot functions in the field.
 
+from __future__ import unicode_literals
+
+import sys
+import math
+import importlib
+import traceback
+from collections import Counter
+try:
+	from time import perf_counter
+except ImportError:
+	# Python 2
+	from time import clock as perf_counter
+
+import wx
 
 import globalPluginHandler
 import addonHandler
+import gui
 import ui
-import traceback
 from logHandler import log
 from scriptHandler import script
 
-# ToBeCustomized: import here the module containing the function you want the stacktrace to be logged
+addonHandler.initTranslation()
+
 try:
 	# For NVDA 2021.1 and above
-	from speech import speech
+	importlib.import_module('speech.speech')
+	SPEECH_FUNCTION_PATH = 'speech.speech.speak'
 except ImportError:
 	# For NVDA 2020.4 and below
-	import speech
-_originalFunction = speech.speak
-# import braille
-# _originalFunction = braille.BrailleHandler.update
+	SPEECH_FUNCTION_PATH = 'speech.speak'
 
 
 ADDON_SUMMARY = addonHandler.getCodeAddon ().manifest["summary"]
 
+# Marks an attribute that is not defined in the __dict__ of an object.
+_MISSING = object()
 
-def functionWithStackTraceLog(*args, **kwargs):
-	res = _originalFunction(*args, **kwargs)
-	GlobalPlugin.logStackTrace()
-	return res
+# Modes of a hook: log the stack trace at each call, count the distinct stacks in memory or measure the
+# duration of the calls.
+MODE_LOG = 'log'
+MODE_HISTOGRAM = 'histogram'
+MODE_LATENCY = 'latency'
 
 
-class GlobalPlugin(globalPluginHandler.GlobalPlugin):
+class LatencyHistogram(object):
+	"""A histogram of call durations with a fixed number of logarithmic buckets.
+	Each power of two of microseconds is split into SUB_BUCKETS linear buckets, so that the relative error on a
+	percentile is at most 1 / SUB_BUCKETS; durations above about 2 minutes all fall in the last bucket.
+	"""
+
+	SUB_BUCKETS = 4
+	N_BUCKETS = 27 * SUB_BUCKETS
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		self.counts = [0] * self.N_BUCKETS
+		self.nCalls = 0
+		self.totalTime = 0.
+		self.maxTime = 0.
+
+	@classmethod
+	def getBucket(cls, duration):
+		us = duration * 1e6
+		if us < 1:
+			return 0
+		# us = mantissa * 2 ** exponent, with 0.5 <= mantissa < 1
+		mantissa, exponent = math.frexp(us)
+		bucket = (exponent - 1) * cls.SUB_BUCKETS + int((mantissa - 0.5) * 2 * cls.SUB_BUCKETS)
+		return min(bucket, cls.N_BUCKETS - 1)
+
+	@classmethod
+	def getBucketUpperBound(cls, bucket):
+		"""Returns the upper bound of a bucket in seconds."""
+		exponent, sub = divmod(bucket, cls.SUB_BUCKETS)
+		return 2 ** exponent * (1 + (sub + 1) / float(cls.SUB_BUCKETS)) / 1e6
+
+	def add(self, duration):
+		self.counts[self.getBucket(duration)] += 1
+		self.nCalls += 1
+		self.totalTime += duration
+		if duration > self.maxTime:
+			self.maxTime = duration
+
+	def getPercentile(self, percent):
+		"""Returns the upper bound of the bucket containing the given percentile (nearest rank), in seconds."""
+		if not self.nCalls:
+			return None
+		rank = max(1, int(math.ceil(percent / 100. * self.nCalls)))
+		total = 0
+		for bucket, count in enumerate(self.counts):
+			total += count
+			if total >= rank:
+				return min(self.getBucketUpperBound(bucket), self.maxTime)
+		return self.maxTime
+
+	def getReport(self, name):
+		if not self.nCalls:
+			return 'Latency of {name}: no call'.format(name=name)
+		lines = [
+			'Latency of {name}: {n} calls, mean {mean:.3f} ms, p50 {p50:.3f} ms, p90 {p90:.3f} ms, p99 {p99:.3f} ms, '
+			'max {max:.3f} ms, total {total:.3f} s'.format(
+				name=name,
+				n=self.nCalls,
+				mean=self.totalTime * 1e3 / self.nCalls,
+				p50=self.getPercentile(50) * 1e3,
+				p90=self.getPercentile(90) * 1e3,
+				p99=self.getPercentile(99) * 1e3,
+				max=self.maxTime * 1e3,
+				total=self.totalTime,
+			)
+		]
+		for bucket, count in enumerate(self.counts):
+			if count:
+				lines.append('<= {bound:.3f} ms: {count}'.format(
+					bound=self.getBucketUpperBound(bucket) * 1e3,
+					count=count,
+				))
+		return '\n'.join(lines)
+
+
+class StackTraceHookError(Exception):
+	"""Raised when the function designated by a dotted path cannot be hooked."""
+
+
+def resolveTarget(path):
+	"""Returns (owner, name) for the function designated by path, e.g. "braille.BrailleHandler.update", where
+	owner is the module, class or object containing the function and name the name of the function in owner.
+	"""
+
+	parts = path.split('.')
+	if len(parts) < 2 or not all(parts):
+		raise StackTraceHookError('Invalid function path: {path}'.format(path=path))
+	# Import the longest importable module prefix of the path.
+	for i in range(len(parts) - 1, 0, -1):
+		try:
+			owner = importlib.import_module('.'.join(parts[:i]))
+		except ImportError:
+			continue
+		attrs = parts[i:]
+		break
+	else:
+		raise StackTraceHookError('No module found for {path}'.format(path=path))
+	try:
+		for attr in attrs[:-1]:
+			owner = getattr(owner, attr)
+		func = getattr(owner, attrs[-1])
+	except AttributeError:
+		raise StackTraceHookError('Function not found: {path}'.format(path=path))
+	if not callable(func):
+		raise StackTraceHookError('Not a function: {path}'.format(path=path))
+	return owner, attrs[-1]
+
+
+def getOwnAttribute(owner, name):
+	"""Returns the attribute name as stored in the __dict__ of owner, or _MISSING if it is inherited."""
+	try:
+		return vars(owner).get(name, _MISSING)
+	except TypeError:
+		# Object without __dict__
+		return _MISSING
+
+
+class StackTraceHook(object):
+	"""Replaces a function by a wrapper calling onCall after each call of the original function.
+	When the hook is disabled, the wrapper only calls the original function.
+	In MODE_LOG, the stack trace is logged at each call. In MODE_HISTOGRAM, the stacks are only counted, keyed by
+	the code object and the current line of their frames, and formatted when the histogram is requested; only one
+	call out of sampleEvery is then taken into account. To bound the memory used, only the MAX_STACK_DEPTH
+	innermost frames are kept and calls from new stacks are only counted globally once MAX_DISTINCT_STACKS have
+	been recorded. In MODE_LATENCY, the duration of each call is added to a
+	LatencyHistogram.
+	"""
+
+	MAX_STACK_DEPTH = 50
+	MAX_DISTINCT_STACKS = 1000
+	# Last item of the key of a stack deeper than MAX_STACK_DEPTH.
+	TRUNCATED = None
+
+	def __init__(self, path, mode=MODE_LOG, sampleEvery=1):
+		self.path = path
+		self.owner, self.name = resolveTarget(path)
+		self.enabled = False
+		self.installed = False
+		self.mode = mode
+		self.sampleEvery = sampleEvery
+		self.resetStacks()
+		self.resetLatency()
+		self._ownAttribute = getOwnAttribute(self.owner, self.name)
+		func = getattr(self.owner, self.name)
+		kind = None
+		if isinstance(self.owner, type):
+			# Unwrap static and class methods, that may be inherited.
+			for cls in self.owner.__mro__:
+				attr = getOwnAttribute(cls, self.name)
+				if attr is not _MISSING:
+					break
+			if isinstance(attr, (staticmethod, classmethod)):
+				kind = type(attr)
+				func = attr.__func__
+			else:
+				# Unbound method in Python 2
+				func = getattr(func, '__func__', func)
+		self.wrapper = self.makeWrapper(func)
+		if kind is not None:
+			self.wrapper = kind(self.wrapper)
+
+	def makeWrapper(self, func):
+		hook = self
+
+		def wrapper(*args, **kwargs):
+			if hook.enabled and hook.mode == MODE_LATENCY:
+				start = perf_counter()
+				try:
+					return func(*args, **kwargs)
+				finally:
+					hook.latency.add(perf_counter() - start)
+			res = func(*args, **kwargs)
+			if hook.enabled:
+				hook.onCall()
+			return res
+		wrapper.__wrapped__ = func
+		wrapper.__doc__ = getattr(func, '__doc__', None)
+		return wrapper
+
+	def onCall(self):
+		if self.mode == MODE_HISTOGRAM:
+			self.nCalls += 1
+			if self.nCalls % self.sampleEvery:
+				return
+			# Skip the frames of this method and of the wrapper.
+			frame = sys._getframe(2)
+			key = []
+			for i in range(self.MAX_STACK_DEPTH):
+				if frame is None:
+					break
+				key.append((frame.f_code, frame.f_lineno))
+				frame = frame.f_back
+			else:
+				if frame is not None:
+					key.append(self.TRUNCATED)
+			key = tuple(key)
+			if key in self.stacks or len(self.stacks) < self.MAX_DISTINCT_STACKS:
+				self.stacks[key] += 1
+			else:
+				self.nUnrecordedCalls += 1
+			return
+		# Remove this method and the wrapper from the stack.
+		stack = [line.strip() for line in traceback.format_stack()[:-2]]
+		msgStackTrace = (
+			'=== Stack trace log: {path} ===\n'.format(path=self.path)
+			+ '\n'.join(stack) + '\n'
+			+ '=== End stack trace log ==='
+		)
+		log.debug(msgStackTrace)
+
+	def resetStacks(self):
+		self.nCalls = 0
+		# Number of sampled calls of each distinct stack, keyed by the (code object, line number) of its frames
+		# from the innermost one.
+		self.stacks = Counter()
+		# Number of sampled calls whose stack was not recorded because MAX_DISTINCT_STACKS was reached.
+		self.nUnrecordedCalls = 0
+
+	def resetLatency(self):
+		self.latency = LatencyHistogram()
+
+	def resetHistogram(self):
+		"""Resets the histogram of the current mode: the latency histogram in MODE_LATENCY, the stack histogram
+		otherwise.
+		"""
+		if self.mode == MODE_LATENCY:
+			self.resetLatency()
+		else:
+			self.resetStacks()
+
+	def getHistogramReport(self, maxStacks=50):
+		"""Returns the latency histogram in MODE_LATENCY; otherwise the distinct stacks counted in MODE_HISTOGRAM
+		with their number of calls, most frequent first.
+		"""
+		if self.mode == MODE_LATENCY:
+			return self.latency.getReport(self.path)
+		nSampled = sum(self.stacks.values()) + self.nUnrecordedCalls
+		lines = [
+			'Stack histogram of {path}: {nCalls} calls, {nSampled} sampled (1 out of {n}), {nStacks} distinct stacks'
+			.format(
+				path=self.path,
+				nCalls=self.nCalls,
+				nSampled=nSampled,
+				n=self.sampleEvery,
+				nStacks=len(self.stacks),
+			)
+		]
+		for key, count in self.stacks.most_common(maxStacks):
+			lines.append('')
+			lines.append('{count} calls ({percent:.1f}%):'.format(count=count, percent=100. * count / nSampled))
+			for frame in reversed(key):
+				if frame is self.TRUNCATED:
+					lines.append('(outer frames not recorded)')
+					continue
+				code, line = frame
+				lines.append('File "{file}", line {line}, in {func}'.format(
+					file=code.co_filename,
+					line=line,
+					func=code.co_name,
+				))
+		if len(self.stacks) > maxStacks:
+			lines.append('')
+			lines.append('{n} other stacks not shown'.format(n=len(self.stacks) - maxStacks))
+		if self.nUnrecordedCalls:
+			lines.append('')
+			lines.append((
+				'{n} calls from stacks not recorded, the maximum of {max} distinct stacks being reached'
+			).format(
+				n=self.nUnrecordedCalls,
+				max=self.MAX_DISTINCT_STACKS,
+			))
+		return '\n'.join(lines)
+
+	def install(self):
+		setattr(self.owner, self.name, self.wrapper)
+		self.installed = True
+
+	def uninstall(self):
+		"""Restores the original function.
+		If the function has been replaced again since the hook was installed, the wrapper is left in place,
+		disabled, so that the other replacement is not lost.
+		"""
+
+		self.enabled = False
+		if not self.installed:
+			return
+		self.installed = False
+		if getOwnAttribute(self.owner, self.name) is not self.wrapper:
+			log.debugWarning('{path} has been replaced since it has been hooked; hook left disabled'.format(
+				path=self.path
+			))
+			return
+		if self._ownAttribute is _MISSING:
+			delattr(self.owner, self.name)
+		else:
+			setattr(self.owner, self.name, self._ownAttribute)
+
+
+class StackTraceHookManager(object):
+	"""Manages the hooks installed on any number of functions, each of which can be enabled or disabled."""
+
+	hookClass = StackTraceHook
 
 	def __init__(self):
-		super(GlobalPlugin, self).__init__()
-		self.logEnabled = False
-		
+		self.hooks = []
+
+	def getHook(self, path):
+		for hook in self.hooks:
+			if hook.path == path:
+				return hook
+		return None
+
+	def addHook(self, path, enabled=True, mode=None, sampleEvery=None):
+		"""Hooks the function designated by path; raises StackTraceHookError if it cannot be hooked.
+		If the function is already hooked, the mode and sampling of its hook are only changed when specified.
+		"""
+		hook = self.getHook(path)
+		if hook is None:
+			hook = self.hookClass(path)
+			hook.install()
+			self.hooks.append(hook)
+		if mode is not None:
+			hook.mode = mode
+		if sampleEvery is not None:
+			hook.sampleEvery = max(1, sampleEvery)
+		hook.enabled = enabled
+		return hook
+
+	def getLatencyReport(self):
+		"""Returns the latency of all the functions measured in MODE_LATENCY, without their histograms."""
+		reports = [
+			hook.latency.getReport(hook.path).split('\n', 1)[0]
+			for hook in self.hooks
+			if hook.mode == MODE_LATENCY or hook.latency.nCalls
+		]
+		if not reports:
+			# Translators: Reported when no function latency has been measured with the stack trace hooks.
+			return _(
+				"No function latency measured; "
+				"set the mode of a hook to latency in the stack trace hooks dialog."
+			)
+		return '\n'.join(reports)
+
+	def setHookEnabled(self, path, enabled):
+		self.getHook(path).enabled = enabled
+
+	def removeHook(self, path):
+		hook = self.getHook(path)
+		if hook is not None:
+			hook.uninstall()
+			self.hooks.remove(hook)
+
+	def removeAll(self):
+		# Remove the hooks in reverse order, in case the same function has been hooked twice under different names.
+		for hook in reversed(self.hooks):
+			hook.uninstall()
+		self.hooks = []
+
+
+hookManager = StackTraceHookManager()
+
+
+class StackTraceHooksDialog(wx.Dialog):
+	"""A dialog to add, remove, enable and disable the stack trace hooks and to choose their mode."""
+
+	_instance = None
+
+	MODES = [
+		# Translators: A mode of a stack trace hook.
+		(MODE_LOG, _("Log the stack trace at each call")),
+		# Translators: A mode of a stack trace hook.
+		(MODE_HISTOGRAM, _("Count the distinct stacks (histogram)")),
+		# Translators: A mode of a stack trace hook.
+		(MODE_LATENCY, _("Measure the duration of the calls (latency histogram)")),
+	]
+	MAX_SAMPLE_EVERY = 1000000
+
+	def __init__(self, parent, manager):
+		# Translators: The title of the stack trace hooks dialog.
+		super(StackTraceHooksDialog, self).__init__(parent, title=_("Stack trace hooks"))
+		self.manager = manager
+		mainSizer = wx.BoxSizer(wx.VERTICAL)
+		sHelper = gui.guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+		self.hooksList = sHelper.addLabeledControl(
+			# Translators: The label of the list of the hooked functions; the hooks of unchecked functions are
+			# disabled.
+			_("&Hooked functions (checked ones are enabled):"),
+			wx.CheckListBox,
+		)
+		self.hooksList.Bind(wx.EVT_CHECKLISTBOX, self.onHookChecked)
+		self.hooksList.Bind(wx.EVT_LISTBOX, lambda evt: self.updateHookControls())
+		self.modeChoice = sHelper.addLabeledControl(
+			# Translators: The label of the choice of the mode of a hook in the stack trace hooks dialog.
+			_("&Mode:"),
+			wx.Choice,
+			choices=[label for mode, label in self.MODES],
+		)
+		self.modeChoice.Bind(wx.EVT_CHOICE, self.onModeChanged)
+		self.sampleEveryEdit = sHelper.addLabeledControl(
+			# Translators: The label of the sampling rate of a hook in histogram mode in the stack trace hooks dialog.
+			_("In histogram mode, &sample one call out of:"),
+			gui.nvdaControls.SelectOnFocusSpinCtrl,
+			min=1,
+			max=self.MAX_SAMPLE_EVERY,
+			initial=1,
+		)
+		self.sampleEveryEdit.Bind(wx.EVT_SPINCTRL, self.onSampleEveryChanged)
+		histogramButtons = gui.guiHelper.ButtonHelper(wx.HORIZONTAL)
+		# Translators: The label of a button of the stack trace hooks dialog.
+		self.showHistogramButton = histogramButtons.addButton(self, label=_("Show &histogram"))
+		self.showHistogramButton.Bind(wx.EVT_BUTTON, self.onShowHistogramClick)
+		# Translators: The label of a button of the stack trace hooks dialog.
+		self.resetHistogramButton = histogramButtons.addButton(self, label=_("Rese&t histogram"))
+		self.resetHistogramButton.Bind(wx.EVT_BUTTON, self.onResetHistogramClick)
+		sHelper.addItem(histogramButtons)
+		# Translators: The label of the edit field of the stack trace hooks dialog.
+		self.pathEdit = sHelper.addLabeledControl(_("&Function to hook (e.g. tones.beep):"), wx.TextCtrl)
+		buttons = gui.guiHelper.ButtonHelper(wx.HORIZONTAL)
+		# Translators: The label of a button of the stack trace hooks dialog.
+		addButton = buttons.addButton(self, label=_("&Add"))
+		addButton.Bind(wx.EVT_BUTTON, self.onAddClick)
+		# Translators: The label of a button of the stack trace hooks dialog.
+		self.removeButton = buttons.addButton(self, label=_("&Remove"))
+		self.removeButton.Bind(wx.EVT_BUTTON, self.onRemoveClick)
+		# Translators: The label of a button of the stack trace hooks dialog.
+		closeButton = buttons.addButton(self, id=wx.ID_CLOSE, label=_("&Close"))
+		closeButton.Bind(wx.EVT_BUTTON, lambda evt: self.Close())
+		sHelper.addItem(buttons)
+		mainSizer.Add(sHelper.sizer, border=gui.guiHelper.BORDER_FOR_DIALOGS, flag=wx.ALL | wx.EXPAND)
+		self.Bind(wx.EVT_CLOSE, self.onClose)
+		self.EscapeId = wx.ID_CLOSE
+		mainSizer.Fit(self)
+		self.SetSizer(mainSizer)
+		self.refreshList()
+		self.pathEdit.SetFocus()
+
+	def refreshList(self, selection=None):
+		self.hooksList.Set([hook.path for hook in self.manager.hooks])
+		for i, hook in enumerate(self.manager.hooks):
+			self.hooksList.Check(i, hook.enabled)
+		if self.manager.hooks:
+			if selection is None:
+				selection = 0
+			self.hooksList.SetSelection(min(selection, len(self.manager.hooks) - 1))
+		self.removeButton.Enable(bool(self.manager.hooks))
+		self.updateHookControls()
+
+	def getSelectedHook(self):
+		index = self.hooksList.GetSelection()
+		if index < 0:
+			return None
+		return self.manager.hooks[index]
+
+	def updateHookControls(self):
+		hook = self.getSelectedHook()
+		for control in (self.modeChoice, self.sampleEveryEdit, self.showHistogramButton, self.resetHistogramButton):
+			control.Enable(hook is not None)
+		if hook is None:
+			return
+		self.modeChoice.SetSelection([mode for mode, label in self.MODES].index(hook.mode))
+		self.sampleEveryEdit.SetValue(hook.sampleEvery)
+
+	def onHookChecked(self, evt):
+		index = evt.GetInt()
+		self.manager.hooks[index].enabled = self.hooksList.IsChecked(index)
+
+	def onModeChanged(self, evt):
+		hook = self.getSelectedHook()
+		if hook is not None:
+			hook.mode = self.MODES[self.modeChoice.GetSelection()][0]
+
+	def onSampleEveryChanged(self, evt):
+		hook = self.getSelectedHook()
+		if hook is not None:
+			hook.sampleEvery = max(1, self.sampleEveryEdit.GetValue())
+
+	def onShowHistogramClick(self, evt):
+		hook = self.getSelectedHook()
+		if hook is not None:
+			if hook.mode == MODE_LATENCY:
+				# Translators: The title of the window displaying the latency histogram of a hooked function.
+				title = _("Latency histogram")
+			else:
+				# Translators: The title of the window displaying the stack histogram of a hooked function.
+				title = _("Stack histogram")
+			ui.browseableMessage(hook.getHistogramReport(), title)
+
+	def onResetHistogramClick(self, evt):
+		hook = self.getSelectedHook()
+		if hook is not None:
+			hook.resetHistogram()
+
+	def onAddClick(self, evt):
+		path = self.pathEdit.GetValue().strip()
+		if not path:
+			return
+		try:
+			self.manager.addHook(path)
+		except StackTraceHookError as e:
+			gui.messageBox(
+				# Translators: An error message in the stack trace hooks dialog.
+				_("Unable to hook {path}: {error}").format(path=path, error=e),
+				# Translators: The title of an error message in the stack trace hooks dialog.
+				_("Error"),
+				wx.OK | wx.ICON_ERROR,
+				self,
+			)
+			return
+		self.pathEdit.Clear()
+		self.refreshList(selection=len(self.manager.hooks) - 1)
+		self.hooksList.SetFocus()
+
+	def onRemoveClick(self, evt):
+		index = self.hooksList.GetSelection()
+		if index < 0:
+			return
+		self.manager.removeHook(self.manager.hooks[index].path)
+		self.refreshList(selection=index)
+		self.hooksList.SetFocus()
+
+	def onClose(self, evt):
+		StackTraceHooksDialog._instance = None
+		self.Destroy()
+
+
+class GlobalPlugin(globalPluginHandler.GlobalPlugin):
+
 	@script(
 		# Translators: Input help mode message for a toggle command.
 		description = _("Toggles the stack trace log when the speech function is called."),
@@ -52,9 +592,10 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		category = ADDON_SUMMARY,
 )
 	def script_toggleStackTraceLog(self, gesture):
-		self.logEnabled = not self.logEnabled
-		self.enableStackTraceLog(self.logEnabled)
-		if self.logEnabled:
+		hook = hookManager.getHook(SPEECH_FUNCTION_PATH)
+		logEnabled = hook is None or not hook.enabled
+		hookManager.addHook(SPEECH_FUNCTION_PATH, enabled=logEnabled)
+		if logEnabled:
 			# Translators: Reported when toggling the stack trace log feature.
 			msg = _('Stacktrace log enabled')
 		else:
@@ -62,24 +603,35 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			msg = _('Stacktrace log disabled')
 		ui.message(msg)
 
-	def enableStackTraceLog(self, enable=True):
-		if enable:
-			newFun = functionWithStackTraceLog
-		else:
-			newFun = _originalFunction
-		# ToBeCustomized: the function from which you want the stack trace
-		speech.speak = newFun
-		#braille.BrailleHandler.update = newFun
-
-	@staticmethod
-	def logStackTrace():
-	    stack = [line.strip() for line in traceback.format_stack()]
-	    msgStackTrace = (
-	    	'=== Stack trace log ===\n' +
-	    	'\n'.join(stack[:-1]) + '\n'
-	    	'=== End stack trace log ===')
-	    log.debug(msgStackTrace)
+	@script(
+		# Translators: Input help mode message for the command opening the stack trace hooks dialog.
+		description = _("Opens a dialog to choose the functions whose calls are traced or measured."),
+		category = ADDON_SUMMARY,
+	)
+	def script_openStackTraceHooksDialog(self, gesture):
+		wx.CallAfter(self.popupStackTraceHooksDialog)
+
+	def popupStackTraceHooksDialog(self):
+		if StackTraceHooksDialog._instance is not None:
+			StackTraceHooksDialog._instance.Raise()
+			return
+		gui.mainFrame.prePopup()
+		dlg = StackTraceHooksDialog(gui.mainFrame, hookManager)
+		StackTraceHooksDialog._instance = dlg
+		dlg.Show()
+		gui.mainFrame.postPopup()
+
+	@script(
+		# Translators: Input help mode message for the command reporting the latency of hooked functions.
+		description = _("Displays the call count and latency percentiles of the functions hooked in latency mode."),
+		category = ADDON_SUMMARY,
+	)
+	def script_reportFunctionLatency(self, gesture):
+		# Translators: The title of the window displaying the latency of the hooked functions.
+		ui.browseableMessage(hookManager.getLatencyReport(), _("Function latency"))
 
 	def terminate(self):
-		self.enableStackTraceLog(False)
+		hookManager.removeAll()
+		if StackTraceHooksDialog._instance is not None:
+			StackTraceHooksDialog._instance.Close()
 		super(GlobalPlugin, self).terminate()
@@ -9,6 +9,13 @@ import config
 from logHandler import log
 
 
+def toBool(value):
+	"""Converts a boolean config value, that may still be stored as a string in the profile, to a bool."""
+	if isinstance(value, bool):
+		return value
+	return str(value).strip().lower() in ('true', 'yes', 'on', '1')
+
+
 def getBaseProfileConfigValue(*args):
 	cfg = config.conf.profiles[0]
 	for key in args:
@@ -23,6 +30,7 @@ def getBaseProfileConfigValue(*args):
 			'string': str,
 			'option': str,
 			'float': float,
+			'boolean': toBool,
 		}.get(validationFuncName)
 		if not typeMaker:
 			raise NotImplementedError(validationFuncName)
@@ -0,0 +1,151 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Benchmarks the log parsing and classifying code of the log reader on a synthetic or real log.
+NVDA modules are replaced by stand-ins, so that this script runs outside NVDA, e.g. headless on Linux.
+For each benchmark, the best time out of several runs, the number of lines processed per second and the peak
+memory allocated (measured in a separate run with tracemalloc) are reported.
+Usage:
+python benchmarkLogReader.py --messages 200000 --mix io=50,debug=30,error=20
+python benchmarkLogReader.py --input path\\to\\nvda.log
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import nvdaStandIns
+from logGenerator import addGeneratorArguments, makeLogFromArgs
+
+nvdaStandIns.install()
+
+from ndtt import logReader  # noqa: E402
+from ndtt import logStore  # noqa: E402
+
+
+def benchHeaderRegexp(text, lines):
+	"""Matches RE_MESSAGE_HEADER on each line, as the line-based quick navigation does."""
+	match = logReader.RE_MESSAGE_HEADER.match
+	return sum(1 for line in lines if match(line))
+
+
+def benchHeaderScan(text, lines):
+	"""Finds all the headers of the log with a single scan of the text."""
+	return sum(1 for header in logReader.iterHeaderMatches(text))
+
+
+def benchHeaderIndex(text, lines):
+	return len(logReader.LogHeaderIndex.makeFromText(text).offsets)
+
+
+def benchParseMessages(text, lines):
+	"""Builds a LogMessage for each message of the log."""
+	return sum(1 for msg in logReader.iterLogTextMessages(text))
+
+
+def benchHoldMessages(text, lines):
+	"""Keeps a LogMessage object for each message of the log in memory."""
+	return len(list(logReader.iterLogTextMessages(text)))
+
+
+def benchMessageStore(text, lines):
+	"""Parses the headers of the log into a LogMessageStore, kept in memory, and reads the level and content of
+	each message through its views.
+	"""
+	store = logStore.LogMessageStore(text)
+	return sum(1 for msg in store if msg.header.level == 'IO' and msg.msg)
+
+
+def benchClassifyIo(text, lines, messages):
+	classify = logReader.classifyIoMessage
+	return sum(1 for msg in messages if msg.header.level == 'IO' and classify(msg.msg).kind)
+
+
+def benchSpeakMessage(text, lines, messages):
+	"""Computes the sequence spoken for each message, including the parsing of speech sequences."""
+	for msg in messages:
+		msg.getSpeakMessage('Message')
+	return len(messages)
+
+
+def benchStackTraceLine(text, lines):
+	match = logReader.RE_STACK_TRACE_LINE.match
+	return sum(1 for line in lines if match(line.strip()))
+
+
+# Benchmarks that receive the parsed messages as an additional argument.
+MESSAGE_BENCHMARKS = (benchClassifyIo, benchSpeakMessage)
+
+BENCHMARKS = (
+	benchHeaderRegexp,
+	benchHeaderScan,
+	benchHeaderIndex,
+	benchParseMessages,
+	benchHoldMessages,
+	benchMessageStore,
+	benchClassifyIo,
+	benchSpeakMessage,
+	benchStackTraceLine,
+)
+
+
+def runBenchmark(func, args, repeat):
+	"""Returns (best time in seconds, peak memory in bytes, result of func)."""
+	bestTime = None
+	for i in range(repeat):
+		gc.collect()
+		start = time.perf_counter()
+		result = func(*args)
+		duration = time.perf_counter() - start
+		if bestTime is None or duration < bestTime:
+			bestTime = duration
+	gc.collect()
+	tracemalloc.start()
+	func(*args)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return bestTime, peak, result
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmarks the log parsing code of the log reader.')
+	addGeneratorArguments(parser)
+	parser.add_argument('--input', help='benchmark an existing log instead of a synthetic one')
+	parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark (default: %(default)s)')
+	parser.add_argument('--only', help='comma separated names of the benchmarks to run, e.g. benchHeaderScan')
+	args = parser.parse_args()
+
+	if args.input:
+		with open(args.input, 'r', encoding='utf-8', errors='replace', newline='') as f:
+			text = f.read()
+	else:
+		text = makeLogFromArgs(args)
+	lines = text.splitlines()
+	messages = list(logReader.iterLogTextMessages(text))
+	print('Log: {size:.1f} MB, {nLines} lines, {nMessages} messages'.format(
+		size=len(text.encode('utf-8')) / 1e6,
+		nLines=len(lines),
+		nMessages=len(messages),
+	))
+	benchmarks = BENCHMARKS
+	if args.only:
+		names = set(args.only.split(','))
+		benchmarks = [func for func in BENCHMARKS if func.__name__ in names]
+	print('{:<22} {:>10} {:>14} {:>12} {:>10}'.format('Benchmark', 'Time (s)', 'Lines/s', 'Peak (MB)', 'Result'))
+	for func in benchmarks:
+		funcArgs = (text, lines, messages) if func in MESSAGE_BENCHMARKS else (text, lines)
+		duration, peak, result = runBenchmark(func, funcArgs, args.repeat)
+		print('{:<22} {:>10.3f} {:>14,.0f} {:>12.1f} {:>10}'.format(
+			func.__name__,
+			duration,
+			len(lines) / duration if duration else float('inf'),
+			peak / 1e6,
+			result,
+		))
+
+
+if __name__ == '__main__':
+	main()
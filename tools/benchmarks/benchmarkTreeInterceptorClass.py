@@ -0,0 +1,157 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Benchmarks the creation of the tree interceptor class of a document by the log reader, with the mixed tree
+interceptor classes reused (current code) and created again for each document (previous code).
+Only the creation of the class and of an uninitialized instance is measured, not the load time of a document:
+the rendering of the document and the initialization of its tree interceptor are not part of the benchmark.
+NVDA's tree interceptor classes are replaced by stand-ins whose metaclass walks the MRO when a class is
+created, as NVDA's ScriptableType does to collect the gestures of the scripts.
+Usage:
+python benchmarkTreeInterceptorClass.py --documents 10000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import nvdaStandIns
+
+nvdaStandIns.install()
+
+from ndtt import logReader  # noqa: E402
+
+
+class ScriptableType(type):
+	"""Collects the scripts of the class and of its bases when the class is created."""
+
+	# Number of classes created.
+	nCreated = 0
+
+	def __init__(cls, name, bases, dct):
+		super(ScriptableType, cls).__init__(name, bases, dct)
+		ScriptableType.nCreated += 1
+		gestures = {}
+		for base in reversed(cls.__mro__):
+			for attr in vars(base):
+				if attr.startswith('script_'):
+					gestures['kb:' + attr[len('script_'):]] = attr
+		cls._gestureMap = gestures
+
+
+def makeScripts(prefix, n):
+	return {'script_{}{}'.format(prefix, i): lambda self, gesture: None for i in range(n)}
+
+
+# Stand-ins of NVDA's browse mode tree interceptor hierarchy.
+TreeInterceptorBase = ScriptableType('TreeInterceptorBase', (object,), makeScripts('base', 20))
+BrowseModeDocument = ScriptableType('BrowseModeDocument', (TreeInterceptorBase,), makeScripts('browse', 80))
+VirtualBuffer = ScriptableType('VirtualBuffer', (BrowseModeDocument,), makeScripts('vbuf', 20))
+Gecko_ia2 = ScriptableType('Gecko_ia2', (VirtualBuffer,), makeScripts('gecko', 10))
+# The log reader's tree interceptor mixin, built on the stand-in hierarchy.
+DocumentWithLogTreeInterceptor = ScriptableType(
+	'DocumentWithLogTreeInterceptor',
+	(logReader.DocumentWithLogTreeInterceptor, TreeInterceptorBase),
+	{},
+)
+
+
+class BaseDocument(logReader.Window):
+	@property
+	def treeInterceptorClass(self):
+		return Gecko_ia2
+
+
+class Document(logReader.DocumentWithLog, BaseDocument):
+	pass
+
+
+def getUnmemoizedTreeInterceptorClass(doc):
+	"""The previous implementation of DocumentWithLog._get_treeInterceptorClass."""
+	cls = super(logReader.DocumentWithLog, doc).treeInterceptorClass
+	bases = (DocumentWithLogTreeInterceptor, cls)
+	name = str('Mixed_[{classList}]').format(classList=str("+").join([x.__name__ for x in bases]))
+	return type(name, bases, {"__module__": logReader.__name__})
+
+
+def getMemoizedTreeInterceptorClass(doc):
+	return doc._get_treeInterceptorClass()
+
+
+def createTreeInterceptors(getClass, nDocuments):
+	"""Gets the tree interceptor class of nDocuments documents, creates an uninitialized instance of it and
+	looks up a script.
+	Returns the number of tree interceptor classes created.
+	"""
+
+	nCreated = ScriptableType.nCreated
+	doc = Document()
+	for i in range(nDocuments):
+		cls = getClass(doc)
+		ti = cls.__new__(cls)
+		ti._gestureMap.get('kb:browse1')
+	return ScriptableType.nCreated - nCreated
+
+
+def runBenchmark(func, args, repeat):
+	"""Returns (best time in seconds, peak memory in bytes, result of func)."""
+	bestTime = None
+	for i in range(repeat):
+		gc.collect()
+		start = time.perf_counter()
+		result = func(*args)
+		duration = time.perf_counter() - start
+		if bestTime is None or duration < bestTime:
+			bestTime = duration
+	gc.collect()
+	tracemalloc.start()
+	func(*args)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return bestTime, peak, result
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Benchmarks the creation of the tree interceptor classes of the log reader '
+		'(not the load time of documents).',
+	)
+	parser.add_argument(
+		'--documents',
+		type=int,
+		default=10000,
+		help='number of documents (default: %(default)s)',
+	)
+	parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark (default: %(default)s)')
+	args = parser.parse_args()
+
+	# Make sure the memoized class is built on the stand-in hierarchy.
+	logReader.DocumentWithLogTreeInterceptor = DocumentWithLogTreeInterceptor
+	logReader.DocumentWithLog._mixedTreeInterceptorClasses.clear()
+	print('Tree interceptor class creation only; the load time of the documents is not measured.')
+	print('{:<12} {:>10} {:>16} {:>12} {:>10}'.format(
+		'Classes',
+		'Time (s)',
+		'Lookups/s',
+		'Peak (MB)',
+		'Created',
+	))
+	for label, getClass in (
+		('created', getUnmemoizedTreeInterceptorClass),
+		('reused', getMemoizedTreeInterceptorClass),
+	):
+		duration, peak, nClasses = runBenchmark(createTreeInterceptors, (getClass, args.documents), args.repeat)
+		print('{:<12} {:>10.3f} {:>16,.0f} {:>12.1f} {:>10}'.format(
+			label,
+			duration,
+			args.documents / duration if duration else float('inf'),
+			peak / 1e6,
+			nClasses,
+		))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,264 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Generates synthetic NVDA logs with a configurable size and mix of messages: IO (speech, input, beeps,
+braille), tracebacks, floods of debug messages and messages from multiple threads.
+Usage:
+python logGenerator.py --messages 100000 --output nvda_synthetic.log
+"""
+
+import argparse
+import random
+
+# Default weights of the kinds of generated messages, i.e. their share of the messages of the log; the
+# messages of a flood count for debugFlood.
+DEFAULT_MIX = {
+	'io': 30,
+	'debug': 35,
+	'debugFlood': 5,
+	'info': 10,
+	'debugWarning': 8,
+	'warning': 5,
+	'error': 5,
+	'errorNoTraceback': 2,
+}
+
+THREAD_NAMES = (
+	'winInputHook',
+	'NVDA core pump',
+	'speech._manager',
+	'_UIAHandler.UIAHandler.MTAThreadFunc',
+	'brailleDisplayDetector',
+)
+
+CODE_PATHS = (
+	'NVDAObjects.IAccessible.IAccessible._get_name',
+	'NVDAObjects.UIA.UIA._get_role',
+	'eventHandler.executeEvent',
+	'IAccessibleHandler.internalWinEventHandler.winEventCallback',
+	'_UIAHandler.UIAHandler.IUIAutomationFocusChangedEventHandler_HandleFocusChangedEvent',
+	'virtualBuffers.VirtualBuffer.loadBuffer',
+	'appModuleHandler.update',
+	'config.ConfigManager._loadConfig',
+	'external:globalPlugins.ndtt.logReader.LogContainer.getLogIndex',
+)
+
+SPEECH_TEXTS = (
+	'Desktop', 'list', 'Recycle Bin', 'selected', '1 of 12', 'button', 'OK', 'Cancel', 'edit', 'blank',
+	"It's a test", 'Fichier', 'menu bar', 'document',
+)
+
+GESTURES = (
+	'kb(desktop):downArrow',
+	'kb(desktop):upArrow',
+	'kb(desktop):tab',
+	'kb(desktop):shift+tab',
+	'kb(laptop):NVDA+t',
+	'kb(desktop):control+home',
+	'br(freedomScientific):leftWizWheelUp',
+)
+
+TRACEBACK_FRAMES = (
+	('eventHandler.py', 'executeEvent'),
+	('eventHandler.py', '_EventExecuter.__init__'),
+	('NVDAObjects\\__init__.py', 'event_gainFocus'),
+	('speech\\speech.py', 'speakObject'),
+	('NVDAObjects\\IAccessible\\__init__.py', '_get_name'),
+	('comtypes\\__init__.py', '__call__'),
+	('C:\\Users\\user\\AppData\\Roaming\\nvda\\addons\\someAddon\\globalPlugins\\plugin.py', 'event_foreground'),
+)
+
+EXCEPTIONS = (
+	(
+		'_ctypes.COMError: (-2147220991, \'An event was unable to invoke any of the subscribers\', '
+		'(None, None, None, 0, None))'
+	),
+	'AttributeError: \'NoneType\' object has no attribute \'windowHandle\'',
+	'RuntimeError: object is dead',
+	'KeyError: 42',
+)
+
+
+class LogGenerator(object):
+	"""Generates the lines of a synthetic log."""
+
+	def __init__(self, mix=None, nThreads=3, floodSize=50, seed=0):
+		self.mix = dict(DEFAULT_MIX if mix is None else mix)
+		self.kinds = sorted(self.mix)
+		# A flood yields floodSize messages at once, so its weight is divided by floodSize when drawing the kind of
+		# the next message; this way, the weights apply to the generated messages rather than to the draws.
+		self.weights = [
+			self.mix[kind] / max(1, floodSize) if kind == 'debugFlood' else self.mix[kind]
+			for kind in self.kinds
+		]
+		self.threads = [('MainThread', 1234)] + [
+			(name, 5000 + i) for i, name in enumerate(THREAD_NAMES[:max(0, nThreads - 1)])
+		]
+		self.floodSize = floodSize
+		self.random = random.Random(seed)
+		# Current time in milliseconds; starts shortly before midnight to exercise midnight rollover.
+		self.time = 23 * 3600 * 1000 + 59 * 60 * 1000
+
+	def formatTime(self):
+		seconds, ms = divmod(self.time % (24 * 3600 * 1000), 1000)
+		minutes, seconds = divmod(seconds, 60)
+		hours, minutes = divmod(minutes, 60)
+		return '{:02d}:{:02d}:{:02d}.{:03d}'.format(hours, minutes, seconds, ms)
+
+	def header(self, level, codePath, thread=None):
+		self.time += self.random.randint(0, 30)
+		if thread is None:
+			thread = self.random.choice(self.threads)
+		return '{level} - {codePath} ({time}) - {name} ({id}):'.format(
+			level=level,
+			codePath=codePath,
+			time=self.formatTime(),
+			name=thread[0],
+			id=thread[1],
+		)
+
+	def iterMessages(self, nMessages):
+		"""Yields the lines of each message, as a list; a flood counts as many messages."""
+
+		rnd = self.random
+		n = 0
+		yield [
+			self.header('INFO', '__main__', self.threads[0]),
+			'Starting NVDA version 2023.1',
+		]
+		n += 1
+		while n < nMessages:
+			kind = rnd.choices(self.kinds, self.weights)[0]
+			if kind == 'debugFlood':
+				codePath = rnd.choice(CODE_PATHS)
+				for i in range(min(self.floodSize, nMessages - n)):
+					yield [self.header('DEBUG', codePath), 'Flood message {i} for object at 0x{addr:08x}'.format(
+						i=i,
+						addr=rnd.getrandbits(32),
+					)]
+					n += 1
+				continue
+			yield getattr(self, 'make_' + kind)()
+			n += 1
+
+	def make_io(self):
+		rnd = self.random
+		kind = rnd.random()
+		mainThread = self.threads[0]
+		if kind < 0.25:
+			return [
+				self.header('IO', 'inputCore.InputManager.executeGesture', mainThread),
+				'Input: ' + rnd.choice(GESTURES),
+			]
+		if kind < 0.85:
+			seq = [repr(rnd.choice(SPEECH_TEXTS)) for i in range(rnd.randint(1, 4))]
+			if rnd.random() < 0.3:
+				seq.insert(0, "LangChangeCommand ('fr_FR')")
+			if rnd.random() < 0.2:
+				seq.append('BreakCommand(time=100)')
+			if rnd.random() < 0.2:
+				seq.append('CancellableSpeech (still valid)')
+			return [self.header('IO', 'speech.speech.speak', mainThread), 'Speaking [{}]'.format(', '.join(seq))]
+		if kind < 0.9:
+			return [
+				self.header('IO', 'tones.beep', mainThread),
+				'Beep at pitch 440.0, for 50 ms, left volume 50, right volume 50',
+			]
+		if kind < 0.95:
+			return [
+				self.header('IO', 'speech.speech.speak', mainThread),
+				'0.{} sec since input'.format(rnd.randint(10, 999)),
+			]
+		return [
+			self.header('IO', 'braille.BrailleHandler.update', mainThread),
+			'Braille regions text: [{!r}]'.format(rnd.choice(SPEECH_TEXTS)),
+		]
+
+	def make_debug(self):
+		return [self.header('DEBUG', self.random.choice(CODE_PATHS)), 'Debug message with value {}'.format(
+			self.random.randint(0, 10000)
+		)]
+
+	def make_info(self):
+		return [self.header('INFO', self.random.choice(CODE_PATHS)), 'Information message']
+
+	def make_debugWarning(self):
+		return [self.header('DEBUGWARNING', self.random.choice(CODE_PATHS)), 'Could not get property']
+
+	def make_warning(self):
+		return [self.header('WARNING', self.random.choice(CODE_PATHS)), 'Something unexpected happened']
+
+	def make_error(self):
+		rnd = self.random
+		lines = [self.header('ERROR', rnd.choice(CODE_PATHS)), 'Error running function from queue']
+		lines.append('Traceback (most recent call last):')
+		for path, func in rnd.sample(TRACEBACK_FRAMES, rnd.randint(2, 5)):
+			lines.append('  File "{path}", line {line}, in {func}'.format(
+				path=path,
+				line=rnd.randint(1, 3000),
+				func=func,
+			))
+			lines.append('    someCall()')
+		lines.append(rnd.choice(EXCEPTIONS))
+		return lines
+
+	def make_errorNoTraceback(self):
+		return [self.header('ERROR', self.random.choice(CODE_PATHS)), 'Failed to handle object 0x{:08x}'.format(
+			self.random.getrandbits(32)
+		)]
+
+	def generate(self, nMessages, newline='\n'):
+		"""Returns the text of a log containing nMessages messages."""
+		return newline.join(line for msg in self.iterMessages(nMessages) for line in msg) + newline
+
+
+def parseMix(text):
+	"""Parses a message mix such as "io=30,debug=40,error=5"; unspecified kinds get a weight of 0."""
+	mix = {kind: 0 for kind in DEFAULT_MIX}
+	for item in text.split(','):
+		kind, sep, weight = item.partition('=')
+		kind = kind.strip()
+		if kind not in DEFAULT_MIX or not sep:
+			raise argparse.ArgumentTypeError('Invalid mix item: {}'.format(item))
+		mix[kind] = float(weight)
+	return mix
+
+
+def addGeneratorArguments(parser):
+	parser.add_argument('--messages', type=int, default=100000, help='number of messages (default: %(default)s)')
+	parser.add_argument(
+		'--mix',
+		type=parseMix,
+		default=None,
+		help='weights of the message kinds, i.e. their share of the messages, e.g. io=30,debug=40,error=5; '
+		'kinds: {}'.format(', '.join(sorted(DEFAULT_MIX))),
+	)
+	parser.add_argument('--threads', type=int, default=3, help='number of threads (default: %(default)s)')
+	parser.add_argument(
+		'--flood-size',
+		type=int,
+		default=50,
+		help='messages per debug flood (default: %(default)s)',
+	)
+	parser.add_argument('--crlf', action='store_true', help='use CRLF line endings, as on Windows')
+	parser.add_argument('--seed', type=int, default=0, help='random seed (default: %(default)s)')
+
+
+def makeLogFromArgs(args):
+	generator = LogGenerator(mix=args.mix, nThreads=args.threads, floodSize=args.flood_size, seed=args.seed)
+	return generator.generate(args.messages, newline='\r\n' if args.crlf else '\n')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Generates a synthetic NVDA log.')
+	addGeneratorArguments(parser)
+	parser.add_argument('--output', required=True, help='path of the generated log')
+	args = parser.parse_args()
+	with open(args.output, 'w', encoding='utf-8', newline='') as f:
+		f.write(makeLogFromArgs(args))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,194 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Stand-ins for the NVDA modules imported by the add-on, so that its modules can be imported and benchmarked
+outside NVDA, e.g. headless on Linux.
+Only what is needed at import time and by the benchmarked code is provided; any other attribute of a stand-in
+module is a placeholder class.
+Usage:
+import nvdaStandIns
+nvdaStandIns.install()
+from ndtt import logReader
+"""
+
+import builtins
+import logging
+import os
+import sys
+import types
+
+# Path of the folder containing the add-on's global plugin package.
+GLOBAL_PLUGINS_PATH = os.path.join(
+	os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+	'addon',
+	'globalPlugins',
+)
+ADDON_PACKAGE = 'ndtt'
+
+STAND_IN_MODULES = (
+	'api',
+	'baseObject',
+	'braille',
+	'buildVersion',
+	'config',
+	'controlTypes',
+	'core',
+	'editableText',
+	'eventHandler',
+	'globalCommands',
+	'globalPluginHandler',
+	'globalVars',
+	'gui',
+	'gui.dpiScalingHelper',
+	'gui.guiHelper',
+	'gui.logViewer',
+	'gui.nvdaControls',
+	'inputCore',
+	'logHandler',
+	'NVDAObjects',
+	'NVDAObjects.window',
+	'nvwave',
+	'pythonConsole',
+	'queueHandler',
+	'scriptHandler',
+	'shellapi',
+	'speech',
+	'speech.commands',
+	'textInfos',
+	'textInfos.offsets',
+	'tones',
+	'treeInterceptorHandler',
+	'ui',
+	'winUser',
+	'wx',
+)
+
+SPEECH_COMMANDS = (
+	'CharacterModeCommand',
+	'LangChangeCommand',
+	'BreakCommand',
+	'EndUtteranceCommand',
+	'PitchCommand',
+	'VolumeCommand',
+	'RateCommand',
+	'PhonemeCommand',
+	'CallbackCommand',
+	'BeepCommand',
+	'WaveFileCommand',
+	'ConfigProfileTriggerCommand',
+)
+
+
+class Placeholder(object):
+	"""A class accepting any argument and any attribute, used for the objects not provided by the stand-ins."""
+
+	def __init__(self, *args, **kwargs):
+		pass
+
+	def __call__(self, *args, **kwargs):
+		return Placeholder()
+
+	def __getattr__(self, name):
+		return Placeholder()
+
+
+class StandInModule(types.ModuleType):
+	def __getattr__(self, name):
+		if name.startswith('__'):
+			raise AttributeError(name)
+		return Placeholder
+
+
+class SpeechCommand(object):
+	def __init__(self, *args, **kwargs):
+		self.args = args
+		self.kwargs = kwargs
+
+	def __repr__(self):
+		return '{cls}({args!r}, {kwargs!r})'.format(cls=type(self).__name__, args=self.args, kwargs=self.kwargs)
+
+
+class Logger(logging.Logger):
+	"""NVDA's logger, with its additional levels."""
+
+	def debugWarning(self, *args, **kwargs):
+		pass
+
+	def io(self, *args, **kwargs):
+		pass
+
+
+class Addon(object):
+	manifest = {'summary': 'NVDA Dev & Test Toolbox'}
+
+
+class GlobalPlugin(object):
+	def __init__(self, *args, **kwargs):
+		pass
+
+	def terminate(self, *args, **kwargs):
+		pass
+
+
+class ScriptableObject(object):
+	pass
+
+
+def script(**kwargs):
+	def decorator(func):
+		return func
+	return decorator
+
+
+def _makeModule(name):
+	module = StandInModule(name)
+	sys.modules[name] = module
+	if '.' in name:
+		parentName, childName = name.rsplit('.', 1)
+		setattr(sys.modules[parentName], childName, module)
+	return module
+
+
+def install():
+	"""Installs the stand-ins in sys.modules and makes the add-on's package importable as ndtt.
+	The package's __init__ is not run, so that no global plugin is instantiated.
+	"""
+
+	if ADDON_PACKAGE in sys.modules:
+		return
+	builtins._ = lambda s: s
+	builtins.ngettext = lambda singular, plural, n: singular if n == 1 else plural
+	for name in STAND_IN_MODULES:
+		_makeModule(name)
+	modules = sys.modules
+	modules['addonHandler'] = StandInModule('addonHandler')
+	modules['addonHandler'].getCodeAddon = lambda: Addon
+	modules['addonHandler'].initTranslation = lambda: None
+	modules['globalPluginHandler'].GlobalPlugin = GlobalPlugin
+	modules['baseObject'].ScriptableObject = ScriptableObject
+	modules['NVDAObjects.window'].Window = type('Window', (object,), {})
+	modules['treeInterceptorHandler'].TreeInterceptor = type('TreeInterceptor', (object,), {})
+	modules['scriptHandler'].script = script
+	modules['scriptHandler'].getLastScriptRepeatCount = lambda: 0
+	modules['logHandler'].log = Logger('nvda')
+	modules['inputCore'].normalizeGestureIdentifier = lambda identifier: identifier.lower()
+	modules['controlTypes'].OutputReason = types.SimpleNamespace(CARET='caret', QUERY='query')
+	modules['globalVars'].appArgs = types.SimpleNamespace(
+		secure=False,
+		logFileName=os.path.join(os.getcwd(), 'nvda.log'),
+		configPath=os.getcwd(),
+	)
+	textInfos = modules['textInfos']
+	textInfos.POSITION_ALL = 'all'
+	textInfos.POSITION_CARET = 'caret'
+	textInfos.POSITION_FIRST = 'first'
+	textInfos.UNIT_LINE = 'line'
+	modules['textInfos.offsets'].OffsetsTextInfo = type('OffsetsTextInfo', (object,), {})
+	modules['textInfos.offsets'].Offsets = lambda start, end: (start, end)
+	for name in SPEECH_COMMANDS:
+		setattr(modules['speech.commands'], name, type(name, (SpeechCommand,), {}))
+	package = types.ModuleType(ADDON_PACKAGE)
+	package.__path__ = [os.path.join(GLOBAL_PLUGINS_PATH, ADDON_PACKAGE)]
+	modules[ADDON_PACKAGE] = package
@@ -0,0 +1,299 @@
+# -*- coding: UTF-8 -*-
+# NVDA Dev & Test Toolbox add-on for NVDA
+# Copyright (C) 2023 Cyrille Bougot
+# This file is covered by the GNU General Public License.
+
+"""Tests the conversion between the offsets of the log indexes (Python string indexes) and the TextInfo
+offsets, which are counted in UTF-16 code units in rich edit controls and in bytes in Scintilla controls.
+NVDA modules are replaced by the stand-ins of the benchmarks, so that these tests run outside NVDA.
+Usage:
+python -m unittest discover -s tools/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import nvdaStandIns  # noqa: E402
+
+nvdaStandIns.install()
+
+import textInfos  # noqa: E402
+from ndtt import logReader  # noqa: E402
+from ndtt.logReader import LogContainer, LogHeaderIndex, LogOffsetConverter, LogReader  # noqa: E402
+
+# Non-ASCII messages: accented letters (2 bytes in UTF-8), CJK characters (3 bytes in UTF-8) and emojis
+# (4 bytes in UTF-8 and a surrogate pair in UTF-16).
+LOG_TEXT = (
+	"INFO - __main__ (10:00:00.000) - MainThread (1):\n"
+	"Démarrage de NVDA\n"
+	"IO - speech.speech.speak (10:00:01.000) - MainThread (1):\n"
+	"Speaking ['中文文档 😀 emoji']\n"
+	"ERROR - core.main (10:00:02.000) - MainThread (1):\n"
+	"Erreur 💥💥 inattendue\n"
+	"Traceback (most recent call last):\n"
+	"  File \"core.pyc\", line 1, in main\n"
+	"ValueError: é\n"
+	"DEBUGWARNING - ui.message (10:00:03.000) - OutputThread (2):\n"
+	"Fin 🎉\n"
+)
+APPENDED_TEXT = (
+	"INFO - __main__ (10:00:04.000) - MainThread (1):\n"
+	"Ajouté après coup 🚀 ünïcödé\n"
+)
+ENCODINGS = ('utf_16_le', 'utf_8', None)
+
+
+def encode(text, encoding):
+	return text if encoding is None else text.encode(encoding)
+
+
+def decode(data, encoding):
+	return data if encoding is None else data.decode(encoding, 'replace')
+
+
+def getUnitSize(encoding):
+	return 2 if encoding == 'utf_16_le' else 1
+
+
+class FakeTextInfo(textInfos.offsets.OffsetsTextInfo):
+	"""A TextInfo over a story counted in the units of an encoding, as the TextInfos of NVDA's controls."""
+
+	def __init__(self, obj, start, end):
+		self.obj = obj
+		self.encoding = obj.encoding
+		self._startOffset = start
+		self._endOffset = end
+
+	def _getUnits(self, start, end):
+		size = getUnitSize(self.encoding)
+		return self.obj.data[start * size:end * size]
+
+	@property
+	def text(self):
+		return decode(self._getUnits(self._startOffset, self._endOffset), self.encoding)
+
+	def copy(self):
+		return FakeTextInfo(self.obj, self._startOffset, self._endOffset)
+
+	def collapse(self, end=False):
+		if end:
+			self._startOffset = self._endOffset
+		else:
+			self._endOffset = self._startOffset
+
+	def expand(self, unit):
+		assert unit == textInfos.UNIT_LINE
+		size = getUnitSize(self.encoding)
+		lf = encode('\n', self.encoding)
+		data = self.obj.data
+		start = self._startOffset * size
+		while start > 0 and data[start - size:start] != lf:
+			start -= size
+		end = data.find(lf, start)
+		while end >= 0 and end % size:
+			end = data.find(lf, end + 1)
+		end = len(data) if end < 0 else end + size
+		self._startOffset = start // size
+		self._endOffset = end // size
+
+	def move(self, unit, direction):
+		assert unit == textInfos.UNIT_LINE
+		line = self.copy()
+		line.expand(unit)
+		if direction == 1:
+			if line._endOffset >= self.obj.getStoryLength():
+				return 0
+			offset = line._endOffset
+		else:
+			if line._startOffset == 0:
+				return 0
+			line = FakeTextInfo(self.obj, line._startOffset - 1, line._startOffset - 1)
+			line.expand(unit)
+			offset = line._startOffset
+		self._startOffset = self._endOffset = offset
+		return direction
+
+	def setEndPoint(self, other, which):
+		self._endOffset = other._startOffset if which == 'endToStart' else other._endOffset
+
+	def updateSelection(self):
+		self.obj.caretOffset = self._startOffset
+
+
+class FakeLogContainer(LogContainer):
+	"""A log displayed in a control whose TextInfo offsets are counted in units of encoding."""
+
+	def __init__(self, text, encoding, windowHandle):
+		self.encoding = encoding
+		self.windowHandle = windowHandle
+		self.caretOffset = 0
+		self.setText(text)
+
+	def setText(self, text):
+		self.data = encode(text, self.encoding)
+
+	def getStoryLength(self):
+		return len(self.data) // getUnitSize(self.encoding)
+
+	def makeTextInfo(self, position):
+		if position == textInfos.POSITION_ALL:
+			return FakeTextInfo(self, 0, self.getStoryLength())
+		if position == textInfos.POSITION_CARET:
+			return FakeTextInfo(self, self.caretOffset, self.caretOffset)
+		start, end = position
+		if not 0 <= start <= end <= self.getStoryLength():
+			raise ValueError(position)
+		return FakeTextInfo(self, start, end)
+
+
+class TestLogOffsetConverter(unittest.TestCase):
+
+	def test_roundTrip(self):
+		for encoding in ENCODINGS:
+			converter = LogOffsetConverter(encoding)
+			converter.addText(LOG_TEXT)
+			encoded = encode(LOG_TEXT, encoding)
+			size = getUnitSize(encoding)
+			for offset in range(len(LOG_TEXT) + 1):
+				tiOffset = converter.toTextInfoOffset(offset)
+				self.assertEqual(
+					decode(encoded[tiOffset * size:], encoding),
+					LOG_TEXT[offset:],
+					msg=(encoding, offset),
+				)
+				self.assertEqual(converter.fromTextInfoOffset(tiOffset), offset, msg=(encoding, offset))
+
+	def test_offsetInsideCharacter(self):
+		converter = LogOffsetConverter('utf_16_le')
+		converter.addText('a😀b')
+		# The low surrogate of the emoji is converted to the start of the emoji.
+		self.assertEqual(converter.fromTextInfoOffset(2), 1)
+		self.assertEqual(converter.fromTextInfoOffset(3), 2)
+		converter = LogOffsetConverter('utf_8')
+		converter.addText('a中b')
+		self.assertEqual([converter.fromTextInfoOffset(i) for i in range(6)], [0, 1, 1, 1, 2, 3])
+
+	def test_addText(self):
+		for encoding in ENCODINGS:
+			converter = LogOffsetConverter(encoding)
+			converter.addText(LOG_TEXT[:100])
+			converter.addText(LOG_TEXT[100:], 100)
+			reference = LogOffsetConverter(encoding)
+			reference.addText(LOG_TEXT)
+			self.assertEqual(converter.length, reference.length)
+			for offset in range(len(LOG_TEXT) + 1):
+				self.assertEqual(converter.toTextInfoOffset(offset), reference.toTextInfoOffset(offset))
+
+
+class TestLogIndexOffsets(unittest.TestCase):
+
+	def setUp(self):
+		self.spoken = []
+		sys.modules['speech'].speak = self.spoken.append
+		self.addCleanup(LogContainer.logIndexTable.clear)
+		self.addCleanup(LogContainer.logSignatureTable.clear)
+		self.addCleanup(LogContainer.threadFilterTable.clear)
+
+	def makeLog(self, encoding, text=LOG_TEXT):
+		return FakeLogContainer(text, encoding, windowHandle=ENCODINGS.index(encoding) + 1)
+
+	def getHeaderOffsets(self, text):
+		return [offset for offset, match in logReader.iterHeaderMatches(text)]
+
+	def assertCaretOnHeaders(self, obj, text, direction):
+		"""Moves through all the headers of the log from its start (direction=1) or its end (direction=-1) and
+		checks that the caret lands on each of them.
+		"""
+		headerOffsets = self.getHeaderOffsets(text)
+		if direction == 1:
+			obj.caretOffset = 0
+			# The caret is already on the first header.
+			del headerOffsets[0]
+		else:
+			obj.caretOffset = obj.getStoryLength()
+			headerOffsets.reverse()
+		reader = LogReader(obj)
+		for offset in headerOffsets:
+			reader.moveToHeader(direction, 'Message')
+			self.assertEqual(obj.getLogOffset(obj.caretOffset), offset)
+			line = obj.makeTextInfo(textInfos.POSITION_CARET)
+			line.expand(textInfos.UNIT_LINE)
+			self.assertTrue(logReader.RE_MESSAGE_HEADER.match(line.text), msg=line.text)
+
+	def test_headerNavigation(self):
+		for encoding in ENCODINGS:
+			obj = self.makeLog(encoding)
+			self.assertCaretOnHeaders(obj, LOG_TEXT, 1)
+			self.assertCaretOnHeaders(obj, LOG_TEXT, -1)
+		self.assertEqual(len(self.spoken), len(ENCODINGS) * (2 * len(self.getHeaderOffsets(LOG_TEXT)) - 1))
+
+	def test_appendedText(self):
+		for encoding in ENCODINGS:
+			obj = self.makeLog(encoding)
+			self.assertEqual(list(obj.getHeaderIndex().offsets), self.getHeaderOffsets(LOG_TEXT))
+			converter = obj.getLogIndex(LogOffsetConverter)
+			text = LOG_TEXT + APPENDED_TEXT
+			obj.setText(text)
+			index = obj.getHeaderIndex()
+			self.assertEqual(list(index.offsets), self.getHeaderOffsets(text))
+			self.assertIs(obj.getLogIndex(LogOffsetConverter), converter)
+			self.assertEqual(converter.length, len(text))
+			self.assertCaretOnHeaders(obj, text, 1)
+
+	def test_caretMessageText(self):
+		for encoding in ENCODINGS:
+			obj = self.makeLog(encoding)
+			start = LOG_TEXT.index('Erreur 💥💥')
+			obj.caretOffset = obj.getLogIndex(LogOffsetConverter).toTextInfoOffset(start)
+			text = LogReader(obj).getCaretMessageText()
+			self.assertTrue(text.startswith('ERROR - core.main'), msg=text)
+			self.assertTrue(text.endswith('ValueError: é\n'), msg=text)
+
+	def test_indexOutOfDate(self):
+		"""The quick navigation falls back to line by line reading when the index does not match the log."""
+		for encoding in ENCODINGS:
+			obj = self.makeLog(encoding)
+			index = obj.getHeaderIndex()
+			index.offsets[1] -= 2
+			LogReader(obj).moveToHeader(1, 'Message')
+			line = obj.makeTextInfo(textInfos.POSITION_CARET)
+			line.expand(textInfos.UNIT_LINE)
+			self.assertTrue(line.text.startswith('IO - speech.speech.speak'), msg=line.text)
+			self.assertIsNot(obj.getHeaderIndex(), index)
+
+	def assertMovesTo(self, obj, move, lineStart):
+		"""Calls move with a LogReader on obj, from the start of the log, and checks that the caret lands on the
+		line starting with lineStart.
+		"""
+		obj.caretOffset = 0
+		move(LogReader(obj))
+		line = obj.makeTextInfo(textInfos.POSITION_CARET)
+		line.expand(textInfos.UNIT_LINE)
+		self.assertTrue(line.text.startswith(lineStart), msg=(obj.encoding, line.text))
+		self.assertEqual(obj.getLogOffset(obj.caretOffset), LOG_TEXT.index(lineStart))
+
+	def test_indexNavigation(self):
+		"""The quick navigation commands using other indexes than the header index."""
+		for encoding in ENCODINGS:
+			obj = self.makeLog(encoding)
+			self.assertMovesTo(obj, lambda r: r.moveToSearchHit(1, 'emoji'), 'IO - speech')
+			self.assertMovesTo(obj, lambda r: r.moveToSearchHit(1, 'fin'), 'DEBUGWARNING')
+			self.assertMovesTo(obj, lambda r: r.moveToDistinctError(1), 'ERROR')
+			self.assertMovesTo(obj, lambda r: r.moveToTracebackFrame(1), '  File "core.pyc"')
+			self.assertMovesTo(obj, lambda r: r.moveToTime('10:00:03'), 'DEBUGWARNING')
+			LogContainer.threadFilterTable[obj.getWindowHandle()] = ('OutputThread', '2')
+			self.assertMovesTo(obj, lambda r: r.moveToHeader(1, 'Message'), 'DEBUGWARNING')
+
+	def test_headerIndex(self):
+		for encoding in ENCODINGS:
+			obj = self.makeLog(encoding)
+			index = obj.getLogIndex(LogHeaderIndex)
+			for offset in index.offsets:
+				info = obj.makeTextInfoFromLogOffsets(offset, index.getMessageEnd(offset))
+				self.assertEqual(info.text, LOG_TEXT[offset:index.getMessageEnd(offset)])
+
+
+if __name__ == '__main__':
+	unittest.main()